@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+build_bundle.py
+Запускается GitHub Actions после generate_stats.py.
+Собирает весь каталог для страницы «все объекты» один раз, а не в браузере:
+объекты всех файлов застройщиков сливаются с той же дедупликацией по id,
+что и в generate_stats.py (первый файл побеждает, объекты без площади
+и почти-дубликаты из data/meta/duplicates.json не входят), и раскладываются
+по готовым сортировкам:
+
+    price      по цене, «по запросу» (0) — в конце
+    price_m2   по цене за м², «по запросу» — в конце
+    area       по площади
+    newest     новые сверху — по first_seen из data/meta/ledger_state.json
+               (объекты без даты появления — в конце, в порядке каталога)
+
+Каждая сортировка режется на страницы по PAGE_SIZE объектов:
+    /data/bundle/{сортировка}/{n}.json       (n с 1)
+    /data/bundle/manifest.json               — страницы, объектов, кодировки
+
+Первая страница любой сортировки — один небольшой запрос. В репозиторий
+попадают только .json: raw.githubusercontent.com отдаёт .json.gz как
+бинарный файл без Content-Encoding, а сжатые страницы на каждый push
+только раздували бы историю. Для хостинга, который умеет отдавать
+готовые сжатые файлы (nginx gzip_static / brotli_static), варианты
+собираются при деплое:
+    python build_bundle.py --compress    # + {n}.json.gz и {n}.json.br
+                                         #   (.br — если установлен brotli)
+"""
+
+import argparse
+
+import gzip
+import json
+import os
+import sys
+from datetime import date, datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(BASE_DIR, "tools"))
+
+import fileio
+from catalog import iter_catalog_units, load_duplicates
+from ledger import FIRST_SEEN, Ledger
+
+try:
+    import brotli
+except ImportError:  # без brotli --compress пишет только .json.gz
+    brotli = None
+
+DEVELOPERS_DIR = os.path.join(BASE_DIR, "data", "developers")
+META_DIR = os.path.join(BASE_DIR, "data", "meta")
+LEDGER_STATE_FILE = os.path.join(META_DIR, "ledger_state.json")
+BUNDLE_DIR = os.path.join(BASE_DIR, "data", "bundle")
+MANIFEST_FILE = os.path.join(BUNDLE_DIR, "manifest.json")
+
+PAGE_SIZE = 100
+ORDERS = ["price", "price_m2", "area", "newest"]
+
+def _number(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def sort_keys(unit, ledger):
+    """{сортировка: ключ}; при равных ключах остаётся порядок каталога"""
+    area = _number(unit.get("area"))
+    price = _number(unit.get("price"))
+    rec = ledger.units.get(unit.get("id", ""))
+    first_seen = rec[FIRST_SEEN] if rec else None
+    return {
+        # (0, цена) раньше (1, 0): объекты без цены — в конце
+        "price": (0, price) if price > 0 else (1, 0),
+        "price_m2": (0, price / area) if price > 0 else (1, 0),
+        "area": area,
+        # Новые сверху — по убыванию даты, без даты — в конце
+        "newest": (0, -date.fromisoformat(first_seen).toordinal()) if first_seen else (1, 0),
+    }
+
+def orderings(units, ledger):
+    """{сортировка: [номера объектов]}"""
+    keys = [sort_keys(unit, ledger) for unit in units]
+    return {
+        order: sorted(range(len(units)), key=lambda n: (keys[n][order], n))
+        for order in ORDERS
+    }
+
+def encodings(compress):
+    """Расширения сжатых вариантов, которые пишет эта сборка"""
+    if not compress:
+        return []
+    return [".gz"] + ([".br"] if brotli is not None else [])
+
+def compressed(data):
+    """{расширение: байты} сжатых вариантов страницы"""
+    # mtime=0 — одинаковая страница даёт одинаковые байты, без лишних коммитов
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return variants
+
+def write_bytes(path, data):
+    """Атомарно записывает байты, если они другие. True — записан"""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+def write_page(path, doc, exts=()):
+    """Страница и её сжатые варианты exts; возвращает ({файл: размер}, записана?)
+
+    Сжатие (gzip 9 / brotli 11) — самая долгая часть сборки, поэтому
+    варианты пересжимаются, только если изменился JSON страницы
+    или какого-то варианта ещё нет.
+    """
+    text = json.dumps(doc, ensure_ascii=False, separators=(",", ":"))
+    variants = [path + ext for ext in exts]
+    missing = not all(os.path.exists(v) for v in variants)
+    written = fileio.write_if_changed(path, text)
+    data = text.encode("utf-8")
+    if variants and (written or missing):
+        for ext, packed in compressed(data).items():
+            write_bytes(path + ext, packed)
+    sizes = {path: len(data)}
+    sizes.update((v, os.path.getsize(v)) for v in variants)
+    return sizes, written
+
+def remove_stale(keep):
+    """Удаляет страницы прошлых сборок, которых нет в новой (каталог уменьшился)"""
+    removed = 0
+    for root, _, files in os.walk(BUNDLE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            if path not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Сборка data/bundle — страниц каталога по сортировкам")
+    parser.add_argument("--compress", action="store_true",
+                        help="ещё и .json.gz / .json.br — для деплоя на свой сервер, не для коммита")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    exts = encodings(args.compress)
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    # Дедупликация по id и объекты без площади — в iter_catalog_units
+    units = [unit for _, _, unit in iter_catalog_units(DEVELOPERS_DIR, skip=load_duplicates(META_DIR))]
+    ledger = Ledger.load(LEDGER_STATE_FILE)
+
+    manifest = {
+        "version": "1.0",
+        "description": "Автогенерируется build_bundle.py. Не редактировать вручную.",
+        "generated": now,
+        "units": len(units),
+        "page_size": PAGE_SIZE,
+        "encodings": [{".gz": "gzip", ".br": "br"}[ext] for ext in exts],
+        "orders": {},
+    }
+    keep = {MANIFEST_FILE}
+    changed = 0
+
+    for order, ordinals in orderings(units, ledger).items():
+        pages = max((len(ordinals) + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+        first_sizes = None
+        for page in range(1, pages + 1):
+            path = os.path.join(BUNDLE_DIR, order, f"{page}.json")
+            chunk = ordinals[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+            sizes, written = write_page(path, {
+                "order": order,
+                "page": page,
+                "pages": pages,
+                "units": [units[n] for n in chunk],
+            }, exts)
+            keep.update(sizes)
+            changed += written
+            if first_sizes is None:
+                # Ключи — расширения: json / gz / br
+                first_sizes = {os.path.splitext(f)[1][1:]: size for f, size in sizes.items()}
+        manifest["orders"][order] = {
+            "path": f"data/bundle/{order}/{{page}}.json",
+            "pages": pages,
+            "first_page": first_sizes,
+        }
+
+    removed = remove_stale(keep)
+    manifest_written = fileio.write_json_if_changed(MANIFEST_FILE, manifest)
+
+    print(f"📚 Каталог: {len(units)} объектов, {len(ORDERS)} сортировки по {PAGE_SIZE} на странице")
+    for order, info in manifest["orders"].items():
+        sizes = ", ".join(f"{k} {v / 1024:.1f} КБ" for k, v in info["first_page"].items())
+        print(f"   • {order}: страниц {info['pages']}, первая — {sizes}")
+    print(f"   Изменилось страниц: {changed}")
+    if args.compress and brotli is None:
+        print("⚠️  brotli не установлен — .br не пишутся (pip install brotli)")
+    if removed:
+        print(f"🗑️  Удалено устаревших файлов: {removed}")
+    if manifest_written:
+        print(f"✅ manifest.json обновлён: {MANIFEST_FILE}")
+    else:
+        print("⏭️  manifest.json без изменений")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+build_indexes.py
+Запускается GitHub Actions после generate_stats.py.
+Строит инвертированные индексы каталога — /data/indexes/inverted.json:
+
+    metro      станция  → объекты с этой станцией в metro
+    jk         ЖК       → объекты ЖК
+    developer  застройщик → его объекты
+    okrug      округ districts.json → объекты округа (по district,
+               иначе по станциям метро из реестра, иначе МО по городу)
+
+Объект — номер в общем списке units.ids (порядок и дедупликация как в
+generate_stats.py). Списки номеров (postings) упакованы
+columnar.pack_postings: разности соседних номеров varint + base64.
+Каскадный фильтр «округ → метро → ЖК» на сайте — пересечение
+этих множеств, без загрузки файлов застройщиков.
+
+Формат:
+    {
+      "units": {"count": 5949, "ids": ["pik-5-0", ...],
+                "files": [{"path": "data/developers/pik/pik_sale.json",
+                           "first": 0, "count": 1502}, ...]},
+      "indexes": {
+        "metro": {"Тульская": {"count": 12, "postings": "AwIBhgE="}, ...},
+        ...
+      }
+    }
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(BASE_DIR, "tools"))
+
+import fileio
+from catalog import Okrugs, iter_catalog_units, load_duplicates
+from columnar import pack_postings, unpack_postings
+
+DEVELOPERS_DIR = os.path.join(BASE_DIR, "data", "developers")
+META_DIR = os.path.join(BASE_DIR, "data", "meta")
+INDEXES_DIR = os.path.join(BASE_DIR, "data", "indexes")
+INVERTED_FILE = os.path.join(INDEXES_DIR, "inverted.json")
+
+# Индексы в порядке записи в файл
+INDEX_NAMES = ["metro", "jk", "developer", "okrug"]
+
+def unit_keys(unit, okrugs):
+    """{индекс: [ключи]} объекта — по каким ключам он попадает в каждый индекс"""
+    metro = [m for m in dict.fromkeys(unit.get("metro") or []) if m]
+    jk = unit.get("jk")
+    developer = unit.get("developer")
+    okrug = okrugs.resolve(unit.get("district"), unit.get("metro"), unit.get("city"))
+    return {
+        "metro": metro,
+        "jk": [jk] if jk else [],
+        "developer": [developer] if developer else [],
+        "okrug": [okrug] if okrug else [],
+    }
+
+def build(catalog_units, okrugs):
+    """(units, {индекс: {ключ: [номера]}}) по потоку (filepath, meta, unit)"""
+    ids = []
+    files = []
+    postings = {name: {} for name in INDEX_NAMES}
+    for filepath, _, unit in catalog_units:
+        ordinal = len(ids)
+        ids.append(unit.get("id", ""))
+        rel = os.path.relpath(filepath, BASE_DIR).replace(os.sep, "/")
+        if not files or files[-1]["path"] != rel:
+            files.append({"path": rel, "first": ordinal, "count": 0})
+        files[-1]["count"] += 1
+        for name, keys in unit_keys(unit, okrugs).items():
+            for key in keys:
+                postings[name].setdefault(key, []).append(ordinal)
+    units = {"count": len(ids), "ids": ids, "files": files}
+    return units, postings
+
+def encode_index(lists, order=None):
+    """{ключ: [номера]} → {ключ: {"count", "postings"}}; ключи по order или по алфавиту"""
+    keys = sorted(lists, key=lambda k: (order.get(k, len(order)), k) if order else k)
+    return {k: {"count": len(lists[k]), "postings": pack_postings(lists[k])} for k in keys}
+
+def lookup(doc, index, key):
+    """Множество номеров объектов по ключу индекса (пустое, если ключа нет)"""
+    entry = doc["indexes"].get(index, {}).get(key)
+    return set(unpack_postings(entry["postings"])) if entry else set()
+
+def main():
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    okrugs = Okrugs.load(META_DIR)
+
+    units, postings = build(iter_catalog_units(DEVELOPERS_DIR, skip=load_duplicates(META_DIR)), okrugs)
+    okrug_order = {oid: i for i, oid in enumerate(okrugs.labels)}
+    doc = {
+        "version": "1.0",
+        "description": "Автогенерируется build_indexes.py. Не редактировать вручную.",
+        "generated": now,
+        "units": units,
+        "indexes": {
+            name: encode_index(postings[name], okrug_order if name == "okrug" else None)
+            for name in INDEX_NAMES
+        },
+    }
+
+    written = fileio.write_json_if_changed(INVERTED_FILE, doc, indent=None)
+
+    sizes = ", ".join(f"{name}: {len(doc['indexes'][name])}" for name in INDEX_NAMES)
+    print(f"🔎 Индексы по {units['count']} объектам — ключей {sizes}")
+    if written:
+        print(f"✅ inverted.json обновлён: {INVERTED_FILE}")
+    else:
+        print("⏭️  inverted.json без изменений")
+
+if __name__ == "__main__":
+    main()
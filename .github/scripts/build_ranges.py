@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+build_ranges.py
+Запускается GitHub Actions после build_indexes.py.
+Пишет /data/indexes/ranges.json — всё для слайдеров цены и площади:
+
+    columns     отсортированные price / price_m2 / area всего каталога
+                и перестановка order: order[i] — номер объекта с i-м
+                по величине значением (номера те же, что в inverted.json)
+    histograms  "плитка|сделка" → min / max / корзины для каждого слайдера
+
+Фильтр «цена от A до B» — два бинарных поиска по values и срез order;
+пересечение с postings из inverted.json даёт объекты под все фильтры.
+
+Массивы упакованы как в columnar.py (base64 little-endian):
+    values — u32 (целые < 2^32) или f64, order — u8/u16/u32 по числу объектов.
+Объекты без цены (0 — «по запросу») в price и price_m2 не входят.
+"""
+
+import bisect
+import os
+import sys
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(BASE_DIR, "tools"))
+
+import fileio
+from catalog import category_filters, iter_catalog_units, load_duplicates, load_meta, match_filter
+from columnar import INDEX_TYPES, index_width, pack_array, unpack_array
+from normalize import normalize_catalog_type
+
+DEVELOPERS_DIR = os.path.join(BASE_DIR, "data", "developers")
+META_DIR = os.path.join(BASE_DIR, "data", "meta")
+INDEXES_DIR = os.path.join(BASE_DIR, "data", "indexes")
+RANGES_FILE = os.path.join(INDEXES_DIR, "ranges.json")
+
+METRICS = ["price", "price_m2", "area"]
+DEALS = ["sale", "rent"]
+HISTOGRAM_BINS = 20
+ANY = "*"
+
+def unit_metrics(unit):
+    """{метрика: значение} объекта; цены нет — нет price и price_m2"""
+    area = float(unit.get("area") or 0)
+    values = {"area": area}
+    try:
+        price = float(unit.get("price") or 0)
+    except (TypeError, ValueError):
+        price = 0
+    if price > 0:
+        values["price"] = int(price) if price.is_integer() else price
+        values["price_m2"] = round(price / area)
+    return values
+
+def sorted_column(pairs, total):
+    """[(значение, номер)] → упакованные отсортированные values и order"""
+    pairs.sort()
+    values = [v for v, _ in pairs]
+    is_u32 = all(isinstance(v, int) and 0 <= v < 2 ** 32 for v in values)
+    width = index_width(total)
+    return {
+        "type": "u32" if is_u32 else "f64",
+        "count": len(values),
+        "min": values[0] if values else None,
+        "max": values[-1] if values else None,
+        "values": pack_array("I" if is_u32 else "d", values),
+        "width": width,
+        "order": pack_array(INDEX_TYPES[width], [n for _, n in pairs]),
+    }
+
+def histogram(values, bins=HISTOGRAM_BINS):
+    """Равные корзины от min до max: edges (bins + 1 границ) и counts"""
+    lo, hi = min(values), max(values)
+    if lo == hi:
+        return {"min": lo, "max": hi, "edges": [lo, hi], "counts": [len(values)]}
+    step = (hi - lo) / bins
+    counts = [0] * bins
+    for v in values:
+        counts[min(int((v - lo) / step), bins - 1)] += 1
+    # Для целых (цена) границы тоже целые — их показывают на слайдере
+    digits = None if all(isinstance(v, int) for v in values) else 2
+    edges = [round(lo + i * step, digits) for i in range(bins)] + [hi]
+    return {"min": lo, "max": hi, "edges": edges, "counts": counts}
+
+def build(catalog_units, filters):
+    """(число объектов, columns, histograms) по потоку (filepath, meta, unit)"""
+    pairs = {m: [] for m in METRICS}
+    groups = {}
+    total = 0
+    for ordinal, (_, _, unit) in enumerate(catalog_units):
+        total += 1
+        metrics = unit_metrics(unit)
+        for metric, value in metrics.items():
+            pairs[metric].append((value, ordinal))
+
+        deal = unit.get("deal")
+        if deal not in DEALS:
+            continue
+        fields = {
+            "type": normalize_catalog_type(unit.get("type", "ПСН")),
+            "deal": deal,
+            "developer": unit.get("developer"),
+            "city": unit.get("city"),
+            "district": unit.get("district"),
+        }
+        cats = [cid for cid, flt in filters if match_filter(flt, fields)] + [ANY]
+        for cid in cats:
+            group = groups.setdefault(f"{cid}|{deal}", {m: [] for m in METRICS})
+            for metric, value in metrics.items():
+                group[metric].append(value)
+
+    columns = {m: sorted_column(pairs[m], total) for m in METRICS}
+    order = {cid: i for i, (cid, _) in enumerate(filters + [(ANY, None)])}
+    histograms = {}
+    for key in sorted(groups, key=lambda k: (order[k.split("|")[0]], DEALS.index(k.split("|")[1]))):
+        group = groups[key]
+        histograms[key] = {"count": len(group["area"])}
+        for metric in METRICS:
+            if group[metric]:
+                histograms[key][metric] = histogram(group[metric])
+    return total, columns, histograms
+
+def range_ordinals(doc, metric, lo=None, hi=None):
+    """Номера объектов с lo <= значение <= hi (None — без границы)"""
+    col = doc["columns"][metric]
+    values = unpack_array("I" if col["type"] == "u32" else "d", col["values"])
+    start = 0 if lo is None else bisect.bisect_left(values, lo)
+    end = len(values) if hi is None else bisect.bisect_right(values, hi)
+    order = unpack_array(INDEX_TYPES[col["width"]], col["order"])
+    return set(order[start:end])
+
+def main():
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    filters = category_filters(load_meta("categories", META_DIR))
+
+    total, columns, histograms = build(iter_catalog_units(DEVELOPERS_DIR, skip=load_duplicates(META_DIR)), filters)
+    doc = {
+        "version": "1.0",
+        "description": "Автогенерируется build_ranges.py. Не редактировать вручную.",
+        "generated": now,
+        "units": {"count": total, "ids": "data/indexes/inverted.json"},
+        "bins": HISTOGRAM_BINS,
+        "columns": columns,
+        "histograms": histograms,
+    }
+
+    written = fileio.write_json_if_changed(RANGES_FILE, doc, indent=None)
+
+    bounds = ", ".join(f"{m}: {columns[m]['min']}–{columns[m]['max']}" for m in METRICS)
+    print(f"📏 Диапазоны по {total} объектам ({bounds}), гистограмм: {len(histograms)}")
+    if written:
+        print(f"✅ ranges.json обновлён: {RANGES_FILE}")
+    else:
+        print("⏭️  ranges.json без изменений")
+
+if __name__ == "__main__":
+    main()
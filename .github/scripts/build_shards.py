@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+build_shards.py
+Запускается GitHub Actions после generate_stats.py.
+Раскладывает объекты всех застройщиков по готовым выборкам для сайта:
+    /data/shards/{плитка}/all.json      — все объекты плитки categories.json
+    /data/shards/{плитка}/{округ}.json  — то же внутри округа districts.json
+    /data/shards/manifest.json          — путь, размер и число объектов шарда
+
+Страница грузит manifest и затем только нужный ей шард,
+вместо целых {slug}_{deal}.json с фильтрацией в браузере.
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(BASE_DIR, "tools"))
+
+import fileio
+from catalog import Okrugs, category_filters, iter_catalog_units, load_duplicates, load_meta, match_filter
+from normalize import normalize_catalog_type
+
+DEVELOPERS_DIR = os.path.join(BASE_DIR, "data", "developers")
+META_DIR = os.path.join(BASE_DIR, "data", "meta")
+SHARDS_DIR = os.path.join(BASE_DIR, "data", "shards")
+MANIFEST_FILE = os.path.join(SHARDS_DIR, "manifest.json")
+
+# Шард со всеми объектами плитки, без разбивки по округам
+ALL = "all"
+
+def shard_units(units, filters, okrugs):
+    """{(плитка, округ | ALL): [объекты]} — объект попадает во все подходящие шарды"""
+    shards = {}
+    for unit in units:
+        fields = {
+            "type": normalize_catalog_type(unit.get("type", "ПСН")),
+            "deal": unit.get("deal"),
+            "developer": unit.get("developer"),
+            "city": unit.get("city"),
+            "district": unit.get("district"),
+        }
+        okrug = okrugs.resolve(unit.get("district"), unit.get("metro"), unit.get("city"))
+        for cid, flt in filters:
+            if not match_filter(flt, fields):
+                continue
+            shards.setdefault((cid, ALL), []).append(unit)
+            if okrug:
+                shards.setdefault((cid, okrug), []).append(unit)
+    return shards
+
+def write_shard(path, doc):
+    """Пишет шард, только если он изменился; возвращает (размер, записан?)"""
+    text = json.dumps(doc, ensure_ascii=False, separators=(",", ":"))
+    written = fileio.write_if_changed(path, text)
+    return os.path.getsize(path), written
+
+def remove_stale(keep):
+    """Удаляет шарды прошлых сборок, которых нет в новой (плитку/округ убрали)"""
+    removed = 0
+    for root, _, files in os.walk(SHARDS_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(".json") and path not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
+
+def main():
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    filters = category_filters(load_meta("categories", META_DIR))
+    okrugs = Okrugs.load(META_DIR)
+
+    units = [unit for _, _, unit in iter_catalog_units(DEVELOPERS_DIR, skip=load_duplicates(META_DIR))]
+    shards = shard_units(units, filters, okrugs)
+
+    manifest = {
+        "version": "1.0",
+        "description": "Автогенерируется build_shards.py. Не редактировать вручную.",
+        "generated": now,
+        "shards": {},
+    }
+    keep = {MANIFEST_FILE}
+    changed = 0
+
+    # Порядок манифеста: плитки как в categories.json, внутри — all, затем округа
+    order = {oid: i for i, oid in enumerate([ALL] + list(okrugs.labels))}
+    cat_order = {cid: i for i, (cid, _) in enumerate(filters)}
+    for (cid, okrug) in sorted(shards, key=lambda k: (cat_order[k[0]], order.get(k[1], len(order)))):
+        shard = shards[(cid, okrug)]
+        path = os.path.join(SHARDS_DIR, cid, f"{okrug}.json")
+        rel = os.path.relpath(path, BASE_DIR).replace(os.sep, "/")
+        size, written = write_shard(path, {
+            "category": cid,
+            "okrug": okrug,
+            "filter": dict(filters)[cid],
+            "units": shard,
+        })
+        keep.add(path)
+        changed += written
+        manifest["shards"][f"{cid}/{okrug}"] = {
+            "path": rel,
+            "size": size,
+            "units": len(shard),
+        }
+
+    removed = remove_stale(keep)
+    manifest_written = fileio.write_json_if_changed(MANIFEST_FILE, manifest)
+
+    print(f"🧩 Шардов: {len(manifest['shards'])}, изменилось: {changed} (объектов в каталоге: {len(units)})")
+    if removed:
+        print(f"🗑️  Удалено устаревших шардов: {removed}")
+    if manifest_written:
+        print(f"✅ manifest.json обновлён: {MANIFEST_FILE}")
+    else:
+        print("⏭️  manifest.json без изменений")
+
+if __name__ == "__main__":
+    main()
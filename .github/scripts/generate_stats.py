@@ -4,17 +4,109 @@ generate_stats.py
 Запускается GitHub Actions при каждом коммите.
 Сканирует все JSON файлы в /data/developers/,
 считает объекты, записывает /data/meta/stats.json
+
+Агрегаты по каждому файлу кэшируются в .cache/stats_cache.json
+(ключ — хэш содержимого), поэтому заново парсятся только изменённые файлы.
+Записи объектов для --dedup кэшируются отдельно, в .cache/stats_rows.json.
+Изменённые файлы читаются потоково (tools/jsonstream.py): объекты идут
+по одному, память не зависит от размера файла. Если рядом лежит
+колоночный {slug}_{deal}.col.json (tools/columnar.py), читается он.
+
+В том же проходе строится /data/meta/facets.json — счётчики для фильтров
+сайта (плитка × сделка × округ × метро; застройщики и корзины цены /
+площади — по плитке × сделке),
+а в /data/meta/index.json проставляются sha256 и размер файлов источников
+(и колоночных .col.json рядом с ними — под отдельными ключами).
+Файлы перезаписываются только если изменилось что-то кроме "generated".
+
+С --workers изменённые файлы хэшируются и разбираются в нескольких
+процессах; каждый отдаёт агрегат файла, а сливаются они в главном
+процессе по порядку файлов — результат тот же, что и без --workers.
+
+С --dedup из счётчиков исключаются и почти-дубликаты (tools/dedup.py:
+то же помещение под другим id или из другой выгрузки), а кластеры
+пишутся в /data/meta/duplicates.json; по нему лишние объекты пропускают
+и build_*.py, и tools/catalog_server.py. Запуск без --dedup этот файл
+удаляет — иначе сайт и stats.json разошлись бы.
+
+Свежесть (added_last_7days, last_updated_*) берётся не из даты файла
+(в CI это время checkout), а из журнала объектов tools/ledger.py:
+/data/meta/ledger_state.json сверяется с текущим каталогом, новые
+события дописываются в /data/meta/ledger.jsonl. Только при первом
+запуске журнала (состояния ещё нет) объекты датируются по их файлу —
+"updated", иначе датой изменения.
+    python generate_stats.py              # с кэшем
+    python generate_stats.py --no-cache   # пересчитать всё
+    python generate_stats.py -j 0         # параллельно, по числу ядер
+    python generate_stats.py --dedup      # без почти-дубликатов
 """
 
+import argparse
+import bisect
+import contextlib
+import io
+import itertools
 import json
 import os
-import glob
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(BASE_DIR, "tools"))
+
+import dedup
+import fileio
+import normalize
+from columnar import columnar_path
+from ledger import Ledger, days_ago
+from catalog import (
+    Okrugs, category_filters, developer_files, load_meta, match_filter, open_units, repo_path,
+)
+from normalize import normalize_catalog_type
+
 DEVELOPERS_DIR = os.path.join(BASE_DIR, "data", "developers")
 STATS_FILE = os.path.join(BASE_DIR, "data", "meta", "stats.json")
 INDEX_FILE = os.path.join(BASE_DIR, "data", "meta", "index.json")
+FACETS_FILE = os.path.join(BASE_DIR, "data", "meta", "facets.json")
+DUPLICATES_FILE = os.path.join(BASE_DIR, "data", "meta", "duplicates.json")
+LEDGER_FILE = os.path.join(BASE_DIR, "data", "meta", "ledger.jsonl")
+LEDGER_STATE_FILE = os.path.join(BASE_DIR, "data", "meta", "ledger_state.json")
+META_DIR = os.path.join(BASE_DIR, "data", "meta")
+CACHE_FILE = os.path.join(BASE_DIR, ".cache", "stats_cache.json")
+# Записи объектов (rows) для --dedup — отдельно: обычный запуск их не читает
+ROWS_CACHE_FILE = os.path.join(BASE_DIR, ".cache", "stats_rows.json")
+
+# Версия формата агрегатов в кэше. Увеличь при изменении aggregate_units /
+# правил tools/normalize.py — старые записи будут проигнорированы.
+CACHE_VERSION = 7
+# Версия записей объектов (rows) в кэше --dedup — вдобавок к CACHE_VERSION
+ROWS_VERSION = 1
+
+CATEGORIES = ["ПСН", "Офис", "Аренда ПСН", "ПВЗ", "ГАБ", "Премиум"]
+
+# Измерения ключа counts в facets.json ("a|b|c|d"); "*" — любое значение.
+# developers / price / area — по ключу "плитка|сделка"
+FACET_DIMENSIONS = ["category", "deal", "okrug", "metro"]
+FACET_ANY = "*"
+
+# Контракт facets.json: таблица → измерения её ключа. Других сочетаний
+# (застройщик × округ, цена × метро, ...) в файле нет — такие фильтры
+# считаются по data/indexes (build_indexes.py / build_ranges.py)
+FACET_TABLES = {
+    "counts": FACET_DIMENSIONS,
+    "developers": ["category", "deal"],
+    "price": ["category", "deal"],
+    "area": ["category", "deal"],
+}
+
+# Левые границы корзин: корзина i = [edges[i], edges[i+1])
+PRICE_BUCKETS = {
+    "sale": [0, 10_000_000, 20_000_000, 30_000_000, 50_000_000, 100_000_000, 200_000_000],
+    "rent": [0, 100_000, 200_000, 300_000, 500_000, 1_000_000],
+}
+AREA_BUCKETS = [0, 50, 100, 150, 200, 300, 500, 1000]
 
 def load_json(path):
     try:
@@ -24,22 +116,516 @@ def load_json(path):
         print(f"⚠️  Ошибка чтения {path}: {e}")
         return None
 
-def normalize_type(raw_type):
-    """Нормализует тип помещения к стандарту"""
-    t = (raw_type or "").lower().strip()
-    if "офис" in t or "office" in t:
-        return "Офис"
-    if "габ" in t or "gab" in t or "готов" in t:
-        return "ГАБ"
-    if "пвз" in t or "pvz" in t or "пункт выдачи" in t:
+def categorize(unit_type, is_rent):
+    """Категория для by_category по типу помещения и сделке"""
+    if is_rent and unit_type == "ПСН":
+        return "Аренда ПСН"
+    if is_rent and unit_type == "ПВЗ":
         return "ПВЗ"
-    if "премиум" in t or "premium" in t or "элит" in t:
-        return "Премиум"
+    if unit_type in CATEGORIES:
+        return unit_type
     return "ПСН"
 
-def main():
+def empty_counts():
+    return {"total": 0, "sale": 0, "rent": 0, "by_category": {c: 0 for c in CATEGORIES}}
+
+def add_unit(counts, category, is_rent, n=1):
+    counts["total"] += n
+    counts["rent" if is_rent else "sale"] += n
+    counts["by_category"][category] += n
+
+def add_counts(counts, other):
+    for key in ("total", "sale", "rent"):
+        counts[key] += other[key]
+    for category, n in other["by_category"].items():
+        counts["by_category"][category] += n
+
+# ─────────────────────────────────────────────────────────────
+# ФАСЕТНЫЙ ИНДЕКС (facets.json)
+# Объекты раскладываются только по тем сочетаниям, которые каскадирует
+# сайт ("*" — любое значение):
+#   counts["psn-sale|sale|UAO|Тульская"]   плитка × сделка × округ × метро
+#   developers["psn-sale|sale"]            {застройщик: число}
+#   price["psn-sale|sale"]                 число по корзинам цены сделки
+#   area["psn-sale|*"]                     число по корзинам площади
+# Полный куб со всеми измерениями сразу весит больше самого каталога.
+# Таблицы считаются по каждому файлу и складываются — размер таблиц
+# ограничен размером facets.json, а не числом объектов.
+# ─────────────────────────────────────────────────────────────
+
+def bucket_index(value, edges):
+    """Номер корзины для значения (всё, что меньше первой границы — в 0)"""
+    try:
+        value = float(value or 0)
+    except (TypeError, ValueError):
+        value = 0.0
+    return max(bisect.bisect_right(edges, value) - 1, 0)
+
+class FacetRules:
+    """Плитки categories.json и округа districts.json: куда попадает объект.
+
+    digest — хэш обоих файлов: агрегаты в кэше посчитаны по этим правилам.
+    """
+
+    def __init__(self, meta_dir=None):
+        meta_dir = meta_dir or META_DIR
+        self.filters = category_filters(load_meta("categories", meta_dir))
+        self.okrugs = Okrugs.load(meta_dir)
+        self.digest = "|".join(
+            fileio.file_digest(os.path.join(meta_dir, f"{name}.json"))[0] or ""
+            for name in ("categories", "districts")
+        )
+        self._cats = {}
+
+    def categories(self, unit_type, deal, developer, city, district):
+        """Плитки, под фильтр которых подходит объект (кортеж id)"""
+        key = (unit_type, deal, developer, city, district)
+        cats = self._cats.get(key)
+        if cats is None:
+            fields = {
+                "type": unit_type, "deal": deal, "developer": developer,
+                "city": city, "district": district,
+            }
+            cats = self._cats[key] = tuple(
+                cid for cid, flt in self.filters if match_filter(flt, fields)
+            )
+        return cats
+
+class FacetTables:
+    """Таблицы facets.json — одного файла или всего каталога"""
+
+    def __init__(self, doc=None):
+        doc = doc or {}
+        self.counts = Counter(doc.get("counts", {}))
+        self.developers = {k: Counter(v) for k, v in doc.get("developers", {}).items()}
+        self.price = {k: list(v) for k, v in doc.get("price", {}).items()}
+        self.area = {k: list(v) for k, v in doc.get("area", {}).items()}
+
+    def add(self, cats, deal, okrug, metro, developer, price_bucket, area_bucket, n=1):
+        cat_axis = cats + (FACET_ANY,)
+        deal_axis = (deal, FACET_ANY) if deal else (FACET_ANY,)
+        okrug_axis = (okrug, FACET_ANY) if okrug else (FACET_ANY,)
+        for key in itertools.product(cat_axis, deal_axis, okrug_axis, metro + (FACET_ANY,)):
+            self.counts["|".join(key)] += n
+        for cat in cat_axis:
+            for d in deal_axis:
+                key = f"{cat}|{d}"
+                self.developers.setdefault(key, Counter())[developer] += n
+                self.area.setdefault(key, [0] * len(AREA_BUCKETS))[area_bucket] += n
+            # Корзины цены у продажи и аренды разные — только по конкретной сделке
+            if deal in PRICE_BUCKETS:
+                self.price.setdefault(f"{cat}|{deal}", [0] * len(PRICE_BUCKETS[deal]))[price_bucket] += n
+
+    def update(self, other):
+        self.counts.update(other.counts)
+        for key, devs in other.developers.items():
+            self.developers.setdefault(key, Counter()).update(devs)
+        for mine, theirs in ((self.price, other.price), (self.area, other.area)):
+            for key, buckets in theirs.items():
+                total = mine.setdefault(key, [0] * len(buckets))
+                for i, n in enumerate(buckets):
+                    total[i] += n
+
+    def to_dict(self):
+        return {
+            "counts": dict(sorted(self.counts.items())),
+            "developers": {k: dict(sorted(v.items())) for k, v in sorted(self.developers.items())},
+            "price": dict(sorted(self.price.items())),
+            "area": dict(sorted(self.area.items())),
+        }
+
+def facets_json(tables, rules, generated):
+    return {
+        "version": "2.1",
+        "description": (
+            "Автогенерируется generate_stats.py. Ключи — значения измерений через '|', '*' — любое. "
+            "Сочетания есть только те, что в tables; остальные (застройщик × округ, "
+            "цена × метро, ...) — по data/indexes."
+        ),
+        "generated": generated,
+        "dimensions": FACET_DIMENSIONS,
+        "tables": FACET_TABLES,
+        "any": FACET_ANY,
+        "buckets": {"price": PRICE_BUCKETS, "area": AREA_BUCKETS},
+        "okrugs": rules.okrugs.labels,
+        **tables.to_dict(),
+    }
+
+# ─────────────────────────────────────────────────────────────
+# АГРЕГАТ ОДНОГО ФАЙЛА
+# Объекты файла сразу сворачиваются — записи на объект в агрегате нет,
+# кроме id (нужны для дедупликации между файлами и журнала):
+# {
+#   "developer": str,  "deal": str,
+#   "counts": счётчики файла (с дедупликацией внутри файла),
+#   "facets": таблицы facets.json по файлу (FacetTables),
+#   "ids":    [[id, цена]] учтённых объектов с id; [id, None] — объект
+#             без площади (id занят, но не считается),
+#   "rows":   только с --dedup: записи объектов в порядке файла
+#             [id, тип, сделка, district, city, metro, price, area,
+#              jk, address, floor, номер в файле] или [id, None]
+# }
+# Агрегаты сливаются в порядке файлов. Если id файла уже встречался
+# раньше (редко), агрегат пересчитывается без этих объектов: из rows
+# или повторным чтением файла. Результат — как у прохода по всем
+# объектам подряд.
+# ─────────────────────────────────────────────────────────────
+
+# Сколько разных ячеек копить перед раскладкой в таблицы: одинаковые
+# объекты (один ЖК, метро, корзины) раскладываются один раз, а память
+# на файл ограничена
+FOLD_CELLS = 4096
+
+def unit_row(unit, uid, area, deal, n=None):
+    """Поля объекта для агрегата; с n (номер в файле) — запись для --dedup:
+    ещё jk / address / floor и n"""
+    row = [
+        uid or "",
+        normalize_catalog_type(unit.get("type", "ПСН")),
+        unit.get("deal", deal),
+        unit.get("district") or "",
+        unit.get("city") or "",
+        list(unit.get("metro") or []),
+        unit.get("price") or 0,
+        area,
+    ]
+    if n is not None:
+        row += [unit.get("jk") or "", unit.get("address") or "", unit.get("floor"), n]
+    return row
+
+class FileFold:
+    """Сворачивает записи объектов файла в счётчики, таблицы facets и id"""
+
+    def __init__(self, rules, developer):
+        self.rules = rules
+        self.developer = developer
+        self.counts = empty_counts()
+        self.facets = FacetTables()
+        self.cells = Counter()
+        self.ids = []
+
+    def add(self, row):
+        uid = row[0]
+        if row[1] is None:
+            self.ids.append([uid, None])
+            return
+        if uid:
+            self.ids.append([uid, row[6]])
+        unit_type, deal, district, city, metro, price, area = row[1:8]
+        unit_is_rent = deal == "rent"
+        add_unit(self.counts, categorize(unit_type, unit_is_rent), unit_is_rent)
+
+        cats = self.rules.categories(unit_type, deal, self.developer, city, district)
+        okrug = self.rules.okrugs.resolve(district, metro, city)
+        deal = deal if isinstance(deal, str) else ""
+        self.cells[(
+            cats,
+            deal,
+            okrug,
+            tuple(dict.fromkeys(str(m) for m in metro if m)),
+            bucket_index(price, PRICE_BUCKETS.get(deal, PRICE_BUCKETS["sale"])),
+            bucket_index(area, AREA_BUCKETS),
+        )] += 1
+        if len(self.cells) >= FOLD_CELLS:
+            self.flush()
+
+    def flush(self):
+        developer = str(self.developer)
+        for (cats, deal, okrug, metro, price, area), n in self.cells.items():
+            self.facets.add(cats, deal, okrug, metro, developer, price, area, n)
+        self.cells.clear()
+
+    def finish(self, deal):
+        self.flush()
+        return {
+            "developer": self.developer,
+            "deal": deal,
+            "counts": self.counts,
+            "facets": self.facets.to_dict(),
+            "ids": self.ids,
+        }
+
+def aggregate_units(units, meta, rules, developer=None, exclude=(), keep_rows=False):
+    """Считает агрегат файла.
+
+    units — итерируемые объекты файла (в т.ч. поток UnitStream),
+    meta — ключи верхнего уровня, "deal" и "developer" уже прочитаны;
+    developer — застройщик, если в meta его нет (папка файла).
+    exclude — id, уже учтённые в предыдущих файлах (не считаются).
+    keep_rows — сохранить записи объектов (rows) для --dedup.
+    """
+    deal = meta.get("deal", "sale")
+    if meta.get("developer") is not None:
+        developer = meta["developer"]
+    seen_ids = set()
+    fold = FileFold(rules, developer)
+    rows = [] if keep_rows else None
+
+    for n, unit in enumerate(units):
+        uid = unit.get("id", "")
+        # Дедупликация по id
+        if uid and uid in seen_ids:
+            continue
+        if uid:
+            seen_ids.add(uid)
+            if uid in exclude:
+                continue
+
+        area = float(unit.get("area", 0) or 0)
+        if area > 0:
+            row = unit_row(unit, uid, area, deal, n if keep_rows else None)
+        elif uid:
+            row = [uid, None]   # пропускаем объекты без площади, id занят
+        else:
+            continue
+        fold.add(row)
+        if keep_rows:
+            rows.append(row)
+
+    agg = fold.finish(deal)
+    if keep_rows:
+        agg["rows"] = rows
+    return agg
+
+def aggregate_file(filepath, rules, exclude=(), keep_rows=False):
+    """Потоково читает файл и считает его агрегат; None — файл битый или пустой"""
+    developer = os.path.basename(os.path.dirname(filepath))
+    stream = open_units(filepath)
+    try:
+        units = iter(stream)
+        first = next(units, None)
+        if first is not None and not ("deal" in stream.meta and "developer" in stream.meta):
+            # "deal" / "developer" после "units" (или их нет) — сначала
+            # дочитываем meta, затем второй проход по объектам
+            for _ in units:
+                pass
+            meta = dict(stream.meta)
+            stream = open_units(filepath)
+            units = iter(stream)
+        else:
+            meta = stream.meta
+            units = itertools.chain([first] if first is not None else [], units)
+        agg = aggregate_units(units, meta, rules, developer, exclude, keep_rows)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Ошибка чтения {filepath}: {e}")
+        return None
+    if not stream.keys:
+        return None
+    return agg
+
+def refold(filepath, agg, rules, exclude, skip=()):
+    """Агрегат файла без объектов с id из exclude и без записей rows
+    с номерами из skip (почти-дубликаты)"""
+    if "rows" not in agg:
+        # Без rows — перечитываем файл; случается, только если id повторяется
+        return aggregate_file(filepath, rules, exclude) or agg
+    fold = FileFold(rules, agg["developer"])
+    for i, row in enumerate(agg["rows"]):
+        if (row[0] and row[0] in exclude) or i in skip:
+            continue
+        fold.add(row)
+    return fold.finish(agg["deal"])
+
+def merge_aggregate(counts, agg, seen_ids, refold_file=None, skip=()):
+    """Добавляет агрегат файла к общим счётчикам.
+
+    refold_file(exclude, skip) пересчитывает агрегат без объектов, чьи id
+    уже заняты предыдущими файлами, и без записей skip (почти-дубликаты;
+    их id всё равно считаются занятыми).
+    Возвращает учтённый агрегат файла.
+    """
+    ids = [uid for uid, _ in agg["ids"]]
+    exclude = seen_ids.intersection(ids)
+    seen_ids.update(ids)
+    if exclude or skip:
+        agg = refold_file(exclude, skip)
+    add_counts(counts, agg["counts"])
+    return agg
+
+# ─────────────────────────────────────────────────────────────
+# ПОЧТИ-ДУБЛИКАТЫ (--dedup)
+# Объекты, пережившие дедупликацию по id, раскладываются в
+# dedup.DedupIndex в порядке файлов — в кластере остаётся первый.
+# ─────────────────────────────────────────────────────────────
+
+def entry_unit(entry):
+    """Запись агрегата → поля объекта, которые сравнивает dedup.py"""
+    uid, _, deal, _, _, _, price, area, jk, address, floor, _ = entry
+    return {"id": uid, "deal": deal, "price": price, "area": area,
+            "jk": jk, "address": address, "floor": floor}
+
+def near_duplicates(loaded):
+    """Кластеры почти-дубликатов: [[(filepath, номер записи), ...], ...]
+
+    loaded — [(filepath, агрегат с rows)] в порядке файлов.
+    """
+    index = dedup.DedupIndex()
+    seen_ids = set()
+    for filepath, agg in loaded:
+        for i, entry in enumerate(agg["rows"]):
+            uid = entry[0]
+            if uid:
+                if uid in seen_ids:
+                    continue
+                seen_ids.add(uid)
+            if entry[1] is not None:
+                index.add((filepath, i), entry_unit(entry), filepath)
+    return index.clusters()
+
+# ─────────────────────────────────────────────────────────────
+# КЭШ АГРЕГАТОВ
+# ─────────────────────────────────────────────────────────────
+
+def load_cache(rules, path=None, version=CACHE_VERSION):
+    """Записи кэша по файлам; пусто, если сменились формат или правила facets"""
+    try:
+        with open(path or CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != version or cache.get("rules") != rules.digest:
+        return {}
+    return cache.get("files", {})
+
+def save_cache(files, rules, path=None, version=CACHE_VERSION):
+    fileio.atomic_write(path or CACHE_FILE, json.dumps(
+        {"version": version, "rules": rules.digest, "files": files}, ensure_ascii=False
+    ))
+
+def aggregate_job(filepath, rules, cached_hash=None, capture=False, keep_rows=False):
+    """Хэш и агрегат файла — работа, которую можно отдать воркеру.
+
+    Файл не разбирается, если хэш совпал с cached_hash (запись кэша).
+    keep_rows — агрегат с записями объектов (rows) для --dedup.
+    Возвращает (хэш | None, агрегат | None, лог, счётчики кэша normalize).
+    С capture=True вывод собирается в строку, чтобы логи воркеров
+    не перемешивались.
+    """
+    out = io.StringIO() if capture else sys.stdout
+    # Воркер переиспользуется для нескольких файлов — отдаём только прирост
+    before = normalize.cache_stats()
+    with contextlib.redirect_stdout(out):
+        digest, _ = fileio.file_digest(filepath)
+        agg = None
+        if digest is not None and digest != cached_hash:
+            agg = aggregate_file(filepath, rules, keep_rows=keep_rows)
+    norm_stats = {
+        name: {k: v - before[name][k] for k, v in counts.items()}
+        for name, counts in normalize.cache_stats().items()
+    }
+    return digest, agg, out.getvalue() if capture else "", norm_stats
+
+def cached_entry(cache, filepath, rows_cache=None):
+    """Запись кэша файла.
+
+    rows_cache — кэш записей объектов (--dedup): запись годится, только
+    если rows того же хэша есть и там; тогда они добавляются в агрегат.
+    """
+    key = os.path.relpath(filepath, DEVELOPERS_DIR)
+    entry = cache.get(key)
+    if entry and rows_cache is not None:
+        rows = rows_cache.get(key)
+        if not rows or rows.get("hash") != entry.get("hash"):
+            return None
+        entry = {"hash": entry["hash"], "agg": dict(entry["agg"], rows=rows["rows"])}
+    return entry
+
+def get_aggregate(filepath, rules, cache, new_cache, job=None, rows_cache=None, new_rows=None):
+    """Агрегат файла: из кэша, если хэш совпал, иначе парсим файл.
+
+    job — готовый результат aggregate_job (из воркера).
+    rows_cache / new_rows — кэш записей объектов для --dedup (иначе None):
+    агрегат тогда с rows, а rows кэшируются отдельно от агрегата.
+    Возвращает (агрегат | None, взят_из_кэша).
+    """
+    key = os.path.relpath(filepath, DEVELOPERS_DIR)
+    keep_rows = rows_cache is not None
+    entry = cached_entry(cache, filepath, rows_cache)
+    if job is None:
+        job = aggregate_job(filepath, rules, entry.get("hash") if entry else None, keep_rows=keep_rows)
+    digest, agg, _, _ = job
+    if digest is None:
+        print(f"⚠️  Ошибка чтения {filepath}")
+        return None, False
+
+    hit = bool(entry and entry.get("hash") == digest)
+    if hit:
+        agg = entry["agg"]
+    elif agg is None:
+        return None, False
+    new_cache[key] = {"hash": digest, "agg": {k: v for k, v in agg.items() if k != "rows"}}
+    if keep_rows:
+        new_rows[key] = {"hash": digest, "rows": agg["rows"]}
+    return agg, hit
+
+# ─────────────────────────────────────────────────────────────
+# ХЭШИ ФАЙЛОВ В index.json
+# sources[].content = {"sale": {"sha256": ..., "size": ...}, "rent": null}
+# Клиент кэширует файл бессрочно и сверяет только хэш из index.json.
+# files / content всегда про {slug}_{deal}.json — его формат ждёт сайт.
+# Колоночный {slug}_{deal}.col.json (excel_to_json.py --format) — отдельно,
+# только если он есть:
+#   sources[].files_columnar   = {"sale": "data/.../pik_sale.col.json"}
+#   sources[].content_columnar = {"sale": {"sha256": ..., "size": ...}}
+# ─────────────────────────────────────────────────────────────
+
+def update_index(index_file):
+    """Проставляет хэши и размеры файлов источников; True — index.json изменён"""
+    index = load_json(index_file)
+    if not index:
+        return False
+    for source in index.get("sources", []):
+        content = {}
+        col_files = {}
+        col_content = {}
+        for deal, rel in (source.get("files") or {}).items():
+            digest, size = fileio.file_digest(os.path.join(BASE_DIR, *rel.split("/"))) if rel else (None, None)
+            content[deal] = {"sha256": digest, "size": size} if digest else None
+            col_rel = columnar_path(rel) if rel else None
+            col_digest, col_size = fileio.file_digest(os.path.join(BASE_DIR, *col_rel.split("/"))) if rel else (None, None)
+            if col_digest:
+                col_files[deal] = col_rel
+                col_content[deal] = {"sha256": col_digest, "size": col_size}
+        source["content"] = content
+        # Нет ни одного .col.json — ключей нет (и от прошлых запусков тоже)
+        for key, value in (("files_columnar", col_files), ("content_columnar", col_content)):
+            if value:
+                source[key] = value
+            else:
+                source.pop(key, None)
+    return fileio.write_json_if_changed(index_file, index, newline=True)
+
+def file_date(filepath):
+    """Дата выгрузки файла 'YYYY-MM-DD': "updated" из файла, иначе дата изменения.
+
+    Нужна только первому запуску журнала — с какой даты объекты файла
+    уже были в каталоге.
+    """
+    stream = open_units(filepath)
+    try:
+        # "updated" стоит до "units" — дальше первого объекта не читаем
+        next(iter(stream), None)
+    except (OSError, ValueError):
+        pass
+    updated = stream.meta.get("updated")
+    if isinstance(updated, str) and len(updated) >= 10:
+        return updated[:10]
+    return datetime.fromtimestamp(os.path.getmtime(filepath)).strftime("%Y-%m-%d")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Пересчёт data/meta/stats.json")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="не использовать кэш агрегатов — перечитать все файлы")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="сколько файлов разбирать параллельно (0 = по числу ядер, по умолчанию 1)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="не считать почти-дубликаты (tools/dedup.py), записать duplicates.json")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     now = datetime.now(timezone.utc)
-    seven_days_ago = now.timestamp() - (7 * 24 * 60 * 60)
+    today = now.strftime("%Y-%m-%d")
 
     stats = {
         "version": "1.0",
@@ -63,98 +649,171 @@ def main():
         "by_developer": {}
     }
 
-    latest_mtime = 0
-    latest_file = ""
-    latest_developer = ""
-
-    # Сканируем все JSON файлы кроме шаблона
-    pattern = os.path.join(DEVELOPERS_DIR, "**", "*.json")
-    all_files = glob.glob(pattern, recursive=True)
-    all_files = [f for f in all_files if "_template" not in f]
+    # Сканируем все JSON файлы кроме шаблона (колоночный .col.json вместо .json)
+    all_files = developer_files(DEVELOPERS_DIR)
 
     if not all_files:
         print("⚠️  Файлы с данными не найдены в data/developers/")
     
     seen_ids = set()
+    rules = FacetRules(META_DIR)
+    cache = {} if args.no_cache else load_cache(rules)
+    new_cache = {}
+    # Записи объектов нужны только --dedup — их кэш читается только тогда
+    rows_cache = new_rows = None
+    if args.dedup:
+        rows_cache = {} if args.no_cache else load_cache(rules, ROWS_CACHE_FILE, [CACHE_VERSION, ROWS_VERSION])
+        new_rows = {}
+    from_cache = 0
+    counts = empty_counts()
+    facets = FacetTables()
 
-    for filepath in sorted(all_files):
-        data = load_json(filepath)
-        if not data:
-            continue
+    # В параллельном режиме сразу раздаём все файлы воркерам, а агрегаты
+    # сливаем ниже в порядке файлов — первый файл с id по-прежнему выигрывает
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    pool = None
+    futures = {}
+    if workers > 1 and len(all_files) > 1:
+        workers = min(workers, len(all_files))
+        pool = ProcessPoolExecutor(max_workers=workers)
+        print(f"⚙️  Параллельный режим, процессов: {workers}")
+        for filepath in all_files:
+            entry = cached_entry(cache, filepath, rows_cache)
+            futures[filepath] = pool.submit(
+                aggregate_job, filepath, rules, entry.get("hash") if entry else None, True, args.dedup
+            )
 
-        units = data.get("units", [])
-        developer = data.get("developer", os.path.basename(os.path.dirname(filepath)))
-        deal = data.get("deal", "sale")
-        is_rent = deal == "rent"
+    def load_aggregates():
+        """(filepath, агрегат, из_кэша) в порядке файлов"""
+        for filepath in all_files:
+            job = None
+            if filepath in futures:
+                job = futures[filepath].result()
+                sys.stdout.write(job[2])
+                normalize.merge_cache_stats(job[3])
+            agg, hit = get_aggregate(filepath, rules, cache, new_cache, job, rows_cache, new_rows)
+            if agg is not None:
+                yield filepath, agg, hit
 
-        if developer not in stats["by_developer"]:
-            stats["by_developer"][developer] = 0
+    # Без --dedup агрегаты сливаются по мере готовности; почти-дубликатам
+    # нужен весь каталог сразу — тогда сначала загружаем все
+    clusters = []
+    skip = {}
+    loaded = load_aggregates()
+    if args.dedup:
+        loaded = list(loaded)
+        clusters = near_duplicates([(f, agg) for f, agg, _ in loaded])
+        for cluster in clusters:
+            for filepath, i in cluster[1:]:
+                skip.setdefault(filepath, set()).add(i)
 
-        file_mtime = os.path.getmtime(filepath)
-        count_in_file = 0
+    # Учтённые объекты с id → цена (для журнала); по файлам — их id
+    current = {}
+    counted_files = []
 
-        for unit in units:
-            uid = unit.get("id", "")
-            # Дедупликация по id
-            if uid and uid in seen_ids:
-                continue
-            if uid:
-                seen_ids.add(uid)
-
-            area = float(unit.get("area", 0) or 0)
-            if area <= 0:
-                continue  # пропускаем объекты без площади
+    try:
+        for filepath, agg, hit in loaded:
+            from_cache += hit
+            developer = agg["developer"]
+            if developer not in stats["by_developer"]:
+                stats["by_developer"][developer] = 0
 
-            count_in_file += 1
-            stats["total"] += 1
-            stats["by_developer"][developer] += 1
+            counted = merge_aggregate(
+                counts, agg, seen_ids,
+                lambda exclude, rows, f=filepath, a=agg: refold(f, a, rules, exclude, rows),
+                skip.get(filepath, ()),
+            )
+            facets.update(FacetTables(counted["facets"]))
+            for uid, price in counted["ids"]:
+                if price is not None:
+                    current[uid] = price
+            counted_files.append((developer, filepath, counted["ids"]))
+            count_in_file = counted["counts"]["total"]
+            stats["by_developer"][developer] += count_in_file
 
-            # Продажа / аренда
-            unit_deal = unit.get("deal", deal)
-            unit_is_rent = unit_deal == "rent"
-            if unit_is_rent:
-                stats["rent"] += 1
-            else:
-                stats["sale"] += 1
-
-            # По категории
-            unit_type = normalize_type(unit.get("type", "ПСН"))
-            if unit_is_rent and unit_type == "ПСН":
-                stats["by_category"]["Аренда ПСН"] += 1
-            elif unit_is_rent and unit_type == "ПВЗ":
-                stats["by_category"]["ПВЗ"] += 1
-            elif unit_type in stats["by_category"]:
-                stats["by_category"][unit_type] += 1
-            else:
-                stats["by_category"]["ПСН"] += 1
+            print(f"{'♻️ ' if hit else '✅'} {os.path.basename(filepath)}: {count_in_file} объектов ({developer})")
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
-        # Отслеживаем самый свежий файл
-        if file_mtime > latest_mtime:
-            latest_mtime = file_mtime
-            latest_file = os.path.basename(filepath)
-            latest_developer = developer
+    save_cache(new_cache, rules)
+    if args.dedup:
+        save_cache(new_rows, rules, ROWS_CACHE_FILE, [CACHE_VERSION, ROWS_VERSION])
+    if all_files:
+        print(f"\n♻️  Из кэша: {from_cache} из {len(all_files)} файлов")
 
-        # Объекты добавленные за 7 дней (по дате файла)
-        if file_mtime > seven_days_ago:
-            stats["added_last_7days"] += count_in_file
+    stats["total"] = counts["total"]
+    stats["sale"] = counts["sale"]
+    stats["rent"] = counts["rent"]
+    stats["by_category"] = counts["by_category"]
 
-        print(f"✅ {os.path.basename(filepath)}: {count_in_file} объектов ({developer})")
+    # Журнал объектов: новые за 7 дней и последнее изменение
+    book = Ledger.load(LEDGER_STATE_FILE)
+    seen = None
+    if book.started is None:
+        seen = {}
+        for _, filepath, ids in counted_files:
+            date = file_date(filepath)
+            seen.update((uid, date) for uid, price in ids if price is not None)
+    events = book.update(current, today, seen)
+    since = days_ago(7, today)
+    stats["added_last_7days"] = sum(1 for uid in current if book.is_new(uid, since))
 
-    # Последнее обновление
-    stats["last_updated_file"] = latest_file
-    stats["last_updated_developer"] = latest_developer
-    stats["last_updated_date"] = datetime.fromtimestamp(latest_mtime).strftime("%Y-%m-%d") if latest_mtime else ""
+    # Последнее обновление — самое свежее событие среди объектов каталога
+    # (при равенстве дат — первый по порядку файлов)
+    latest = max(current, key=book.last_change, default=None)
+    if latest is not None:
+        stats["last_updated_developer"], stats["last_updated_file"] = next(
+            (developer, os.path.basename(filepath)) for developer, filepath, ids in counted_files
+            if any(uid == latest for uid, _ in ids)
+        )
+        stats["last_updated_date"] = book.last_change(latest)
 
-    # Записываем stats.json
-    with open(STATS_FILE, "w", encoding="utf-8") as f:
-        json.dump(stats, f, ensure_ascii=False, indent=2)
+    # Записываем stats.json / facets.json — только если изменилось что-то,
+    # кроме даты генерации (иначе лишний коммит и сброс кэшей);
+    # facets.json — без отступов: таблиц много, а качает их браузер
+    stats_written = fileio.write_json_if_changed(STATS_FILE, stats)
+    facets_written = fileio.write_json_if_changed(FACETS_FILE, facets_json(facets, rules, stats["generated"]), indent=None)
+    index_written = update_index(INDEX_FILE)
+    ledger_written = book.save(LEDGER_STATE_FILE, LEDGER_FILE, events, stats["generated"])
+    outputs = [
+        ("stats.json", STATS_FILE, stats_written),
+        ("facets.json", FACETS_FILE, facets_written),
+        ("index.json", INDEX_FILE, index_written),
+        ("ledger_state.json", LEDGER_STATE_FILE, ledger_written),
+    ]
+    if args.dedup:
+        aggs = {f: agg for f, agg, _ in loaded}
+        rows = lambda ref: aggs[ref[0]]["rows"][ref[1]]
+        describe = lambda ref: dedup.describe_unit(
+            entry_unit(rows(ref)), repo_path(ref[0]), rows(ref)[-1],
+        )
+        report = dedup.report(clusters, describe, stats["total"], stats["generated"])
+        outputs.append(("duplicates.json", DUPLICATES_FILE,
+                        fileio.write_json_if_changed(DUPLICATES_FILE, report)))
+    elif os.path.exists(DUPLICATES_FILE):
+        # Без --dedup почти-дубликаты учтены в stats — пусть и сборки
+        # сайта (catalog.load_duplicates) их больше не пропускают
+        os.remove(DUPLICATES_FILE)
+        print(f"🗑️  duplicates.json удалён (запуск без --dedup): {DUPLICATES_FILE}")
 
     print(f"\n📊 ИТОГО:")
     print(f"   Всего объектов: {stats['total']}")
     print(f"   Продажа: {stats['sale']}, Аренда: {stats['rent']}")
     print(f"   За 7 дней: +{stats['added_last_7days']}")
+    if events:
+        kinds = Counter(e["event"] for e in events)
+        print(f"   Журнал: добавлено {kinds['added']}, цена изменилась {kinds['price']}, "
+              f"ушло {kinds['removed']}, вернулось {kinds['returned']}")
+    if args.dedup:
+        print(f"   Почти-дубликатов не учтено: {sum(len(c) - 1 for c in clusters)} (кластеров: {len(clusters)})")
     print(f"   Последнее обновление: {stats['last_updated_developer']} ({stats['last_updated_date']})")
-    print(f"\n✅ stats.json обновлён: {STATS_FILE}")
+    hit_rate = normalize.format_cache_stats()
+    if hit_rate:
+        print(f"   Кэш нормализации: {hit_rate}")
+    print()
+    for name, path, written in outputs:
+        print(f"✅ {name} обновлён: {path}" if written else f"⏭️  {name} без изменений")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+tools/columnar.py: encode_units → decode_units возвращает объекты
+в исходном виде (json.dumps совпадает побайтно), ColumnarFile читает
+.col.json так же, как UnitStream — .json.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+import columnar
+from jsonstream import UnitStream
+
+DEVELOPERS_DIR = os.path.join(ROOT, "data", "developers")
+
+
+def unit(i, **fields):
+    base = {
+        "id": f"x-{i}",
+        "jk": "ЖК Север" if i % 3 else "ЖК Юг",
+        "type": "ПСН",
+        "price": 1000000 + i * 12345,
+        "area": 40.5 + i,
+        "floor": i % 2 or None,
+        "metro": ["Тульская", "Нагатинская"] if i % 2 else [],
+    }
+    base.update(fields)
+    return base
+
+
+class ColumnarRoundTripTest(unittest.TestCase):
+
+    def assertRoundTrip(self, units, meta=None):
+        doc = columnar.encode_units(units, meta)
+        # Как на диске: через JSON, а не ссылками на исходные списки
+        doc = json.loads(columnar.dumps(doc))
+        decoded = columnar.decode_units(doc)
+        self.assertEqual(json.dumps(decoded, ensure_ascii=False), json.dumps(units, ensure_ascii=False))
+        return doc
+
+    def test_encodings(self):
+        doc = self.assertRoundTrip([unit(i) for i in range(40)], {"developer": "X", "deal": "sale"})
+        enc = {k: c["enc"] for k, c in doc["columns"].items()}
+        self.assertEqual(enc["id"], "raw")
+        self.assertEqual(enc["price"], "f64")
+        self.assertEqual(enc["area"], "f64")
+        self.assertEqual(enc["jk"], "dict")
+        self.assertEqual(enc["metro"], "dict")
+        self.assertEqual(doc["columns"]["price"]["type"], "int")
+        self.assertEqual(doc["columns"]["area"]["type"], "float")
+        self.assertEqual((doc["developer"], doc["count"]), ("X", 40))
+
+    def test_equal_but_different_types_stay_apart(self):
+        # 1, 1.0 и True равны как ключи dict — в словаре они разные значения
+        values = [1, 1.0, True, None, "1", 1, 1.0, True]
+        self.assertRoundTrip([unit(i, floor=v) for i, v in enumerate(values)])
+
+    def test_mixed_numbers_and_big_ints(self):
+        self.assertRoundTrip([unit(i, price=v) for i, v in enumerate([5, 2.5, 2 ** 60, -3, 0])])
+        self.assertRoundTrip([unit(i, price=2 ** 53 + i) for i in range(10)])
+
+    def test_wide_dictionary_index(self):
+        units = [unit(i, jk=f"ЖК {i % 300}") for i in range(1000)]
+        doc = self.assertRoundTrip(units)
+        self.assertEqual(doc["columns"]["jk"]["width"], 2)
+
+    def test_empty(self):
+        doc = self.assertRoundTrip([])
+        self.assertEqual((doc["count"], doc["keys"]), (0, []))
+
+    def test_different_fields_rejected(self):
+        with self.assertRaises(ValueError):
+            columnar.encode_units([unit(0), {"id": "x-1"}])
+        reordered = dict(reversed(list(unit(1).items())))
+        with self.assertRaises(ValueError):
+            columnar.encode_units([unit(0), reordered])
+
+    def test_corrupt_column(self):
+        doc = json.loads(columnar.dumps(columnar.encode_units([unit(i) for i in range(10)])))
+        doc["count"] = 11
+        with self.assertRaises(ValueError):
+            columnar.decode_units(doc)
+        doc["count"] = 10
+        doc["format"] = "columnar-v0"
+        with self.assertRaises(ValueError):
+            columnar.decode_units(doc)
+
+    def test_catalog_files(self):
+        """Файлы каталога: ColumnarFile отдаёт те же объекты и meta, что UnitStream"""
+        for slug in sorted(os.listdir(DEVELOPERS_DIR)):
+            folder = os.path.join(DEVELOPERS_DIR, slug)
+            for name in sorted(os.listdir(folder)):
+                if not name.endswith(".json") or columnar.is_columnar_path(name):
+                    continue
+                with self.subTest(file=name):
+                    stream = UnitStream(os.path.join(folder, name))
+                    units = list(stream)
+                    meta = dict(stream.meta)
+                    doc = self.assertRoundTrip(units, meta)
+                    with tempfile.TemporaryDirectory() as tmp:
+                        path = columnar.columnar_path(os.path.join(tmp, name))
+                        with open(path, "w", encoding="utf-8") as f:
+                            f.write(columnar.dumps(doc))
+                        col = columnar.ColumnarFile(path)
+                        self.assertEqual(list(col), units)
+                        self.assertEqual({k: col.meta[k] for k in meta}, meta)
+
+    def test_paths(self):
+        self.assertEqual(columnar.columnar_path("a/pik_sale.json"), "a/pik_sale.col.json")
+        self.assertEqual(columnar.json_path("a/pik_sale.col.json"), "a/pik_sale.json")
+        self.assertEqual(columnar.json_path("a/pik_sale.json"), "a/pik_sale.json")
+        self.assertTrue(columnar.is_columnar_path("pik_sale.col.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
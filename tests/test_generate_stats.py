@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+.github/scripts/generate_stats.py: stats.json и facets.json одинаковы
+без кэша, из кэша и в параллельном режиме (-j), с --dedup и без.
+
+Каталог — копия data/developers во временной папке плюс файл с чужими
+id (перерасчёт агрегата при совпадении id) и колоночный .col.json;
+все *_FILE скрипта перенаправлены туда же — data/meta не трогается.
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, ".github", "scripts"))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+import columnar
+import generate_stats
+from jsonstream import UnitStream
+
+OUTPUT_FILES = [name for name in vars(generate_stats) if name.endswith("_FILE")]
+
+
+def read_units(path):
+    stream = UnitStream(path)
+    units = list(stream)
+    return stream.meta, units
+
+
+def write_units(path, meta, units):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({**meta, "units": units}, f, ensure_ascii=False, indent=2)
+
+
+class StatsParityTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.developers = os.path.join(tmp.name, "developers")
+        self.out = os.path.join(tmp.name, "out")
+        shutil.copytree(os.path.join(ROOT, "data", "developers"), self.developers)
+
+        # Повторы id из pik: первый файл выигрывает, агрегат второго пересчитывается
+        meta, units = read_units(os.path.join(self.developers, "pik", "pik_sale.json"))
+        extra = [dict(u, jk="Дубль") for u in units[:5]] + [
+            dict(u, id=f"zz-{i}", price=(u.get("price") or 0) + 1000) for i, u in enumerate(units[5:12])
+        ]
+        os.makedirs(os.path.join(self.developers, "zz"))
+        write_units(os.path.join(self.developers, "zz", "zz_sale.json"),
+                    dict(meta, developer="ZZ", slug="zz"), extra)
+
+        # lsr читается из колоночного файла
+        lsr = os.path.join(self.developers, "lsr", "lsr_sale.json")
+        meta, units = read_units(lsr)
+        with open(columnar.columnar_path(lsr), "w", encoding="utf-8") as f:
+            f.write(columnar.dumps(columnar.encode_units(units, meta)))
+
+    def run_stats(self, out, *argv):
+        """(stats, facets, вывод) запуска generate_stats.main(argv) с файлами в out"""
+        os.makedirs(out, exist_ok=True)
+        paths = {name: os.path.join(out, os.path.basename(getattr(generate_stats, name)))
+                 for name in OUTPUT_FILES}
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(mock.patch.object(generate_stats, "DEVELOPERS_DIR", self.developers))
+            for name, path in paths.items():
+                stack.enter_context(mock.patch.object(generate_stats, name, path))
+            log = stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+            generate_stats.main(list(argv))
+        with open(paths["STATS_FILE"], encoding="utf-8") as f:
+            stats = json.load(f)
+        with open(paths["FACETS_FILE"], encoding="utf-8") as f:
+            facets = json.load(f)
+        stats.pop("generated")
+        facets.pop("generated")
+        return stats, facets, log.getvalue()
+
+    def assertParity(self, *dedup):
+        """Без кэша, из кэша, -j 2 без кэша и из кэша — один и тот же результат"""
+        files = len(generate_stats.developer_files(self.developers))
+        base = self.run_stats(os.path.join(self.out, "serial"), "--no-cache", *dedup)
+        cached = self.run_stats(os.path.join(self.out, "serial"), *dedup)
+        self.assertIn(f"Из кэша: {files} из {files} файлов", cached[2])
+        parallel = self.run_stats(os.path.join(self.out, "parallel"), "-j", "2", "--no-cache", *dedup)
+        self.assertIn("Параллельный режим", parallel[2])
+        parallel_cached = self.run_stats(os.path.join(self.out, "parallel"), "-j", "2", *dedup)
+        self.assertIn(f"Из кэша: {files} из {files} файлов", parallel_cached[2])
+        for name, run in [("cached", cached), ("parallel", parallel), ("parallel cached", parallel_cached)]:
+            with self.subTest(run=name):
+                self.assertEqual(run[0], base[0])
+                self.assertEqual(run[1], base[1])
+        return base
+
+    def test_parity(self):
+        stats, _, _ = self.assertParity()
+        self.assertGreater(stats["total"], 0)
+        self.assertEqual(stats["total"], stats["sale"] + stats["rent"])
+        self.assertEqual(stats["total"], sum(stats["by_developer"].values()))
+        # Повторы id из pik в zz не учтены
+        self.assertEqual(stats["by_developer"]["ZZ"], 7)
+
+    def test_parity_dedup(self):
+        plain, _, _ = self.run_stats(os.path.join(self.out, "plain"), "--no-cache")
+        stats, _, _ = self.assertParity("--dedup")
+        self.assertLessEqual(stats["total"], plain["total"])
+
+    def test_changed_file_invalidates_cache(self):
+        out = os.path.join(self.out, "serial")
+        self.run_stats(out)
+        path = os.path.join(self.developers, "a101", "a101_rent.json")
+        meta, units = read_units(path)
+        write_units(path, meta, units[1:])
+        cached = self.run_stats(out)
+        fresh = self.run_stats(os.path.join(self.out, "fresh"), "--no-cache")
+        self.assertEqual(cached[:2], fresh[:2])
+        self.assertIn("✅ a101_rent.json", cached[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
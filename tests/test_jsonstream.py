@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+tools/jsonstream.py: UnitStream отдаёт то же, что json.load, при любом
+размере куска — значения, разрезанные границей буфера, собираются целиком.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from jsonstream import UnitStream
+
+DEVELOPERS_DIR = os.path.join(ROOT, "data", "developers")
+
+# 1 и 3 — граница посреди любого числа, строки и escape-последовательности
+CHUNK_SIZES = [1, 3, 16, 4096]
+
+
+class UnitStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, text, name="dev_sale.json"):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def read(self, path, **kwargs):
+        stream = UnitStream(path, **kwargs)
+        return list(stream), stream.meta, stream.keys
+
+    def assertSameAsJson(self, text, array_key="units"):
+        """Для всех CHUNK_SIZES: объекты, meta и ключи — как у json.loads"""
+        path = self.write(text)
+        doc = json.loads(text)
+        array = doc.get(array_key)
+        is_array = isinstance(array, list)
+        for size in CHUNK_SIZES:
+            with self.subTest(chunk_size=size):
+                units, meta, keys = self.read(path, array_key=array_key, chunk_size=size)
+                self.assertEqual(units, array if is_array else [])
+                self.assertEqual(keys, list(doc))
+                self.assertEqual(meta, {k: v for k, v in doc.items() if not (k == array_key and is_array)})
+
+    def test_catalog_files(self):
+        for slug in sorted(os.listdir(DEVELOPERS_DIR)):
+            folder = os.path.join(DEVELOPERS_DIR, slug)
+            for name in sorted(os.listdir(folder)):
+                if name.endswith(".json"):
+                    with open(os.path.join(folder, name), encoding="utf-8") as f:
+                        self.assertSameAsJson(f.read())
+
+    def test_values_across_chunk_boundaries(self):
+        units = [
+            {"id": "a-1", "price": 123456789012, "area": 1e-7, "ok": True, "x": None},
+            {"id": "b\\\"-é🏠", "metro": ["Тульская", "\\u0041"], "n": -0.5},
+            {"nested": {"deep": [[1, 2], {"k": "v"}]}, "long": "я" * 5000},
+        ]
+        self.assertSameAsJson(json.dumps({"developer": "Д", "units": units}, ensure_ascii=False))
+        self.assertSameAsJson(json.dumps({"developer": "Д", "units": units}))
+        self.assertSameAsJson(json.dumps({"developer": "Д", "units": units}, indent=4))
+
+    def test_number_at_end_of_array(self):
+        # Последнее число массива упирается в конец куска: "12" из "123"
+        self.assertSameAsJson('{"units": [123, 4567, 89]}')
+
+    def test_meta_after_units(self):
+        self.assertSameAsJson('{"units": [{"id": 1}], "deal": "rent", "updated": "2026-02-25"}')
+
+    def test_empty_documents(self):
+        self.assertSameAsJson('{}')
+        self.assertSameAsJson('{"units": []}')
+        self.assertSameAsJson('  {"developer": "X" , "units" : [ ] }  \n')
+
+    def test_units_not_an_array(self):
+        # Не массив — обычный ключ meta, объектов нет
+        self.assertSameAsJson('{"units": {"id": 1}, "deal": "sale"}')
+
+    def test_other_array_key(self):
+        self.assertSameAsJson('{"units": [1], "rows": [{"a": 1}, {"a": 2}]}', array_key="rows")
+
+    def test_meta_filled_while_reading(self):
+        path = self.write('{"developer": "X", "units": [{"id": 1}, {"id": 2}], "deal": "rent"}')
+        stream = UnitStream(path, chunk_size=4)
+        it = iter(stream)
+        self.assertEqual(next(it), {"id": 1})
+        self.assertEqual(stream.meta, {"developer": "X"})
+        self.assertEqual(list(it), [{"id": 2}])
+        self.assertEqual(stream.meta, {"developer": "X", "deal": "rent"})
+
+    def test_broken_documents(self):
+        broken = [
+            '[{"id": 1}]',                          # не объект
+            '{"units": [{"id": 1}, {"id": 2}',      # оборван
+            '{"units": [{"id": 1} {"id": 2}]}',     # нет запятой
+            '{1: "x"}',                             # ключ не строка
+            '{"units": []} {"units": []}',          # лишние данные
+            '',
+        ]
+        for text in broken:
+            path = self.write(text)
+            for size in CHUNK_SIZES:
+                with self.subTest(text=text, chunk_size=size):
+                    with self.assertRaises(ValueError):
+                        self.read(path, chunk_size=size)
+
+
+if __name__ == "__main__":
+    unittest.main()
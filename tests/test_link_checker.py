@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+tools/link_checker.py против локального HTTP-сервера: редиректы,
+4xx / 5xx, HEAD → GET, таймауты и лимит запросов на хост.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+
+import link_checker
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Ответ задаёт путь: /status/404, /redirect/N, /sleep/0.3, /nohead"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, headers=(), body=b""):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _route(self):
+        server = self.server
+        parts = self.path.split("?")[0].strip("/").split("/")
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            server.methods.append((self.command, self.path))
+        try:
+            if parts[0] == "status":
+                self._reply(int(parts[1]), body=b"stub")
+            elif parts[0] == "redirect":
+                left = int(parts[1])
+                target = f"/redirect/{left - 1}" if left > 1 else "/status/200"
+                self._reply(302, [("Location", target)])
+            elif parts[0] == "loop":
+                self._reply(301, [("Location", "/loop")])
+            elif parts[0] == "sleep":
+                time.sleep(float(parts[1]))
+                self._reply(200, body=b"ok")
+            elif parts[0] == "nohead":
+                self._reply(405 if self.command == "HEAD" else 200, body=b"ok")
+            else:
+                self._reply(404)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    do_HEAD = _route
+    do_GET = _route
+
+
+class LinkCheckerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.active = 0
+        self.server.peak = 0
+        self.server.methods = []
+
+    def check(self, *paths, **pool_args):
+        urls = [self.base + p for p in paths]
+        return asyncio.run(link_checker.check_all(urls, **pool_args))
+
+    def result(self, path, **pool_args):
+        return self.check(path, **pool_args)[self.base + path]
+
+    def test_ok(self):
+        r = self.result("/status/200")
+        self.assertTrue(r["ok"])
+        self.assertEqual((r["status"], r["method"], r["final"]), (200, "HEAD", None))
+
+    def test_redirects_are_followed(self):
+        r = self.result("/redirect/3")
+        self.assertTrue(r["ok"])
+        self.assertEqual(r["final"], self.base + "/status/200")
+
+    def test_redirect_loop_is_broken(self):
+        r = self.result("/loop")
+        self.assertFalse(r["ok"])
+        self.assertIsNone(r["status"])
+        self.assertIn("редиректов", r["error"])
+
+    def test_client_and_server_errors(self):
+        results = self.check("/status/404", "/status/410", "/status/500", "/status/403")
+        status = {url[len(self.base):]: (r["ok"], r["status"]) for url, r in results.items()}
+        self.assertEqual(status, {
+            "/status/404": (False, 404),
+            "/status/410": (False, 410),
+            "/status/500": (False, 500),
+            # Бот не пущен, но сайт жив
+            "/status/403": (True, 403),
+        })
+
+    def test_get_after_rejected_head(self):
+        r = self.result("/nohead")
+        self.assertTrue(r["ok"])
+        self.assertEqual((r["status"], r["method"]), (200, "GET"))
+        self.assertEqual([m for m, _ in self.server.methods], ["HEAD", "GET"])
+
+    def test_timeout(self):
+        r = self.result("/sleep/2", timeout=0.2)
+        self.assertFalse(r["ok"])
+        self.assertEqual(r["error"], "таймаут")
+
+    def test_bad_url(self):
+        r = asyncio.run(link_checker.check_all(["ftp://example.com/x"]))["ftp://example.com/x"]
+        self.assertFalse(r["ok"])
+        self.assertEqual(r["method"], "HEAD")
+
+    def test_per_host_limit(self):
+        paths = [f"/sleep/0.1?{i}" for i in range(8)]
+        results = self.check(*paths, per_host=2, concurrency=8)
+        self.assertTrue(all(r["ok"] for r in results.values()))
+        self.assertEqual(self.server.peak, 2)
+
+    def test_busy_host_does_not_hold_global_slots(self):
+        """Запросы в очереди к одному хосту не занимают общий лимит:
+        другой хост (localhost — тот же сервер под другим именем)
+        проверяется сразу, а не после всей очереди"""
+        port = self.server.server_address[1]
+        slow = [f"{self.base}/sleep/0.3?{i}" for i in range(4)]
+        fast = f"http://localhost:{port}/status/200"
+        done = {}
+
+        async def run():
+            pool = link_checker.Pool(per_host=1, concurrency=2, timeout=5)
+            start = time.perf_counter()
+
+            async def one(url):
+                await link_checker.check_url(pool, url)
+                done[url] = time.perf_counter() - start
+
+            try:
+                await asyncio.gather(*(one(url) for url in slow + [fast]))
+            finally:
+                await pool.close()
+
+        asyncio.run(run())
+        self.assertLess(done[fast], 0.3)
+        self.assertGreaterEqual(max(done[u] for u in slow), 1.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
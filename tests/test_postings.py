@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+columnar.pack_postings / unpack_postings — varint разностей + base64
+(списки номеров инвертированных индексов build_indexes.py).
+"""
+
+import base64
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+
+from columnar import pack_postings, unpack_postings
+
+
+class PostingsTest(unittest.TestCase):
+
+    def assertRoundTrip(self, ordinals):
+        packed = pack_postings(ordinals)
+        self.assertEqual(unpack_postings(packed), list(ordinals))
+        return packed
+
+    def test_example_from_docstring(self):
+        packed = self.assertRoundTrip([3, 5, 6, 140])
+        # Разности 3, 2, 1, 134; 134 не влезает в 7 бит — два байта
+        self.assertEqual(base64.b64decode(packed), bytes([3, 2, 1, 0x86, 0x01]))
+
+    def test_empty(self):
+        self.assertEqual(self.assertRoundTrip([]), "")
+
+    def test_zero_and_repeats(self):
+        # 0 первым и повтор номера — разность 0, один байт
+        self.assertEqual(base64.b64decode(self.assertRoundTrip([0, 0, 1])), bytes([0, 0, 1]))
+
+    def test_varint_boundaries(self):
+        for gap in [0x7F, 0x80, 0x3FFF, 0x4000, 2 ** 21, 2 ** 32 + 5]:
+            with self.subTest(gap=gap):
+                self.assertRoundTrip([1, 1 + gap, 2 + 2 * gap])
+
+    def test_random_lists(self):
+        rnd = random.Random(16)
+        for _ in range(50):
+            n = rnd.randrange(0, 300)
+            self.assertRoundTrip(sorted(rnd.sample(range(100000), n)))
+
+    def test_descending_rejected(self):
+        with self.assertRaises(ValueError):
+            pack_postings([5, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
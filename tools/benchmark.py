@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — бенчмарк конвертера и generate_stats на синтетических данных
+=====================================================================
+Генерирует Excel файлы по маппингам ПИК / А101 / ЛСР из DEVELOPER_MAPS
+и дерево data/developers из них, затем замеряет этапы:
+
+    convert       — iter_units / convert_file: Excel → объекты
+    save          — save_json: объекты → {slug}_{deal}.json
+    stats         — generate_stats.main --no-cache: полный пересчёт
+    stats_cached  — generate_stats.main с тёплым кэшем агрегатов
+
+Каждый этап запускается в отдельном процессе — так пиковая память (RSS)
+относится только к нему. Результаты пишутся в JSON; --compare сравнивает
+с прошлым прогоном и завершает с кодом 1, если что-то стало медленнее
+или прожорливее порога.
+
+Использование:
+    python benchmark.py                              # 10k и 100k объектов
+    python benchmark.py --sizes 10000,1000000 -o bench.json
+    python benchmark.py --stages convert,stats --compare bench.json
+
+Синтетические данные кэшируются в tools\\.cache\\bench\\ (по размеру),
+повторный запуск генерирует их заново только с --regenerate.
+Пиковая память на Windows не замеряется (нет модуля resource).
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR   = os.path.dirname(SCRIPT_DIR)
+BENCH_DIR  = os.path.join(SCRIPT_DIR, ".cache", "bench")
+META_DIR   = os.path.join(BASE_DIR, "data", "meta")
+STATS_SCRIPT_DIR = os.path.join(BASE_DIR, ".github", "scripts")
+
+# Версия генератора: увеличь при изменении make_workbook / synth_value,
+# чтобы закэшированные наборы данных пересоздались
+GEN_VERSION = 1
+
+DEFAULT_SIZES = [10_000, 100_000]
+
+# Застройщики из DEVELOPER_MAPS, по которым делятся объекты набора
+BENCH_DEVELOPERS = ["пик", "а101", "лср"]
+
+# Доля пустых строк (без площади) — конвертер их пропускает
+BLANK_RATIO = 0.03
+
+# Порог регрессии для --compare: на сколько можно стать хуже (0.25 = +25%)
+DEFAULT_THRESHOLD = 0.25
+
+RESULTS_VERSION = 1
+
+# facets.json не больше этой доли от файлов застройщиков (этапы stats*)
+FACETS_MAX_RATIO = 0.25
+
+# ─────────────────────────────────────────────────────────────
+# СИНТЕТИЧЕСКИЕ ДАННЫЕ
+# ─────────────────────────────────────────────────────────────
+
+TYPES = ["ПСН", "Офис", "офисное помещение", "ГАБ", "готовый бизнес", "ПВЗ",
+         "франшиза", "Премиум", None]
+DEALS = ["аренда", "продажа", "Аренда ", "sale", "rent"]
+CITIES = ["Москва", "Москва ", "moscow", "Московская область", "Красногорск", "Мытищи"]
+DELIVERY = ["до 28 апреля 2028", "2026.0", 2027, "Сдан", "IV кв. 2026 декабрь", "сентябрь 2027", None]
+FINISHING = ["Без отделки", "White box", "С отделкой", ""]
+JK_PREFIXES = ["Саларьево", "Бунинские", "Кутузовский", "Митино", "Прокшино", "Испанские", "Зиларт"]
+JK_SUFFIXES = ["парк", "луга", "квартал", "сити", "кварталы", "дом"]
+COMMISSIONS = ["3%", 3.5, "2,5", None, "5"]
+
+
+def _load_vocabulary():
+    """Округа и метро из districts.json — чтобы сработал okrugs.resolve"""
+    try:
+        with open(os.path.join(META_DIR, "districts.json"), "r", encoding="utf-8") as f:
+            districts = json.load(f)["moscow"]["districts"]
+    except (OSError, ValueError, KeyError):
+        return ["ЦАО"], ["Тверская"]
+    labels = [d["label"] for d in districts]
+    metro = [m for d in districts for m in d.get("metro", [])]
+    return labels, metro or ["Тверская"]
+
+
+def synth_value(field, rng, row, vocab):
+    """Значение ячейки для нашего поля маппинга — в духе реальных прайсов"""
+    okrugs, metro = vocab
+    if field == "id":
+        return rng.choice([row, f"{row}", f"П-{row}", float(row), None])
+    if field == "jk":
+        return f"{rng.choice(JK_PREFIXES)} {rng.choice(JK_SUFFIXES)}"
+    if field == "building":
+        return f"Корпус {rng.randint(1, 12)}"
+    if field == "type":
+        return rng.choice(TYPES)
+    if field == "format":
+        return rng.choice(["standard", "gab_ready", "gab_franchise"])
+    if field == "deal_col":
+        return rng.choice(DEALS)
+    if field == "district":
+        return rng.choice(okrugs + ["Хорошёво-Мнёвники", ""])
+    if field == "city":
+        return rng.choice(CITIES)
+    if field == "address":
+        return f"ул. {rng.choice(JK_PREFIXES)}, д. {rng.randint(1, 120)}"
+    if field == "area":
+        return rng.choice([round(rng.uniform(15, 600), 1), f"{rng.randint(15, 400)},5 м²"])
+    if field in ("price", "price_sale"):
+        return rng.choice([rng.randint(3, 300) * 1_000_000 + rng.randint(0, 999_999),
+                           f"{rng.randint(5, 90)} {rng.randint(100, 999)} 240 руб.", None])
+    if field == "price_rent":
+        return rng.randint(50, 2_000) * 1_000
+    if field in ("metro", "metro2"):
+        stations = rng.sample(metro, rng.randint(1, 3))
+        if rng.random() < 0.2:
+            stations.insert(0, f"МЦК {stations[0]}")
+        return ", ".join(stations)
+    if field == "floor":
+        return rng.choice([1, 1.0, "2", -1, None])
+    if field == "finishing":
+        return rng.choice(FINISHING)
+    if field == "delivery":
+        return rng.choice(DELIVERY)
+    if field == "commission":
+        return rng.choice(COMMISSIONS)
+    if field in ("url_developer",):
+        return f"https://example.com/unit/{row}"
+    if field == "url_3d":
+        return rng.choice(["https://example.com/tour", "", "нет", None])
+    if field in ("metro_min", "ceiling", "power", "rent_month"):
+        return rng.randint(1, 30)
+    if field == "status":
+        return rng.choice(["сдан", "строится"])
+    return None
+
+
+def make_workbook(path, dev_map, rows, seed):
+    """Пишет .xlsx с колонками маппинга (write_only — память не растёт)"""
+    import openpyxl
+
+    rng = random.Random(seed)
+    vocab = _load_vocabulary()
+    fields = list(dev_map["col"])
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append([dev_map["col"][f] for f in fields] + ["Примечание"])
+    for row in range(2, rows + 2):
+        if rng.random() < BLANK_RATIO:
+            ws.append([])
+            continue
+        ws.append([synth_value(f, rng, row, vocab) for f in fields] + [""])
+    wb.save(path)
+
+
+def dataset_dir(size, workdir):
+    return os.path.join(workdir, f"n{size}")
+
+
+def prepare(size, workdir, regenerate=False):
+    """Excel файлы и дерево developers/ на size объектов; возвращает папку набора"""
+    import excel_to_json
+
+    root = dataset_dir(size, workdir)
+    marker = os.path.join(root, "dataset.json")
+    try:
+        with open(marker, "r", encoding="utf-8") as f:
+            if not regenerate and json.load(f).get("gen_version") == GEN_VERSION:
+                return root
+    except (OSError, ValueError):
+        pass
+
+    shutil.rmtree(root, ignore_errors=True)
+    source = os.path.join(root, "source_excel")
+    developers = os.path.join(root, "developers")
+    os.makedirs(source)
+    os.makedirs(developers)
+
+    print(f"🧪 Генерирую набор на {size} объектов: {root}")
+    per_dev = -(-size // len(BENCH_DEVELOPERS))
+    files = {}
+    for i, key in enumerate(BENCH_DEVELOPERS):
+        dev_map = excel_to_json.DEVELOPER_MAPS[key]
+        filename = f"{key} бенчмарк.xlsx"
+        make_workbook(os.path.join(source, filename), dev_map, per_dev, seed=size + i)
+        files[filename] = key
+
+    # Дерево developers/ — тем же конвейером, что и в жизни
+    excel_to_json.OUTPUT_DIR = developers
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        for filename, key in files.items():
+            dev_map = excel_to_json.DEVELOPER_MAPS[key]
+            excel_to_json.save_units(
+                excel_to_json.iter_units(os.path.join(source, filename), dev_map), dev_map
+            )
+
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump({"gen_version": GEN_VERSION, "size": size, "files": files}, f, ensure_ascii=False)
+    return root
+
+# ─────────────────────────────────────────────────────────────
+# ЭТАПЫ (выполняются в дочернем процессе)
+# Этап получает папку набора и возвращает (время, число объектов):
+# время — то, что замерено внутри этапа, без подготовки входа.
+# ─────────────────────────────────────────────────────────────
+
+def _dataset_files(root):
+    with open(os.path.join(root, "dataset.json"), "r", encoding="utf-8") as f:
+        return json.load(f)["files"]
+
+
+def stage_convert(root):
+    import excel_to_json
+
+    units = 0
+    start = time.perf_counter()
+    for filename, key in _dataset_files(root).items():
+        path = os.path.join(root, "source_excel", filename)
+        units += len(excel_to_json.convert_file(path, excel_to_json.DEVELOPER_MAPS[key]))
+    return time.perf_counter() - start, units
+
+
+def stage_save(root):
+    import excel_to_json
+    from catalog import developer_files, open_units
+
+    out = os.path.join(root, "run", "save")
+    shutil.rmtree(out, ignore_errors=True)
+    # Вход читается до замера — меряем только запись
+    jobs = []
+    for path in developer_files(os.path.join(root, "developers")):
+        stream = open_units(path)
+        units = list(stream)
+        jobs.append((units, stream.meta["slug"], stream.meta["deal"]))
+
+    start = time.perf_counter()
+    for units, slug, deal in jobs:
+        excel_to_json.save_json(units, slug, deal, out)
+    return time.perf_counter() - start, sum(len(j[0]) for j in jobs)
+
+
+def _stats_module(root):
+    sys.path.insert(0, STATS_SCRIPT_DIR)
+    import generate_stats
+
+    run = os.path.join(root, "run", "stats")
+    os.makedirs(run, exist_ok=True)
+    generate_stats.DEVELOPERS_DIR = os.path.join(root, "developers")
+    # Все выходные файлы модуля (*_FILE: stats, facets, index, журнал,
+    # дубликаты, кэш, ...) — в run/, чтобы синтетика не попала в data/meta;
+    # новый выходной файл переедет сюда же без правки бенчмарка
+    for name, value in list(vars(generate_stats).items()):
+        if name.endswith("_FILE") and isinstance(value, str):
+            setattr(generate_stats, name, os.path.join(run, os.path.basename(value)))
+    with open(generate_stats.INDEX_FILE, "w", encoding="utf-8") as f:
+        json.dump({"sources": []}, f)
+    return generate_stats
+
+
+def _stats_total(gs):
+    with open(gs.STATS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)["total"]
+
+
+def check_facets_size(gs):
+    """facets.json качается до показа счётчиков — он должен быть заметно
+    меньше файлов застройщиков, которые заменяет"""
+    from catalog import developer_files
+
+    data = sum(os.path.getsize(f) for f in developer_files(gs.DEVELOPERS_DIR))
+    facets = os.path.getsize(gs.FACETS_FILE)
+    if facets > FACETS_MAX_RATIO * data:
+        raise AssertionError(
+            f"facets.json {facets / 2**20:.1f} МБ больше {FACETS_MAX_RATIO:.0%} "
+            f"файлов застройщиков ({data / 2**20:.1f} МБ)"
+        )
+
+
+def stage_stats(root):
+    gs = _stats_module(root)
+    start = time.perf_counter()
+    gs.main(["--no-cache"])
+    seconds = time.perf_counter() - start
+    check_facets_size(gs)
+    return seconds, _stats_total(gs)
+
+
+def stage_stats_cached(root):
+    gs = _stats_module(root)
+    gs.main([])  # прогрев кэша агрегатов
+    start = time.perf_counter()
+    gs.main([])
+    seconds = time.perf_counter() - start
+    check_facets_size(gs)
+    return seconds, _stats_total(gs)
+
+
+STAGES = {
+    "convert": stage_convert,
+    "save": stage_save,
+    "stats": stage_stats,
+    "stats_cached": stage_stats_cached,
+}
+
+
+def peak_rss_mb():
+    """Пиковая память процесса в МБ или None (Windows)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS — байты
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def run_stage(stage, root):
+    """Тело дочернего процесса: выполняет этап и печатает JSON последней строкой"""
+    cpu = time.process_time()
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        seconds, units = STAGES[stage](root)
+    print(json.dumps({
+        "seconds": round(seconds, 4),
+        "cpu_seconds": round(time.process_time() - cpu, 4),
+        "units": units,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def measure(stage, root):
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-stage", stage, "--dataset", root],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding="utf-8",
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"этап {stage} упал:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+# ─────────────────────────────────────────────────────────────
+# СРАВНЕНИЕ ПРОГОНОВ
+# ─────────────────────────────────────────────────────────────
+
+# Метрики, по которым ищем регрессии (больше = хуже)
+COMPARE_METRICS = ["seconds", "peak_rss_mb"]
+
+
+def compare(results, previous, threshold):
+    """Печатает изменения относительно прошлого прогона; возвращает число регрессий"""
+    old = {(r["stage"], r["size"]): r for r in previous.get("results", [])}
+    regressions = 0
+    print(f"\n📈 Сравнение с прошлым прогоном ({previous.get('generated', '?')}):")
+    for r in results:
+        before = old.get((r["stage"], r["size"]))
+        if before is None:
+            print(f"   {r['stage']:<13} {r['size']:>9}: нет в прошлом прогоне")
+            continue
+        parts = []
+        worse = False
+        for metric in COMPARE_METRICS:
+            a, b = before.get(metric), r.get(metric)
+            if not a or b is None:
+                continue
+            delta = (b - a) / a
+            parts.append(f"{metric} {a} → {b} ({delta:+.0%})")
+            worse = worse or delta > threshold
+        mark = "❌" if worse else "✅"
+        regressions += worse
+        print(f"   {mark} {r['stage']:<13} {r['size']:>9}: " + ", ".join(parts))
+    return regressions
+
+# ─────────────────────────────────────────────────────────────
+# ГЛАВНАЯ ФУНКЦИЯ
+# ─────────────────────────────────────────────────────────────
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="PSNHUB — бенчмарк конвертера и статистики")
+    parser.add_argument(
+        "--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="размеры наборов через запятую (объектов на набор), по умолчанию 10000,100000",
+    )
+    parser.add_argument(
+        "--stages", default=",".join(STAGES),
+        help=f"этапы через запятую: {', '.join(STAGES)}",
+    )
+    parser.add_argument("-o", "--output", help="куда записать результаты (JSON)")
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="допустимое ухудшение для --compare (0.25 = +25%%)",
+    )
+    parser.add_argument("--workdir", default=BENCH_DIR, help="папка для синтетических данных")
+    parser.add_argument("--regenerate", action="store_true", help="пересоздать синтетические данные")
+    # Внутренний режим: дочерний процесс одного этапа
+    parser.add_argument("--run-stage", help=argparse.SUPPRESS)
+    parser.add_argument("--dataset", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, SCRIPT_DIR)
+
+    if args.run_stage:
+        run_stage(args.run_stage, args.dataset)
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        print(f"❌ Неизвестные этапы: {', '.join(unknown)}")
+        return 2
+
+    print("=" * 55)
+    print("PSNHUB — Бенчмарк")
+    print("=" * 55)
+
+    results = []
+    for size in sizes:
+        root = prepare(size, args.workdir, args.regenerate)
+        for stage in stages:
+            r = measure(stage, root)
+            r = {"stage": stage, "size": size, **r}
+            r["units_per_sec"] = round(r["units"] / r["seconds"]) if r["seconds"] else None
+            results.append(r)
+            rss = f"{r['peak_rss_mb']} МБ" if r["peak_rss_mb"] is not None else "—"
+            print(f"⏱️  {stage:<13} {size:>9}: {r['seconds']:.2f} с, "
+                  f"{r['units_per_sec']} объектов/с, пик памяти {rss}")
+
+    report = {
+        "version": RESULTS_VERSION,
+        "generated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "gen_version": GEN_VERSION,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Результаты: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        if compare(results, previous, args.threshold):
+            print(f"\n❌ Есть регрессии больше {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — общие справочники каталога
+====================================
+Чтение реестров из data/meta и привязка объектов к ним:
+    categories.json  → какие плитки (filter) подходят объекту
+    districts.json   → округ объекта (по полю district, метро или городу МО)
+    duplicates.json  → почти-дубликаты, которые не показываются
+                       (generate_stats.py --dedup; файла нет — не пропускаем)
+
+Используется скриптами сборки в .github/scripts и локальными утилитами.
+Только стандартная библиотека.
+"""
+
+import glob
+import json
+import os
+
+from columnar import ColumnarFile, columnar_path, is_columnar_path, json_path
+from jsonstream import UnitStream
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR  = os.path.dirname(TOOLS_DIR)
+META_DIR  = os.path.join(BASE_DIR, "data", "meta")
+DEVELOPERS_DIR = os.path.join(BASE_DIR, "data", "developers")
+
+# Код для объектов Московской области в каскаде округов
+MO_ID = "MO"
+
+# Написания округов, которые встречаются в выгрузках застройщиков
+OKRUG_ALIASES = {
+    "зелао": "ZelAO",
+    "зеленоградский": "ZelAO",
+    "новомосковский": "NAO",
+    "троицкий": "TiNAO",
+}
+
+
+def load_meta(name, meta_dir=None):
+    """Читает data/meta/<name>.json"""
+    path = os.path.join(meta_dir or META_DIR, f"{name}.json")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_duplicates(meta_dir=None):
+    """Лишние объекты кластеров из duplicates.json (все, кроме keep).
+
+    {(файл относительно BASE_DIR, номер объекта в файле): id};
+    пусто, если файла нет — generate_stats.py запускали без --dedup.
+    """
+    try:
+        doc = load_meta("duplicates", meta_dir)
+    except (OSError, ValueError):
+        return {}
+    return {
+        (unit["file"], unit["n"]): unit["id"]
+        for item in doc.get("items", []) for unit in item["drop"] if "n" in unit
+    }
+
+
+def repo_path(filepath):
+    """Путь от корня репозитория через «/» — как в index.json и duplicates.json"""
+    return os.path.relpath(filepath, BASE_DIR).replace(os.sep, "/")
+
+
+def _key(s):
+    return str(s or "").strip().lower().replace("ё", "е")
+
+
+class Okrugs:
+    """Каскад округ → метро из districts.json"""
+
+    def __init__(self, districts):
+        moscow = districts.get("moscow", {})
+        mo = districts.get("mo", {})
+        self.labels = {}        # id → короткое название (ЦАО, ...)
+        self.metro = {}         # id → список станций
+        self._by_name = {}      # id / label / full / алиас → id
+        self._by_metro = {}     # станция → id (первый округ в реестре)
+        for d in moscow.get("districts", []):
+            oid = d["id"]
+            self.labels[oid] = d.get("label", oid)
+            self.metro[oid] = list(d.get("metro", []))
+            for name in (oid, d.get("label"), d.get("full")):
+                if name:
+                    self._by_name.setdefault(_key(name), oid)
+            for station in d.get("metro", []):
+                self._by_metro.setdefault(_key(station), oid)
+        for alias, oid in OKRUG_ALIASES.items():
+            if oid in self.labels:
+                self._by_name.setdefault(alias, oid)
+
+        self.labels[MO_ID] = mo.get("label", "Московская область")
+        self.metro[MO_ID] = []
+        self._mo_names = {_key(c) for c in mo.get("cities", [])}
+        self._mo_names.add(_key(self.labels[MO_ID]))
+
+    @classmethod
+    def load(cls, meta_dir=None):
+        return cls(load_meta("districts", meta_dir))
+
+    def resolve(self, district="", metro=(), city=""):
+        """id округа для объекта или '' если привязать не удалось.
+
+        Порядок: поле district (ЦАО / ЮЗАО / полное название) →
+        станции метро из реестра → город или регион МО.
+        """
+        oid = self._by_name.get(_key(district))
+        if oid:
+            return oid
+        for station in metro or ():
+            oid = self._by_metro.get(_key(station))
+            if oid:
+                return oid
+        if _key(city) in self._mo_names:
+            return MO_ID
+        return ""
+
+
+def category_filters(categories):
+    """[(id, filter), ...] всех плиток из categories.json в порядке order.
+
+    Скрытые (visible: false) тоже входят — их включают без пересборки данных.
+    """
+    items = sorted(categories.get("categories", []), key=lambda c: c.get("order", 0))
+    return [(c["id"], c.get("filter") or {}) for c in items]
+
+
+def match_filter(flt, fields):
+    """Подходит ли объект под filter плитки: все ключи фильтра совпадают"""
+    return all(fields.get(k) == v for k, v in flt.items())
+
+
+# ─────────────────────────────────────────────────────────────
+# ОБЪЕКТЫ КАТАЛОГА
+# ─────────────────────────────────────────────────────────────
+
+def developer_files(developers_dir=None):
+    """Все JSON файлы застройщиков, кроме шаблона, в порядке generate_stats.py.
+
+    Если рядом с pik_sale.json лежит колоночный pik_sale.col.json — берётся
+    только он (те же объекты, быстрее читать); место в порядке — как у .json.
+    """
+    pattern = os.path.join(developers_dir or DEVELOPERS_DIR, "**", "*.json")
+    files = set(f for f in glob.glob(pattern, recursive=True) if "_template" not in f)
+    return [preferred_file(f, files.__contains__) for f in sorted(set(map(json_path, files)))]
+
+
+def preferred_file(path, exists=os.path.exists):
+    """Какой файл читать за {slug}_{deal}.json (путь — .json или .col.json):
+    колоночный, если он есть, иначе .json — то же правило, что
+    у developer_files."""
+    col = columnar_path(json_path(path))
+    return col if exists(col) else json_path(path)
+
+
+def open_units(filepath):
+    """Поток объектов файла (.json или .col.json): итерация, .meta, .keys"""
+    if is_columnar_path(filepath):
+        return ColumnarFile(filepath)
+    return UnitStream(filepath)
+
+
+def read_units_file(filepath):
+    """(meta, [объекты]) файла застройщика или None для пустого документа.
+
+    OSError / ValueError — файл не читается или битый.
+    """
+    stream = open_units(filepath)
+    units = list(stream)
+    if not stream.keys:
+        return None
+    return stream.meta, units
+
+
+def iter_catalog_units(developers_dir=None, files=None, read=read_units_file, skip=None):
+    """Объекты всех файлов с той же дедупликацией, что и в generate_stats.py.
+
+    Файлы идут по порядку, первый id выигрывает; объект без площади
+    занимает id, но не отдаётся. Битый файл пропускается целиком.
+    Отдаёт (filepath, meta, unit); у unit всегда есть "deal" и
+    "developer" (по умолчанию — из файла). read — чем читать файл
+    (как read_units_file), например с кэшем в памяти. skip — почти-
+    дубликаты из load_duplicates(): не отдаются, но id занимают.
+    """
+    seen_ids = set()
+    for filepath in files if files is not None else developer_files(developers_dir):
+        try:
+            loaded = read(filepath)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ошибка чтения {filepath}: {e}")
+            continue
+        if loaded is None:
+            continue
+        meta, units = loaded
+        deal = meta.get("deal", "sale")
+        developer = meta.get("developer", os.path.basename(os.path.dirname(filepath)))
+        key = repo_path(filepath) if skip else None
+
+        for n, unit in enumerate(units):
+            uid = unit.get("id", "")
+            if uid and uid in seen_ids:
+                continue
+            if uid:
+                seen_ids.add(uid)
+            # Сверяем и id: файл мог измениться после --dedup
+            if skip and (key, n) in skip and skip[(key, n)] == (uid or ""):
+                continue
+            try:
+                area = float(unit.get("area", 0) or 0)
+            except (TypeError, ValueError):
+                continue
+            if area <= 0:
+                continue
+            unit.setdefault("deal", deal)
+            unit.setdefault("developer", developer)
+            yield filepath, meta, unit
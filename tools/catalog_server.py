@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — локальный сервис выборок каталога
+==========================================
+Загружает все data/developers/** и реестры data/meta в память,
+строит индексы и отдаёт готовые выборки по HTTP — браузеру не нужно
+качать сырые {slug}_{deal}.json с base_url и фильтровать их у себя.
+
+Эндпоинты (только GET, ответы — JSON, CORS открыт):
+    /units        фильтр + сортировка + страницы:
+                    category=psn-sale      плитка categories.json (её filter)
+                    deal, type, okrug, metro, developer, jk, city
+                                           — можно повторять: metro=A&metro=B
+                    price_min / price_max, area_min / area_max,
+                    price_m2_min / price_m2_max
+                    sort=price | -price | area | -area | price_m2 | -price_m2
+                    page=1, per_page=24 (не больше 200)
+    /categories   плитки categories.json с числом объектов
+    /districts    каскад districts.json: округа → их метро, МО → города,
+                  с числом объектов (okrug=CAO — только этот округ)
+    /metrics      задержки по эндпоинтам: число запросов, ошибки, p50/p95/p99
+    /health       жив ли сервис и сколько объектов загружено
+
+Файлы на диске проверяются раз в --reload секунд. Изменённые
+перечитываются в фоне, новый каталог подменяет старый целиком —
+запросы, которые уже выполняются, дорабатывают со старым.
+
+Выборки (/units, /categories, /districts) считаются в пуле потоков:
+тяжёлый запрос не держит event loop, и остальные соединения читаются
+и отвечают (/health, /metrics) без очереди за ним. Сами выборки из-за
+GIL параллельно не ускоряются — каталог только читается, блокировки
+не нужны.
+
+Использование:
+    python catalog_server.py                 # http://127.0.0.1:8765
+    python catalog_server.py --port 9000 --host 0.0.0.0 --reload 5
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+from catalog import (
+    DEVELOPERS_DIR, META_DIR, MO_ID, Okrugs, category_filters, developer_files,
+    iter_catalog_units, load_duplicates, load_meta, match_filter, read_units_file,
+)
+from normalize import normalize_catalog_type
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+RELOAD_INTERVAL = 2.0
+
+PER_PAGE = 24
+MAX_PER_PAGE = 200
+
+# Сколько секунд держать простаивающее keep-alive соединение
+KEEPALIVE_TIMEOUT = 15
+
+# Тело запроса читается и выбрасывается (эндпоинты только GET);
+# больше — 400 и закрытие соединения
+MAX_BODY = 64 * 1024
+
+# По скольким последним запросам считаются перцентили задержки
+METRICS_WINDOW = 1000
+
+# Измерения фильтра /units → поле индекса
+DIMENSIONS = ["category", "deal", "type", "okrug", "metro", "developer", "jk", "city"]
+
+# Числовые поля: диапазоны *_min / *_max и сортировка
+NUMERIC = ["price", "area", "price_m2"]
+
+# Реестры data/meta, от которых зависит каталог; duplicates.json может не быть
+META_FILES = ["categories", "districts", "duplicates"]
+
+# Эндпоинты для метрик; остальные пути — "other"
+ENDPOINTS = ["/units", "/categories", "/districts", "/metrics", "/health"]
+
+# Эндпоинты, которые считают выборку, — в пуле потоков
+QUERY_ENDPOINTS = ["/units", "/categories", "/districts"]
+
+
+class QueryError(ValueError):
+    """Неверный параметр запроса — ответ 400"""
+
+# ─────────────────────────────────────────────────────────────
+# КАТАЛОГ В ПАМЯТИ
+# ─────────────────────────────────────────────────────────────
+
+class Catalog:
+    """Объекты каталога с индексами: измерение → значение → множество номеров"""
+
+    def __init__(self, catalog_units, categories, districts):
+        self.categories = categories
+        self.districts = districts
+        self.okrugs = Okrugs(districts)
+        self.filters = category_filters(categories)
+        self.units = []
+        self.numbers = {name: [] for name in NUMERIC}
+        self.index = {dim: {} for dim in DIMENSIONS}
+        self.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+        for _, _, unit in catalog_units:
+            self._add(unit)
+
+    def _add(self, unit):
+        ordinal = len(self.units)
+        self.units.append(unit)
+
+        area = float(unit.get("area") or 0)
+        try:
+            price = float(unit.get("price") or 0)
+        except (TypeError, ValueError):
+            price = 0.0
+        self.numbers["price"].append(price)
+        self.numbers["area"].append(area)
+        self.numbers["price_m2"].append(price / area if price > 0 else 0.0)
+
+        fields = {
+            "type": normalize_catalog_type(unit.get("type", "ПСН")),
+            "deal": unit.get("deal"),
+            "developer": unit.get("developer"),
+            "city": unit.get("city"),
+            "district": unit.get("district"),
+        }
+        keys = {
+            "category": [cid for cid, flt in self.filters if match_filter(flt, fields)],
+            "deal": [fields["deal"]],
+            "type": [fields["type"]],
+            "okrug": [self.okrugs.resolve(unit.get("district"), unit.get("metro"), unit.get("city"))],
+            "metro": list(unit.get("metro") or []),
+            "developer": [fields["developer"]],
+            "jk": [unit.get("jk")],
+            "city": [fields["city"]],
+        }
+        for dim, values in keys.items():
+            for value in values:
+                if value:
+                    self.index[dim].setdefault(str(value), set()).add(ordinal)
+
+    def count(self, dim, value):
+        return len(self.index[dim].get(value, ()))
+
+    # ── /units ──────────────────────────────────────────────
+
+    def select(self, params):
+        """Номера объектов под фильтры измерений и диапазоны (в порядке каталога)"""
+        selected = None
+        # Сначала самые узкие измерения — пересечения дешевле
+        sets = []
+        for dim in DIMENSIONS:
+            values = params.get(dim)
+            if not values:
+                continue
+            postings = [self.index[dim].get(v, set()) for v in values]
+            sets.append(set().union(*postings) if len(postings) > 1 else postings[0])
+        for s in sorted(sets, key=len):
+            selected = set(s) if selected is None else selected & s
+            if not selected:
+                break
+        ordinals = sorted(selected) if selected is not None else range(len(self.units))
+
+        for name in NUMERIC:
+            lo = _number(params, f"{name}_min")
+            hi = _number(params, f"{name}_max")
+            if lo is None and hi is None:
+                continue
+            column = self.numbers[name]
+            ordinals = [
+                n for n in ordinals
+                # Цена 0 — «по запросу»: под ценовой диапазон не попадает
+                if column[n] > 0
+                and (lo is None or column[n] >= lo)
+                and (hi is None or column[n] <= hi)
+            ]
+        return list(ordinals)
+
+    def query(self, params):
+        ordinals = self.select(params)
+
+        sort = _single(params, "sort")
+        if sort:
+            name = sort.lstrip("-")
+            if name not in NUMERIC:
+                raise QueryError(f"sort: неизвестное поле '{name}' (можно: {', '.join(NUMERIC)})")
+            column = self.numbers[name]
+            reverse = sort.startswith("-")
+            # Без цены — в конце при любом направлении
+            known = [n for n in ordinals if column[n] > 0]
+            unknown = [n for n in ordinals if column[n] <= 0]
+            known.sort(key=column.__getitem__, reverse=reverse)
+            ordinals = known + unknown
+
+        per_page = min(_integer(params, "per_page", PER_PAGE), MAX_PER_PAGE)
+        page = _integer(params, "page", 1)
+        if per_page < 1 or page < 1:
+            raise QueryError("page и per_page должны быть больше 0")
+        start = (page - 1) * per_page
+        return {
+            "total": len(ordinals),
+            "page": page,
+            "per_page": per_page,
+            "pages": math.ceil(len(ordinals) / per_page),
+            "units": [self.units[n] for n in ordinals[start:start + per_page]],
+        }
+
+    # ── /categories, /districts ─────────────────────────────
+
+    def category_counts(self):
+        return [
+            {**c, "count": self.count("category", c["id"])}
+            for c in sorted(self.categories.get("categories", []), key=lambda c: c.get("order", 0))
+        ]
+
+    def district_cascade(self, okrug=None):
+        okrugs = []
+        for oid, label in self.okrugs.labels.items():
+            if oid == MO_ID or (okrug and oid != okrug):
+                continue
+            in_okrug = self.index["okrug"].get(oid, set())
+            okrugs.append({
+                "id": oid,
+                "label": label,
+                "count": len(in_okrug),
+                "metro": [
+                    {"name": m, "count": len(in_okrug & self.index["metro"].get(m, set()))}
+                    for m in self.okrugs.metro.get(oid, [])
+                ],
+            })
+        result = {"okrugs": okrugs}
+        if not okrug or okrug == MO_ID:
+            in_mo = self.index["okrug"].get(MO_ID, set())
+            result["mo"] = {
+                "id": MO_ID,
+                "label": self.okrugs.labels[MO_ID],
+                "count": len(in_mo),
+                "cities": [
+                    {"name": c, "count": len(in_mo & self.index["city"].get(c, set()))}
+                    for c in self.districts.get("mo", {}).get("cities", [])
+                ],
+            }
+        return result
+
+
+def _single(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def _number(params, name):
+    value = _single(params, name)
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise QueryError(f"{name}: ожидалось число, получено '{value}'")
+
+
+def _integer(params, name, default):
+    value = _single(params, name)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f"{name}: ожидалось целое число, получено '{value}'")
+
+# ─────────────────────────────────────────────────────────────
+# ЗАГРУЗКА И ГОРЯЧАЯ ПЕРЕЗАГРУЗКА
+# ─────────────────────────────────────────────────────────────
+
+class CatalogLoader:
+    """Собирает Catalog, перечитывая с диска только изменённые файлы"""
+
+    def __init__(self, developers_dir=DEVELOPERS_DIR, meta_dir=META_DIR):
+        self.developers_dir = developers_dir
+        self.meta_dir = meta_dir
+        self._files = {}    # путь → (снимок, результат read_units_file)
+
+    def _meta_paths(self):
+        return [os.path.join(self.meta_dir, f"{name}.json") for name in META_FILES]
+
+    def snapshot(self):
+        """{путь: (размер, mtime)} всех файлов, от которых зависит каталог"""
+        snap = {}
+        for path in developer_files(self.developers_dir) + self._meta_paths():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snap[path] = (st.st_size, st.st_mtime_ns)
+        return snap
+
+    def _read(self, snap):
+        def read(filepath):
+            cached = self._files.get(filepath)
+            if cached is not None and cached[0] == snap.get(filepath):
+                return cached[1]
+            loaded = read_units_file(filepath)
+            self._files[filepath] = (snap.get(filepath), loaded)
+            return loaded
+        return read
+
+    def build(self, snap=None):
+        """Новый Catalog; snap — снимок, с которым сверяется кэш файлов"""
+        snap = snap if snap is not None else self.snapshot()
+        files = developer_files(self.developers_dir)
+        for path in set(self._files) - set(files):
+            del self._files[path]
+        units = iter_catalog_units(
+            files=files, read=self._read(snap), skip=load_duplicates(self.meta_dir),
+        )
+        return Catalog(
+            units,
+            load_meta("categories", self.meta_dir),
+            load_meta("districts", self.meta_dir),
+        )
+
+# ─────────────────────────────────────────────────────────────
+# МЕТРИКИ
+# ─────────────────────────────────────────────────────────────
+
+class Metrics:
+    """Задержки по эндпоинтам: всего запросов, ошибок и перцентили по окну"""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self.endpoints = {}
+
+    def record(self, endpoint, seconds, status):
+        e = self.endpoints.get(endpoint)
+        if e is None:
+            e = self.endpoints[endpoint] = {
+                "requests": 0, "errors": 0, "total": 0.0, "max": 0.0,
+                "recent": deque(maxlen=self.window),
+            }
+        e["requests"] += 1
+        e["errors"] += status >= 400
+        e["total"] += seconds
+        e["max"] = max(e["max"], seconds)
+        e["recent"].append(seconds)
+
+    @staticmethod
+    def _percentile(ordered, p):
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def report(self):
+        report = {}
+        for endpoint, e in sorted(self.endpoints.items()):
+            ordered = sorted(e["recent"])
+            report[endpoint] = {
+                "requests": e["requests"],
+                "errors": e["errors"],
+                "mean_ms": round(1000 * e["total"] / e["requests"], 3),
+                "p50_ms": round(1000 * self._percentile(ordered, 50), 3),
+                "p95_ms": round(1000 * self._percentile(ordered, 95), 3),
+                "p99_ms": round(1000 * self._percentile(ordered, 99), 3),
+                "max_ms": round(1000 * e["max"], 3),
+            }
+        return report
+
+# ─────────────────────────────────────────────────────────────
+# HTTP
+# ─────────────────────────────────────────────────────────────
+
+REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class CatalogServer:
+    def __init__(self, loader, reload_interval=RELOAD_INTERVAL):
+        self.loader = loader
+        self.reload_interval = reload_interval
+        self.metrics = Metrics()
+        self.catalog = None
+        self.reloads = 0
+        self._snapshot = None
+        self.started = time.time()
+
+    async def load(self):
+        loop = asyncio.get_running_loop()
+        snap = await loop.run_in_executor(None, self.loader.snapshot)
+        catalog = await loop.run_in_executor(None, self.loader.build, snap)
+        # Подмена одной ссылкой: начатые запросы держат старый каталог
+        self.catalog, self._snapshot = catalog, snap
+        return catalog
+
+    async def reload_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                snap = await loop.run_in_executor(None, self.loader.snapshot)
+                if snap == self._snapshot:
+                    continue
+                started = time.perf_counter()
+                catalog = await self.load()
+                self.reloads += 1
+                print(f"🔄 Каталог перезагружен: {len(catalog.units)} объектов "
+                      f"за {time.perf_counter() - started:.2f} с")
+            except Exception as e:
+                # Битый файл посреди записи — остаёмся на старом каталоге
+                print(f"⚠️  Перезагрузка не удалась: {e}")
+
+    # ── маршруты ────────────────────────────────────────────
+
+    def route(self, path, params):
+        """(статус, тело)"""
+        catalog = self.catalog
+        if path == "/units":
+            return 200, catalog.query(params)
+        if path == "/categories":
+            return 200, {"categories": catalog.category_counts()}
+        if path == "/districts":
+            return 200, catalog.district_cascade(_single(params, "okrug"))
+        if path == "/metrics":
+            return 200, {
+                "uptime_s": round(time.time() - self.started),
+                "units": len(catalog.units),
+                "loaded_at": catalog.loaded_at,
+                "reloads": self.reloads,
+                "endpoints": self.metrics.report(),
+            }
+        if path == "/health":
+            return 200, {"ok": True, "units": len(catalog.units)}
+        return 404, {"error": f"нет такого пути: {path}"}
+
+    async def dispatch(self, method, target):
+        started = time.perf_counter()
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        endpoint = path if path in ENDPOINTS else "other"
+        if method == "OPTIONS":
+            status, body = 204, None
+        elif method not in ("GET", "HEAD"):
+            status, body = 405, {"error": f"метод {method} не поддерживается"}
+        else:
+            try:
+                params = parse_qs(url.query)
+                if endpoint in QUERY_ENDPOINTS:
+                    loop = asyncio.get_running_loop()
+                    status, body = await loop.run_in_executor(None, self.route, path, params)
+                else:
+                    status, body = self.route(path, params)
+            except QueryError as e:
+                status, body = 400, {"error": str(e)}
+            except Exception as e:
+                status, body = 500, {"error": str(e)}
+        # Метрики пишутся только здесь, в потоке event loop
+        self.metrics.record(endpoint, time.perf_counter() - started, status)
+        return status, body
+
+    async def respond(self, writer, method, status, body, keep_alive):
+        payload = b"" if body is None else json.dumps(body, ensure_ascii=False).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(payload)}",
+            "Access-Control-Allow-Origin: *",
+            "Access-Control-Allow-Methods: GET, OPTIONS",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        if method != "HEAD":
+            writer.write(payload)
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = headers.get("content-length", "0") or "0"
+                if not length.isdigit() or int(length) > MAX_BODY:
+                    # Где кончается тело, неизвестно — отвечаем и закрываем
+                    error = f"Content-Length: ожидалось целое от 0 до {MAX_BODY}, получено '{length}'"
+                    self.metrics.record("other", 0.0, 400)
+                    await self.respond(writer, method, 400, {"error": error}, False)
+                    break
+                if int(length):
+                    await reader.readexactly(int(length))
+
+                status, body = await self.dispatch(method, target)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self.respond(writer, method, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host, port, reload_interval, developers_dir=DEVELOPERS_DIR, meta_dir=META_DIR):
+    server = CatalogServer(CatalogLoader(developers_dir, meta_dir), reload_interval)
+    started = time.perf_counter()
+    catalog = await server.load()
+    print(f"📦 Загружено объектов: {len(catalog.units)} за {time.perf_counter() - started:.2f} с")
+
+    http = await asyncio.start_server(server.handle, host, port)
+    print(f"🌐 http://{host}:{port}/units  (Ctrl+C — выход)")
+    reloader = asyncio.create_task(server.reload_loop())
+    try:
+        async with http:
+            await http.serve_forever()
+    finally:
+        reloader.cancel()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="PSNHUB — сервис выборок каталога")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"адрес (по умолчанию {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"порт (по умолчанию {DEFAULT_PORT})")
+    parser.add_argument(
+        "--reload", type=float, default=RELOAD_INTERVAL,
+        help=f"как часто проверять файлы на диске, секунд (по умолчанию {RELOAD_INTERVAL:g})",
+    )
+    parser.add_argument("--developers", default=DEVELOPERS_DIR, help="папка с JSON застройщиков")
+    parser.add_argument("--meta", default=META_DIR, help="папка с categories.json / districts.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("=" * 55)
+    print("PSNHUB — Сервис выборок каталога")
+    print("=" * 55)
+    try:
+        asyncio.run(serve(args.host, args.port, args.reload, args.developers, args.meta))
+    except KeyboardInterrupt:
+        print("\n👋 Сервис остановлен")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — колоночный формат каталога ({slug}_{deal}.col.json)
+=============================================================
+Тот же набор объектов, что и в {slug}_{deal}.json, но по колонкам:
+
+    {
+      "developer": "ГК ПИК", "slug": "pik", "updated": "2026-02-25", "deal": "sale",
+      "format": "columnar-v1",
+      "count": 135,
+      "keys": ["id", "jk", ...],             # порядок полей объекта
+      "columns": {
+        "jk":    {"enc": "dict", "values": ["Саларьево парк", ...],
+                  "width": 1, "index": "<base64>"},
+        "price": {"enc": "f64", "type": "int", "data": "<base64>"},
+        "id":    {"enc": "raw", "values": ["pik-5-0", ...]}
+      }
+    }
+
+Кодировки колонок:
+    dict — словарь уникальных значений (любой JSON: строки, числа, null,
+           списки метро) + индексы в словаре; index — base64 от массива
+           беззнаковых целых little-endian шириной width байт (1/2/4),
+           в браузере это Uint8Array / Uint16Array / Uint32Array.
+    f64  — числа без пропусков одного типа (int или float), base64 от
+           float64 little-endian (Float64Array); type говорит, во что
+           превращать значение при декодировании.
+    raw  — обычный список значений (для почти уникальных колонок).
+
+decode_units() восстанавливает объекты в исходном виде — json.dumps от
+результата совпадает с исходным побайтно.
+
+pack_postings() / unpack_postings() — возрастающие списки номеров
+объектов (posting lists инвертированных индексов): разности соседних
+номеров в varint (LEB128, 7 бит на байт), затем base64.
+"""
+
+import base64
+import json
+import math
+import sys
+from array import array
+
+FORMAT = "columnar-v1"
+SUFFIX = ".col.json"
+
+# Колонка кодируется словарём, если уникальных значений не больше этой доли
+DICT_MAX_RATIO = 0.5
+
+# Целые больше 2^53 теряют точность в float64
+_MAX_EXACT_INT = 2 ** 53
+
+# Ширина индекса в байтах → typecode array (Uint8 / Uint16 / Uint32 в браузере)
+INDEX_TYPES = {1: "B", 2: "H", 4: "I"}
+
+
+def is_columnar_path(path):
+    return path.endswith(SUFFIX)
+
+
+def columnar_path(path):
+    """pik_sale.json → pik_sale.col.json"""
+    if path.endswith(".json"):
+        path = path[:-len(".json")]
+    return path + SUFFIX
+
+
+def json_path(path):
+    """pik_sale.col.json → pik_sale.json (обычный путь — как есть)"""
+    if is_columnar_path(path):
+        return path[:-len(SUFFIX)] + ".json"
+    return path
+
+
+# ─────────────────────────────────────────────────────────────
+# УПАКОВКА
+# ─────────────────────────────────────────────────────────────
+
+def index_width(n):
+    """Байт на номер (1, 2 или 4) для словаря / списка из n элементов"""
+    return 1 if n <= 0xFF else 2 if n <= 0xFFFF else 4
+
+
+def pack_array(typecode, values):
+    """Числа → base64 от array(typecode) в little-endian (как TypedArray в браузере)"""
+    arr = array(typecode, values)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return base64.b64encode(arr.tobytes()).decode("ascii")
+
+
+def unpack_array(typecode, data):
+    arr = array(typecode)
+    arr.frombytes(base64.b64decode(data))
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+def pack_postings(ordinals):
+    """[3, 5, 6, 140] → base64 от varint разностей [3, 2, 1, 134]"""
+    out = bytearray()
+    prev = 0
+    for n in ordinals:
+        gap = n - prev
+        if gap < 0:
+            raise ValueError("postings: номера должны идти по возрастанию")
+        prev = n
+        while gap >= 0x80:
+            out.append((gap & 0x7F) | 0x80)
+            gap >>= 7
+        out.append(gap)
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def unpack_postings(data):
+    ordinals = []
+    prev = 0
+    gap = shift = 0
+    for byte in base64.b64decode(data):
+        gap |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        prev += gap
+        ordinals.append(prev)
+        gap = shift = 0
+    return ordinals
+
+
+def _number_type(values):
+    """'int' / 'float', если колонку можно упаковать в f64, иначе None"""
+    if all(type(v) is int and abs(v) <= _MAX_EXACT_INT for v in values):
+        return "int"
+    if all(type(v) is float and math.isfinite(v) for v in values):
+        return "float"
+    return None
+
+
+def _value_key(value):
+    # 1, 1.0 и True равны для dict — различаем их по типу и JSON-записи
+    return type(value).__name__, json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+def encode_column(values):
+    n = len(values)
+    num_type = _number_type(values) if n else None
+
+    lookup = {}
+    distinct = []
+    index = []
+    for v in values:
+        key = _value_key(v)
+        i = lookup.get(key)
+        if i is None:
+            i = lookup[key] = len(distinct)
+            distinct.append(v)
+        index.append(i)
+
+    if num_type and len(distinct) > n * DICT_MAX_RATIO:
+        return {"enc": "f64", "type": num_type, "data": pack_array("d", values)}
+    if len(distinct) > max(n * DICT_MAX_RATIO, 1):
+        return {"enc": "raw", "values": list(values)}
+
+    width = index_width(len(distinct))
+    return {
+        "enc": "dict",
+        "values": distinct,
+        "width": width,
+        "index": pack_array(INDEX_TYPES[width], index),
+    }
+
+
+def decode_column(col, count):
+    enc = col["enc"]
+    if enc == "raw":
+        values = col["values"]
+    elif enc == "f64":
+        data = unpack_array("d", col["data"])
+        values = [int(v) for v in data] if col["type"] == "int" else list(data)
+    elif enc == "dict":
+        distinct = col["values"]
+        values = [distinct[i] for i in unpack_array(INDEX_TYPES[col["width"]], col["index"])]
+    else:
+        raise ValueError(f"columnar: неизвестная кодировка колонки '{enc}'")
+    if len(values) != count:
+        raise ValueError(f"columnar: в колонке {len(values)} значений вместо {count}")
+    return values
+
+
+# ─────────────────────────────────────────────────────────────
+# ОБЪЕКТЫ ↔ КОЛОНКИ
+# ─────────────────────────────────────────────────────────────
+
+def encode_units(units, meta=None):
+    """Список объектов → колоночный документ; meta — ключи верхнего уровня.
+
+    Все объекты должны иметь одинаковый набор и порядок полей
+    (так их выдаёт convert_file), иначе ValueError.
+    """
+    builder = ColumnBuilder()
+    for unit in units:
+        builder.add(unit)
+    return builder.encode(meta)
+
+
+class ColumnBuilder:
+    """Собирает колонки по одному объекту — без промежуточного списка словарей"""
+
+    def __init__(self):
+        self.keys = None
+        self.columns = []
+        self.count = 0
+
+    def add(self, unit):
+        if self.keys is None:
+            self.keys = list(unit)
+            self.columns = [[] for _ in self.keys]
+        elif len(unit) != len(self.keys) or any(a != b for a, b in zip(unit, self.keys)):
+            raise ValueError("columnar: у объектов разный набор полей")
+        for column, value in zip(self.columns, unit.values()):
+            column.append(value)
+        self.count += 1
+
+    def encode(self, meta=None):
+        keys = self.keys or []
+        doc = dict(meta or {})
+        doc["format"] = FORMAT
+        doc["count"] = self.count
+        doc["keys"] = keys
+        doc["columns"] = {k: encode_column(col) for k, col in zip(keys, self.columns)}
+        return doc
+
+
+def iter_units(doc):
+    """Колоночный документ → объекты по одному (в исходном порядке полей)"""
+    if doc.get("format") != FORMAT:
+        raise ValueError(f"columnar: неизвестный формат {doc.get('format')!r}")
+    count = doc["count"]
+    keys = doc["keys"]
+    columns = [decode_column(doc["columns"][k], count) for k in keys]
+    for row in zip(*columns):
+        yield dict(zip(keys, row))
+
+
+def decode_units(doc):
+    return list(iter_units(doc))
+
+
+def dumps(doc):
+    """Компактная запись — формат для передачи по сети, не для глаз"""
+    return json.dumps(doc, ensure_ascii=False, separators=(",", ":"))
+
+
+class ColumnarFile:
+    """Чтение .col.json с тем же интерфейсом, что у jsonstream.UnitStream:
+    итерация по объектам, .meta — ключи верхнего уровня, .keys — все ключи.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.meta = {}
+        self.keys = []
+
+    def __iter__(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+        if not isinstance(doc, dict):
+            raise ValueError(f"{self.path}: ожидался JSON объект")
+        # Обновляем на месте: вызывающий мог взять ссылку на .meta до итерации
+        self.keys[:] = list(doc)
+        self.meta.update((k, v) for k, v in doc.items() if k not in ("columns", "keys"))
+        try:
+            units = iter_units(doc)
+            yield from units
+        except (KeyError, TypeError, IndexError) as e:
+            raise ValueError(f"{self.path}: повреждённый колоночный файл ({e!r})") from e
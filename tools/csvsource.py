@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — чтение CSV / TSV выгрузок застройщиков
+===============================================
+Быстрый путь вместо openpyxl: файл читается модулем csv построчно,
+строки отдаются теми же кортежами, что и iter_rows(values_only=True)
+у openpyxl, — дальше работает обычный конвейер excel_to_json.py
+с DEVELOPER_MAPS и normalize.py.
+
+Что определяется само:
+    кодировка    — UTF-8 (с BOM или без) или cp1251 (выгрузка из Excel
+                   «CSV (разделители — запятые)» в русской Windows)
+    разделитель  — ';' / ',' / табуляция / '|' по строке заголовков
+                   (.tsv — всегда табуляция)
+
+Значения приводятся к типам, как их отдал бы openpyxl для той же таблицы:
+пустая ячейка → None, '12' → 12, '100.5' → 100.5. Если разделитель
+не запятая, десятичная запятая тоже понимается: '100,5' → 100.5.
+Целые с ведущим нулём ('007') остаются строками — Excel так хранит текст.
+"""
+
+import codecs
+import csv
+import re
+from contextlib import contextmanager
+
+EXTENSIONS = (".csv", ".tsv")
+
+# Сколько байт начала файла смотреть для определения кодировки
+SAMPLE_SIZE = 1 << 20
+
+DELIMITERS = (";", "\t", ",", "|")
+
+_INT_RE = re.compile(r'-?(0|[1-9]\d*)')
+_FLOAT_RE = re.compile(r'-?\d+\.\d+')
+_FLOAT_COMMA_RE = re.compile(r'-?\d+,\d+')
+
+
+def is_csv_path(path):
+    return path.lower().endswith(EXTENSIONS)
+
+
+def detect_encoding(sample):
+    """'utf-8-sig' / 'utf-8' / 'cp1251' по первым байтам файла"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # final=False: многобайтный символ мог обрезаться на границе выборки
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1251"
+
+
+def detect_delimiter(header_line, path=""):
+    """Разделитель по строке заголовков: какого кандидата в ней больше всего"""
+    if path.lower().endswith(".tsv"):
+        return "\t"
+    counts = {d: header_line.count(d) for d in DELIMITERS}
+    best = max(DELIMITERS, key=lambda d: counts[d])
+    return best if counts[best] else ";"
+
+
+def cast_value(text, decimal_comma=False):
+    """Строка ячейки → значение как у openpyxl (None / int / float / str)"""
+    if text == "":
+        return None
+    if _INT_RE.fullmatch(text):
+        return int(text)
+    if _FLOAT_RE.fullmatch(text):
+        return float(text)
+    if decimal_comma and _FLOAT_COMMA_RE.fullmatch(text):
+        return float(text.replace(",", "."))
+    return text
+
+
+@contextmanager
+def open_rows(path):
+    """with open_rows(path) as rows: — итератор кортежей значений по строкам"""
+    with open(path, "rb") as f:
+        sample = f.read(SAMPLE_SIZE)
+    encoding = detect_encoding(sample)
+
+    f = open(path, "r", encoding=encoding, newline="")
+    try:
+        header_line = f.readline()
+        f.seek(0)
+        delimiter = detect_delimiter(header_line, path)
+        decimal_comma = delimiter != ","
+        reader = csv.reader(f, delimiter=delimiter)
+        yield (
+            tuple(cast_value(v, decimal_comma) for v in row)
+            for row in reader
+        )
+    finally:
+        f.close()
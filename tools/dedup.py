@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — поиск почти-дубликатов в каталоге
+==========================================
+generate_stats.py снимает дубликаты только по точному id. Одно и то же
+помещение из двух выгрузок (или с новым id — excel_to_json добавляет
+-{строка} при совпадении) так считается дважды.
+
+Здесь объекты сначала раскладываются по блокам:
+    сделка + ЖК + улица + дом/корпус/строение
+(адрес нормализуется: регистр, ё, «улица» → «ул», «дом 1к2» → «д 1 к 2»,
+без «г. Москва» и индекса). Внутри блока объекты сортируются по площади,
+и сравниваются только соседи с близкой площадью — работа растёт почти
+линейно, а не как n² по всем парам. Пара — дубликат, если совпадает этаж
+и площадь / цена отличаются не больше допусков. Внутри одного файла
+разные id — разные помещения (у застройщика бывают десятки одинаковых),
+поэтому там парой считается только id и его вариант с -{строка}. Связанные пары
+собираются в кластеры (union-find); в каждом остаётся первый объект
+в порядке файлов, как и при дедупликации по id.
+
+    python dedup.py                       # отчёт по data/developers
+    python dedup.py -o duplicates.json    # и записать кластеры в файл
+
+generate_stats.py --dedup исключает дубликаты из stats.json / facets.json
+и пишет data/meta/duplicates.json.
+"""
+
+import argparse
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+# Допуски: площадь — доля или абсолютная разница (что больше), цена — доля
+AREA_TOLERANCE = 0.005
+AREA_ABS_TOLERANCE = 0.1
+PRICE_TOLERANCE = 0.03
+
+# Сокращения в адресах → одно написание
+ADDRESS_WORDS = {
+    "улица": "ул", "ул": "ул",
+    "проспект": "пр", "просп": "пр", "пр": "пр",
+    "шоссе": "ш", "ш": "ш",
+    "переулок": "пер", "пер": "пер",
+    "бульвар": "бр", "бр": "бр", "б": "бр",
+    "проезд": "прд", "пр-д": "прд",
+    "набережная": "наб", "наб": "наб",
+    "площадь": "пл", "пл": "пл",
+    "дом": "д", "д": "д",
+    "корпус": "к", "корп": "к", "к": "к",
+    "строение": "с", "стр": "с", "с": "с",
+    "владение": "вл", "вл": "вл",
+}
+
+# Слова, которые ничего не различают внутри каталога Москвы и МО
+ADDRESS_NOISE = {"г", "город", "москва", "россия", "рф", "московская", "область", "обл"}
+
+_TOKEN_RE = re.compile(r"\d+|[a-zа-я]+")
+
+
+def normalize_text(value):
+    """'ЖК «Ёлки-Парк»' → 'жк елки парк'"""
+    return " ".join(_TOKEN_RE.findall(str(value or "").lower().replace("ё", "е")))
+
+
+def split_address(address):
+    """(улица, дом) — нормализованные токены адреса без номеров и номера дома.
+
+    'г. Москва, улица Липовый Парк, дом 1к2' → ('ул липовый парк', 'д 1 к 2')
+    """
+    street, building = [], []
+    for token in _TOKEN_RE.findall(str(address or "").lower().replace("ё", "е")):
+        if token.isdigit():
+            if len(token) == 6:
+                continue    # почтовый индекс
+            building.append(token)
+            continue
+        token = ADDRESS_WORDS.get(token, token)
+        if token in ADDRESS_NOISE:
+            continue
+        # Маркер д / к / с / вл относится к номеру после него
+        if token in ("д", "к", "с", "вл"):
+            building.append(token)
+        else:
+            street.append(token)
+    # Висячий маркер без номера ('..., дом') ничего не значит
+    while building and not building[-1].isdigit():
+        building.pop()
+    return " ".join(street), " ".join(building)
+
+
+def block_key(unit):
+    """Ключ блока объекта или None, если сравнивать не с чем (нет ни ЖК, ни адреса)"""
+    jk = normalize_text(unit.get("jk"))
+    street, building = split_address(unit.get("address"))
+    if not (jk or street):
+        return None
+    return (unit.get("deal") or "", jk, street, building)
+
+
+def _number(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+_ROW_SUFFIX_RE = re.compile(r"-\d+")
+
+
+def same_id(a, b):
+    """Один ли id: совпадает или отличается суффиксом -{строка} от excel_to_json"""
+    if a == b:
+        return True
+    if len(a) < len(b):
+        a, b = b, a
+    return bool(b) and a.startswith(b) and bool(_ROW_SUFFIX_RE.fullmatch(a[len(b):]))
+
+
+def is_duplicate(a, b):
+    """Одно ли помещение: a и b — (площадь, этаж, цена) из одного блока"""
+    area_a, floor_a, price_a = a
+    area_b, floor_b, price_b = b
+    if abs(area_a - area_b) > max(AREA_ABS_TOLERANCE, AREA_TOLERANCE * max(area_a, area_b)):
+        return False
+    if floor_a is not None and floor_b is not None and floor_a != floor_b:
+        return False
+    # Цена 0 — «по запросу»: по цене такие не различить
+    if price_a > 0 and price_b > 0:
+        return abs(price_a - price_b) <= PRICE_TOLERANCE * max(price_a, price_b)
+    return True
+
+
+class DedupIndex:
+    """Объекты по блокам; clusters() — группы почти-дубликатов.
+
+    ref — что угодно, по чему вызывающий код узнает объект (номер,
+    (файл, строка), ...). Порядок add() — порядок приоритета: в кластере
+    первым идёт объект, добавленный раньше. source — файл объекта:
+    внутри одного source сравниваются только варианты одного id.
+    """
+
+    def __init__(self):
+        self.refs = []
+        self.blocks = {}    # ключ блока → [(площадь, этаж, цена, номер, source, id)]
+
+    def add(self, ref, unit, source=None):
+        n = len(self.refs)
+        self.refs.append(ref)
+        key = block_key(unit)
+        if key is not None:
+            self.blocks.setdefault(key, []).append((
+                _number(unit.get("area")), unit.get("floor"), _number(unit.get("price")),
+                n, source, str(unit.get("id") or ""),
+            ))
+
+    def clusters(self):
+        """[[ref, ...], ...] — кластеры из 2+ объектов, по порядку первого объекта"""
+        parent = list(range(len(self.refs)))
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for items in self.blocks.values():
+            if len(items) < 2:
+                continue
+            items.sort(key=lambda item: (item[0], item[3]))
+            for i, a in enumerate(items):
+                limit = a[0] + max(AREA_ABS_TOLERANCE, AREA_TOLERANCE * a[0] / (1 - AREA_TOLERANCE))
+                for b in items[i + 1:]:
+                    if b[0] > limit:
+                        break
+                    if a[4] == b[4] and not same_id(a[5], b[5]):
+                        continue
+                    if is_duplicate(a[:3], b[:3]):
+                        ra, rb = find(a[3]), find(b[3])
+                        if ra != rb:
+                            # Корень — объект с меньшим номером, он и остаётся
+                            parent[max(ra, rb)] = min(ra, rb)
+
+        groups = {}
+        for n in range(len(self.refs)):
+            groups.setdefault(find(n), []).append(n)
+        return [
+            [self.refs[n] for n in members]
+            for _, members in sorted(groups.items()) if len(members) > 1
+        ]
+
+    def duplicates(self):
+        """Множество ref, которые нужно отбросить (все, кроме первого в кластере)"""
+        return {ref for cluster in self.clusters() for ref in cluster[1:]}
+
+
+def report(clusters, describe, total, generated=None):
+    """Документ duplicates.json; describe(ref) → словарь для отчёта"""
+    return {
+        "version": "1.0",
+        "description": "Почти-дубликаты объектов (tools/dedup.py): в каждом кластере остаётся keep.",
+        "generated": generated or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+        "units": total,
+        "clusters": len(clusters),
+        "duplicates": sum(len(c) - 1 for c in clusters),
+        "items": [
+            {"keep": describe(cluster[0]), "drop": [describe(ref) for ref in cluster[1:]]}
+            for cluster in clusters
+        ],
+    }
+
+
+def describe_unit(unit, filepath="", n=None):
+    """Объект для отчёта; n — номер в файле (по file + n + id сборки
+    сайта пропускают лишние объекты, см. catalog.load_duplicates)"""
+    desc = {"id": unit.get("id", ""), "file": filepath}
+    if n is not None:
+        desc["n"] = n
+    desc.update({
+        "jk": unit.get("jk", ""),
+        "address": unit.get("address", ""),
+        "floor": unit.get("floor"),
+        "area": unit.get("area"),
+        "price": unit.get("price"),
+    })
+    return desc
+
+
+def main(argv=None):
+    from catalog import BASE_DIR, DEVELOPERS_DIR, iter_catalog_units
+
+    parser = argparse.ArgumentParser(description="PSNHUB — поиск почти-дубликатов")
+    parser.add_argument("--developers", default=DEVELOPERS_DIR, help="папка с JSON застройщиков")
+    parser.add_argument("-o", "--output", help="куда записать отчёт (JSON)")
+    args = parser.parse_args(argv)
+
+    index = DedupIndex()
+    units = []
+    for filepath, _, unit in iter_catalog_units(args.developers):
+        rel = os.path.relpath(filepath, BASE_DIR).replace(os.sep, "/")
+        index.add(len(units), unit, filepath)
+        units.append(describe_unit(unit, rel))
+
+    clusters = index.clusters()
+    doc = report(clusters, units.__getitem__, len(units))
+    print(f"🔍 Объектов: {len(units)}, блоков: {len(index.blocks)}")
+    print(f"   Кластеров: {doc['clusters']}, лишних объектов: {doc['duplicates']}")
+    for item in doc["items"][:10]:
+        keep = item["keep"]
+        drop = ", ".join(f"{d['id']} ({d['file']})" for d in item["drop"])
+        print(f"   • {keep['id']} ({keep['file']}) ← {drop}")
+    if len(doc["items"]) > 10:
+        print(f"   … и ещё {len(doc['items']) - 10}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, indent=2)
+        print(f"✅ Отчёт: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,24 +8,83 @@ PSNHUB — Конвертер Excel → JSON
 
 Использование:
     python excel_to_json.py
+    python excel_to_json.py --workers 4    # 4 файла параллельно (0 = все ядра)
+    python excel_to_json.py --no-cache     # перечитать все файлы, даже неизменённые
+    python excel_to_json.py --format both  # ещё и компактный {slug}_{deal}.col.json
+                                           # (columnar — только он, json — только .json;
+                                           #  файл другого формата удаляется)
+    python excel_to_json.py --profile      # JSON профиль: время по этапам, счётчики
+    python excel_to_json.py --profile --sample  # + семплы стеков по каждой книге
+    python excel_to_json.py --watch        # следить за папкой, конвертировать изменения
+
+Неизменённые файлы берутся из кэша: tools\.cache\convert\
+
+Конвертируются все листы книги, где нашлись колонки маппинга (заголовки
+ищутся в первых строках листа — над ними может быть шапка). Листы без
+колонки площади (справка, контакты) пропускаются. С --workers большие
+листы одной книги конвертируются параллельно.
+
+Вместо .xlsx можно положить выгрузку .csv / .tsv с теми же колонками —
+она читается без openpyxl, в разы быстрее (кодировка и разделитель
+определяются сами, см. csvsource.py).
 
 Файлы Excel кладёшь в:  tools\source_excel\
 Готовые JSON появятся в: data\developers\
 """
 
 import openpyxl
+import argparse
+import contextlib
+import hashlib
+import io
+import itertools
 import json
 import os
 import re
 import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+import columnar
+import csvsource
+import fileio
+import normalize
+import profiling
+from jsonstream import UnitStream
+from unitrecord import Unit, as_dict
+from normalize import (
+    clean_area, clean_floor, clean_price, clean_str, normalize_city,
+    normalize_commission, normalize_deal, normalize_delivery, normalize_type, split_metro,
+)
+
 # ─────────────────────────────────────────────────────────────
 # ПУТИ (относительно папки где лежит скрипт)
 # ─────────────────────────────────────────────────────────────
 SCRIPT_DIR   = os.path.dirname(os.path.abspath(__file__))
 SOURCE_DIR   = os.path.join(SCRIPT_DIR, "source_excel")
 OUTPUT_DIR   = os.path.join(SCRIPT_DIR, "..", "data", "developers")
+CACHE_DIR    = os.path.join(SCRIPT_DIR, ".cache", "convert")
+
+# Какие файлы из SOURCE_DIR конвертируются (CSV/TSV — см. csvsource.py)
+SOURCE_EXTENSIONS = (".xlsx",) + csvsource.EXTENSIONS
+PROFILE_DIR  = os.path.join(SCRIPT_DIR, ".cache", "profile")
+STATS_SCRIPT_DIR = os.path.join(SCRIPT_DIR, "..", ".github", "scripts")
+
+# Профиль запуска (--profile): время по этапам и счётчики, см. profiling.py
+PROFILER = profiling.NULL
+
+# Версия формата кэша конвертации. Увеличь, если меняется логика
+# convert_file / normalize.py — иначе из кэша вернутся старые объекты.
+CACHE_VERSION = 4
+
+# В скольких первых строках листа искать заголовки (выше бывает шапка)
+HEADER_SCAN_ROWS = 10
+
+# В параллельном режиме книга с листами от стольких строк
+# конвертируется по листу на воркер
+SHEET_SPLIT_ROWS = 20000
 
 # ─────────────────────────────────────────────────────────────
 # МАППИНГИ КОЛОНОК ПО ЗАСТРОЙЩИКАМ
@@ -132,121 +191,6 @@ DEVELOPER_MAPS = {
 # ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
 # ─────────────────────────────────────────────────────────────
 
-def clean_price(val):
-    """41 203 240 руб. → 41203240"""
-    if val is None:
-        return 0
-    s = str(val).replace(" ", "").replace("\xa0", "")
-    s = re.sub(r'[^\d.,]', '', s)
-    s = s.replace(",", ".")
-    parts = s.split(".")
-    if len(parts) > 1:
-        s = parts[0]
-    try:
-        return int(float(s))
-    except:
-        return 0
-
-def clean_area(val):
-    """100.3 м² → 100.3"""
-    if val is None:
-        return 0.0
-    s = str(val).replace(" ", "").replace("\xa0", "").replace("м²", "").replace("м2", "")
-    s = re.sub(r'[^\d.,]', '', s)
-    s = s.replace(",", ".")
-    try:
-        return round(float(s), 2)
-    except:
-        return 0.0
-
-def clean_str(val):
-    """Чистит строку от пробелов и None"""
-    if val is None:
-        return ""
-    return str(val).strip()
-
-def clean_floor(val):
-    """'1.0' → 1"""
-    if val is None:
-        return None
-    try:
-        return int(float(str(val)))
-    except:
-        return None
-
-def normalize_type(val):
-    """Нормализует тип помещения"""
-    v = clean_str(val).lower()
-    if "офис" in v or "office" in v:
-        return "Офис"
-    if "габ" in v or "gab" in v or "ready" in v:
-        return "ГАБ"
-    if "пвз" in v or "pvz" in v or "пункт" in v:
-        return "ПВЗ"
-    if "франш" in v or "franchise" in v:
-        return "ГАБ"
-    if "премиум" in v or "premium" in v or "элит" in v:
-        return "Премиум"
-    return "ПСН"
-
-def normalize_deal(val):
-    """'аренда ' → 'rent', 'продажа' → 'sale'"""
-    v = clean_str(val).lower()
-    if "аренд" in v or "rent" in v:
-        return "rent"
-    return "sale"
-
-def normalize_city(val):
-    """'Москва ' → 'Москва'"""
-    v = clean_str(val)
-    if "москва" in v.lower() or "moscow" in v.lower():
-        return "Москва"
-    return v
-
-def normalize_delivery(val):
-    """'до 28 апреля 2028' / '2026.0' → '2028-Q2' / '2026'"""
-    if val is None:
-        return ""
-    s = str(val).strip()
-    # Если просто год: 2026.0
-    year_match = re.search(r'(202\d)', s)
-    if year_match:
-        year = year_match.group(1)
-        # Попробуем найти квартал по месяцу
-        months_q = {
-            "январ": "Q1", "феврал": "Q1", "март": "Q1",
-            "апрел": "Q2", "май": "Q2", "мая": "Q2", "июн": "Q2",
-            "июл": "Q3", "август": "Q3", "сентябр": "Q3",
-            "октябр": "Q4", "ноябр": "Q4", "декабр": "Q4",
-        }
-        for month, q in months_q.items():
-            if month in s.lower():
-                return f"{year}-{q}"
-        return year
-    return s
-
-def split_metro(val):
-    """'ЗИЛ, МЦК ЗИЛ, Тульская, Автозаводская' → ['Тульская', 'Автозаводская']"""
-    if not val:
-        return []
-    parts = [p.strip() for p in str(val).split(",")]
-    # Фильтруем МЦК и слишком короткие
-    result = []
-    for p in parts:
-        if p and len(p) > 3 and "МЦК" not in p:
-            result.append(p)
-    return result[:2]  # максимум 2 станции
-
-def normalize_commission(val):
-    """'3%' / '3.5' / None → 3.5"""
-    if val is None:
-        return 0
-    s = str(val).replace("%", "").replace(",", ".").strip()
-    try:
-        return round(float(s), 1)
-    except:
-        return 0
-
 def make_id(slug, val, row_num):
     """Генерирует id если в файле нет уникального"""
     clean = re.sub(r'[^a-zA-Z0-9А-Яа-яЁё]', '-', str(val or row_num))
@@ -265,23 +209,12 @@ def get_col_index(headers, name):
             return i
     return None
 
-def convert_file(filepath, dev_map):
-    """Конвертирует один Excel файл в список объектов"""
-    slug      = dev_map["slug"]
-    developer = dev_map["developer"]
-    deal_def  = dev_map["deal"]
-    col_map   = dev_map["col"]
-
-    wb = openpyxl.load_workbook(filepath, data_only=True)
-    ws = wb.active
-
-    # Читаем заголовки (строка 1)
-    headers = []
-    for c in range(1, ws.max_column + 1):
-        v = ws.cell(1, c).value
-        headers.append(str(v).strip() if v else "")
+def read_headers(header_row):
+    """Строка заголовков → список названий колонок ('' для пустых)"""
+    return [str(v).strip() if v else "" for v in (header_row or ())]
 
-    # Строим индекс колонок
+def build_col_index(headers, col_map):
+    """Сопоставляет поля маппинга с позициями колонок — один раз на лист"""
     idx = {}
     for field, col_name in col_map.items():
         i = get_col_index(headers, col_name)
@@ -289,29 +222,127 @@ def convert_file(filepath, dev_map):
             idx[field] = i
         else:
             print(f"  ⚠️  Колонка не найдена: '{col_name}' (поле {field}) — будет пустым")
+    return idx
+
+@contextlib.contextmanager
+def open_sheets(filepath):
+    """[(название листа, строки)] всех листов .xlsx (CSV/TSV — один лист "").
+
+    Строки — кортежи значений ячеек; листы читаются потоково по очереди.
+    """
+    if csvsource.is_csv_path(filepath):
+        with csvsource.open_rows(filepath) as rows:
+            yield [("", rows)]
+        return
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        yield [(ws.title, ws.iter_rows(values_only=True)) for ws in wb.worksheets]
+    finally:
+        # read_only держит файл открытым до close()
+        wb.close()
+
+def sheet_sizes(filepath):
+    """[(название листа, число строк или None)] — для раздачи листов воркерам"""
+    if csvsource.is_csv_path(filepath):
+        return [("", None)]
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        return [(ws.title, ws.max_row) for ws in wb.worksheets]
+    finally:
+        wb.close()
+
+def find_header(rows, col_map):
+    """(номер строки заголовков, заголовки, строки после них) — первая
+    из HEADER_SCAN_ROWS строк с колонкой площади; (None, заголовки
+    строки 1, строки со 2-й), если такой нет.
+
+    Строки до заголовков (название листа, шапка) пропускаются.
+    Просмотренные строки запоминаются: без заголовков они возвращаются
+    в поток — как раньше, данные со строки 2.
+    """
+    rows = iter(rows)
+    scanned = []
+    for row_num, row in enumerate(itertools.islice(rows, HEADER_SCAN_ROWS), start=1):
+        headers = read_headers(row)
+        if get_col_index(headers, col_map["area"]) is not None:
+            return row_num, headers, rows
+        scanned.append(row)
+    first = read_headers(scanned[0]) if scanned else []
+    return None, first, itertools.chain(scanned[1:], rows)
 
-    units = []
+def row_key(sheet_index, row_num):
+    """Номер строки для id: на первом листе — как раньше, дальше — '{лист}-{строка}'"""
+    return row_num if sheet_index == 0 else f"{sheet_index + 1}-{row_num}"
+
+def dedup_id(uid, key, seen_ids):
+    """id, уникальный среди seen_ids (повтор получает суффикс -{строка})"""
+    if uid in seen_ids:
+        uid = f"{uid}-{key}"
+        PROFILER.count("dedup_collisions")
+    seen_ids.add(uid)
+    return uid
+
+def sheet_units(rows, dev_map, sheet_index=0, title="", multi=False, seen_ids=None):
+    """Объекты одного листа (Unit).
+
+    seen_ids — общее для книги множество id: повторы получают суффикс
+    сразу. None — id не проверяются, а отдаются пары (ключ строки, Unit):
+    лист конвертирует воркер, dedup_id применит главный процесс, сливая
+    листы по порядку. multi — в книге несколько
+    листов: лист без колонки площади пропускается, итог печатается по листу.
+    Генератор возвращает (объектов, пропущено пустых): n = yield from ...
+    """
+    slug      = dev_map["slug"]
+    developer = dev_map["developer"]
+    deal_def  = dev_map["deal"]
+    col_map   = dev_map["col"]
+    prof      = PROFILER
+    label     = f"Лист «{title}»"
+
+    t = prof.clock()
+    # Заголовки ищем в первых строках листа и строим индекс колонок
+    header_row, headers, rows = find_header(rows, col_map)
+    if header_row is None:
+        if multi:
+            print(f"  ⏭️  {label}: нет колонки '{col_map['area']}' — пропущен")
+            prof.lap("headers", t)
+            return 0, 0
+        # Единственный лист — как раньше: заголовки в строке 1
+        header_row = 1
+    idx = build_col_index(headers, col_map)
+    prof.count("missing_columns", len(col_map) - len(idx))
+    t = prof.lap("headers", t)
+
+    count = 0
     skipped = 0
-    seen_ids = set()
 
-    for row_num in range(2, ws.max_row + 1):
+    for row_num, row in enumerate(rows, start=header_row + 1):
+        t = prof.lap("read", t)
+        prof.count("rows")
+        # В read_only строки бывают короче заголовка (пустой хвост не хранится)
+        width = len(row)
+
         def cell(field):
             i = idx.get(field)
-            return ws.cell(row_num, i + 1).value if i is not None else None
+            return row[i] if i is not None and i < width else None
 
         # Пропускаем пустые строки
         area = clean_area(cell("area"))
         if area <= 0:
             skipped += 1
+            prof.count("skipped")
+            t = prof.lap("normalize", t)
             continue
+        t = prof.lap("normalize", t)
 
         # ID
         raw_id = clean_str(cell("id"))
-        uid = make_id(slug, raw_id, row_num)
+        key = row_key(sheet_index, row_num)
+        uid = make_id(slug, raw_id, key)
         # Дедупликация
-        if uid in seen_ids:
-            uid = f"{uid}-{row_num}"
-        seen_ids.add(uid)
+        if seen_ids is not None:
+            uid = dedup_id(uid, key, seen_ids)
+        t = prof.lap("dedup", t)
 
         # Тип сделки
         if deal_def == "auto":
@@ -342,59 +373,218 @@ def convert_file(filepath, dev_map):
         url_3d = clean_str(cell("url_3d"))
         has_3d = bool(url_3d and url_3d.startswith("http"))
 
-        unit = {
-            "id":            uid,
-            "jk":            clean_str(cell("jk")),
-            "developer":     developer,
-            "type":          unit_type,
-            "deal":          deal,
-            "price":         price,
-            "area":          area,
-            "floor":         clean_floor(cell("floor")),
-            "finishing":     clean_str(cell("finishing")),
-            "delivery":      normalize_delivery(cell("delivery")),
-            "district":      clean_str(cell("district")),
-            "city":          normalize_city(cell("city")),
-            "metro":         metro_list,
-            "address":       clean_str(cell("address"))[:100],
-            "url_developer": clean_str(cell("url_developer")),
-            "has_3d":        has_3d,
-            "url_3d":        url_3d if has_3d else "",
-            "commission":    normalize_commission(cell("commission")),
-            "comment":       "",
-        }
-        units.append(unit)
+        unit = Unit(
+            id            = uid,
+            jk            = clean_str(cell("jk")),
+            developer     = developer,
+            type          = unit_type,
+            deal          = deal,
+            price         = price,
+            area          = area,
+            floor         = clean_floor(cell("floor")),
+            finishing     = clean_str(cell("finishing")),
+            delivery      = normalize_delivery(cell("delivery")),
+            district      = clean_str(cell("district")),
+            city          = normalize_city(cell("city")),
+            metro         = metro_list,
+            address       = clean_str(cell("address"))[:100],
+            url_developer = clean_str(cell("url_developer")),
+            has_3d        = has_3d,
+            url_3d        = url_3d if has_3d else "",
+            commission    = normalize_commission(cell("commission")),
+            comment       = "",
+        )
+        count += 1
+        prof.count("units")
+        t = prof.lap("normalize", t)
+        yield unit if seen_ids is not None else (key, unit)
+        # Время вне генератора (запись, кэш) меряют сами потребители
+        t = prof.clock()
+
+    if multi:
+        print(f"  📑 {label}: {count} объектов (пропущено пустых: {skipped})")
+    return count, skipped
 
-    print(f"  ✅ Конвертировано: {len(units)} объектов (пропущено пустых: {skipped})")
-    return units
+def iter_units(filepath, dev_map, sheets=None):
+    """Конвертирует один Excel (или CSV/TSV) файл — отдаёт объекты по одному.
+
+    Листы читаются потоково (read_only) по порядку книги: строки идут один
+    раз, значения берутся по заранее найденным позициям колонок. Память не
+    зависит от размера листа. Берутся все листы, где нашлись заголовки
+    маппинга; id уникальны в пределах книги (первый лист выигрывает).
+    Объекты — компактные unitrecord.Unit, в словари они превращаются
+    только при записи. sheets — номера листов (по умолчанию все).
+    """
+    t = PROFILER.clock()
+    count = 0
+    skipped = 0
+    seen_ids = set()
+    with open_sheets(filepath) as all_sheets:
+        PROFILER.lap("open", t)
+        multi = len(all_sheets) > 1
+        for i, (title, rows) in enumerate(all_sheets):
+            if sheets is not None and i not in sheets:
+                continue
+            n, empty = yield from sheet_units(rows, dev_map, i, title, multi, seen_ids)
+            count += n
+            skipped += empty
+
+    print(f"  ✅ Конвертировано: {count} объектов (пропущено пустых: {skipped})")
+
+def convert_file(filepath, dev_map):
+    """Конвертирует один Excel файл в список объектов (unitrecord.Unit)"""
+    return list(iter_units(filepath, dev_map))
 
 # ─────────────────────────────────────────────────────────────
 # ЗАПИСЬ JSON
+# Объекты пишутся по одному во временный файл (тот же формат, что
+# у json.dump(..., indent=2)). При close() файл подменяет прежний, только
+# если изменились объекты: иначе остаётся старый файл с прежней датой
+# "updated", и git / CDN не видят изменений.
 # ─────────────────────────────────────────────────────────────
 
-def save_json(units, slug, deal, output_dir):
-    """Сохраняет JSON в нужную папку"""
-    folder = os.path.join(output_dir, slug)
-    os.makedirs(folder, exist_ok=True)
-    filename = f"{slug}_{deal}.json"
-    filepath = os.path.join(folder, filename)
-
-    # Берём developer из первого объекта
-    developer = units[0]["developer"] if units else slug
-
-    output = {
-        "developer": developer,
-        "slug": slug,
-        "updated": datetime.now().strftime("%Y-%m-%d"),
-        "deal": deal,
-        "units": units
-    }
+class UnitWriter:
+    """Потоковая запись {slug}_{deal}.json (fmt="json") и/или
+    {slug}_{deal}.col.json (fmt="columnar" / "both")"""
 
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    def __init__(self, slug, deal, output_dir, fmt="json"):
+        folder = os.path.join(output_dir, slug)
+        os.makedirs(folder, exist_ok=True)
+        self.path = os.path.join(folder, f"{slug}_{deal}.json")
+        self.slug = slug
+        self.deal = deal
+        self.fmt = fmt
+        self.count = 0
+        self.meta = None
+        self._hasher = None
+        self._f = None          # временный .json
+        self._columns = columnar.ColumnBuilder() if fmt in ("columnar", "both") else None
+
+    def _start(self, developer):
+        self.meta = {
+            "developer": developer,
+            "slug": self.slug,
+            "updated": datetime.now().strftime("%Y-%m-%d"),
+            "deal": self.deal,
+        }
+        self._hasher = fileio.ContentHasher(self.meta)
+        if self.fmt in ("json", "both"):
+            self._f = open(f"{self.path}.tmp", "w", encoding="utf-8")
+            head = json.dumps(self.meta, ensure_ascii=False, indent=2)
+            self._f.write(head[:-2] + ',\n  "units": [\n')
+
+    def write(self, unit):
+        t = PROFILER.clock()
+        unit = as_dict(unit)
+        if self.meta is None:
+            # Берём developer из первого объекта
+            self._start(unit["developer"])
+        self._hasher.update(unit)
+        if self._f is not None:
+            text = json.dumps(unit, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+            self._f.write(("    " if self.count == 0 else ",\n    ") + text)
+        if self._columns is not None:
+            self._columns.add(unit)
+        self.count += 1
+        PROFILER.lap("write", t)
+
+    def close(self):
+        """Завершает запись; возвращает путь последнего файла или None (объектов не было)"""
+        if self.meta is None:
+            return None
+        t = PROFILER.clock()
+        new_hash = self._hasher.hexdigest()
+        filepath = None
+
+        if self._f is not None:
+            self._f.write("\n  ]\n}")
+            self._f.close()
+            self._f = None
+            filepath = self.path
+            if fileio.file_content_hash(filepath) == new_hash:
+                os.remove(f"{filepath}.tmp")
+                print(f"  ⏭️  Без изменений: {filepath}")
+            else:
+                os.replace(f"{filepath}.tmp", filepath)
+                print(f"  💾 Сохранён: {filepath}")
+
+        if self._columns is not None:
+            filepath = columnar.columnar_path(self.path)
+            if fileio.file_content_hash(filepath) == new_hash:
+                print(f"  ⏭️  Без изменений: {filepath}")
+            else:
+                fileio.atomic_write(filepath, columnar.dumps(self._columns.encode(self.meta)))
+                print(f"  💾 Сохранён: {filepath}")
+            self._columns = None
+
+        # Файл другого формата от прошлых запусков устарел: .col.json читается
+        # вместо .json (catalog.developer_files, index.json), а один .json
+        # без .col.json — сам по себе
+        stale = {"json": columnar.columnar_path(self.path), "columnar": self.path}.get(self.fmt)
+        if stale and os.path.exists(stale):
+            os.remove(stale)
+            print(f"  🗑️  Удалён устаревший {stale}")
+
+        PROFILER.lap("finalize", t)
+        return filepath
+
+    def abort(self):
+        """Выбрасывает недописанный файл — прежний остаётся нетронутым"""
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            os.remove(f"{self.path}.tmp")
+        self._columns = None
+
+def save_json(units, slug, deal, output_dir, fmt="json"):
+    """Сохраняет объекты в {slug}_{deal}.json (и/или .col.json, см. UnitWriter)"""
+    writer = UnitWriter(slug, deal, output_dir, fmt)
+    try:
+        for unit in units:
+            writer.write(unit)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
 
-    print(f"  💾 Сохранён: {filepath}")
-    return filepath
+def save_units(units, dev_map, fmt="json"):
+    """Разделяет продажу и аренду (если в одном файле) и пишет их потоково.
+
+    units — любой итератор объектов; возвращает сколько объектов записано.
+    Объекты с другой сделкой (не sale/rent) сохраняются в файл сделки
+    маппинга, только если ни продажи, ни аренды в файле нет.
+    """
+    slug = dev_map["slug"]
+    writers = {}
+    other = None
+    count = 0
+    try:
+        for unit in units:
+            count += 1
+            deal = unit["deal"]
+            if deal in ("sale", "rent"):
+                if deal not in writers:
+                    writers[deal] = UnitWriter(slug, deal, OUTPUT_DIR, fmt)
+                writers[deal].write(unit)
+            elif not writers:
+                if other is None:
+                    other = UnitWriter(slug, dev_map["deal"], OUTPUT_DIR, fmt)
+                other.write(unit)
+    except BaseException:
+        for writer in list(writers.values()) + [other]:
+            if writer is not None:
+                writer.abort()
+        raise
+
+    if other is not None and writers:
+        other.abort()
+        other = None
+    for deal in ("sale", "rent"):
+        if deal in writers:
+            writers[deal].close()
+    if other is not None:
+        other.close()
+    return count
 
 # ─────────────────────────────────────────────────────────────
 # ПОИСК МАППИНГА ПО ИМЕНИ ФАЙЛА
@@ -408,11 +598,495 @@ def find_map(filename):
             return dev_map
     return None
 
+# ─────────────────────────────────────────────────────────────
+# КЭШ КОНВЕРТАЦИИ
+# Одна запись на исходный файл: ключ = хэш содержимого + маппинг.
+# Если ни файл, ни его запись в DEVELOPER_MAPS не менялись —
+# объекты берутся из кэша, openpyxl не запускается.
+# ─────────────────────────────────────────────────────────────
+
+def cache_key(filepath, dev_map):
+    """sha256 от версии кэша, маппинга и содержимого файла"""
+    h = hashlib.sha256()
+    h.update(f"v{CACHE_VERSION}\n".encode())
+    h.update(json.dumps(dev_map, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _cache_path(filename):
+    name = hashlib.sha1(filename.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{name}.json")
+
+def _sheet_part_path(filename, sheet_index):
+    """Часть записи кэша с одним листом книги (пишет воркер, читает merge_sheets)"""
+    return f"{_cache_path(filename)[:-len('.json')]}.sheet{sheet_index}.json"
+
+def cache_hit(filename, key):
+    """Есть ли в кэше запись с этим ключом (читается только заголовок)"""
+    stream = UnitStream(_cache_path(filename))
+    try:
+        units = iter(stream)
+        first = next(units, None)
+        units.close()
+    except (OSError, ValueError):
+        return False
+    return first is not None and stream.meta.get("key") == key
+
+def cache_units(filename):
+    """Объекты записи кэша — потоком, по одному"""
+    return iter(UnitStream(_cache_path(filename)))
+
+class CacheWriter:
+    """Потоковая запись кэша {"key", "file", "units": [...]}.
+
+    commit() публикует запись, abort() выбрасывает недописанную.
+    """
+
+    def __init__(self, filename, key, path=None):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.path = path or _cache_path(filename)
+        self.count = 0
+        self._f = open(f"{self.path}.tmp", "w", encoding="utf-8")
+        head = json.dumps({"key": key, "file": filename}, ensure_ascii=False)
+        self._f.write(head[:-1] + ', "units": [\n')
+
+    def write(self, unit):
+        t = PROFILER.clock()
+        self._f.write((",\n" if self.count else "") + json.dumps(as_dict(unit), ensure_ascii=False))
+        self.count += 1
+        PROFILER.lap("cache", t)
+
+    def commit(self):
+        self._f.write("\n]}")
+        self._f.close()
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def abort(self):
+        if not self._f.closed:
+            self._f.close()
+        os.remove(f"{self.path}.tmp")
+
+def tee_to_cache(units, entry):
+    """Пропускает объекты дальше, попутно дописывая их в запись кэша"""
+    for unit in units:
+        # Словарь собирается один раз — и для кэша, и для UnitWriter
+        unit = as_dict(unit)
+        entry.write(unit)
+        yield unit
+
+# ─────────────────────────────────────────────────────────────
+# ПАРАЛЛЕЛЬНАЯ КОНВЕРТАЦИЯ
+# ─────────────────────────────────────────────────────────────
+
+def convert_job(filepath, dev_map, filename, key, capture=False, profile=False, sample=None):
+    """Конвертирует файл прямо в запись кэша и перехватывает ошибку.
+
+    Объекты не возвращаются через pickle: воркер пишет их потоком в кэш,
+    а главный процесс читает оттуда же в порядке файлов. Возвращает
+    (число объектов, лог, текст_ошибки, traceback, счётчики кэша normalize,
+    профиль книги или None). С capture=True вывод собирается в строку,
+    чтобы логи воркеров не перемешивались. sample — путь для семплов
+    profiling.Sampler (без расширения).
+    """
+    global PROFILER
+    PROFILER = profiling.Profiler() if profile else profiling.NULL
+    out = io.StringIO() if capture else sys.stdout
+    # Воркер переиспользуется для нескольких файлов — отдаём только прирост
+    before = normalize.cache_stats()
+    with contextlib.redirect_stdout(out), PROFILER.workbook(filename), \
+            (profiling.sampled(sample) if sample else contextlib.nullcontext()):
+        entry = None
+        try:
+            entry = CacheWriter(filename, key)
+            for unit in iter_units(filepath, dev_map):
+                entry.write(unit)
+            count, error, tb = entry.count, None, None
+            # Пустой результат не кэшируем — это ошибка файла
+            entry.commit() if count else entry.abort()
+        except Exception as e:
+            if entry is not None:
+                entry.abort()
+            count, error, tb = 0, str(e), traceback.format_exc()
+    log = out.getvalue() if capture else ""
+    norm_stats = {
+        name: {k: v - before[name][k] for k, v in counts.items()}
+        for name, counts in normalize.cache_stats().items()
+    }
+    record = PROFILER.workbooks.get(filename) if profile else None
+    return count, log, error, tb, norm_stats, record
+
+def convert_sheet_job(filepath, dev_map, filename, sheet_index, capture=False, profile=False):
+    """Конвертирует один лист книги в часть записи кэша: строки [ключ строки, объект].
+
+    id на повторы не проверяются — это делает merge_sheets, сливая листы
+    по порядку, поэтому id те же, что при конвертации книги целиком.
+    Возвращает (объектов, пропущено пустых, лог, текст_ошибки, traceback,
+    счётчики кэша normalize, профиль листа или None).
+    """
+    global PROFILER
+    PROFILER = profiling.Profiler() if profile else profiling.NULL
+    out = io.StringIO() if capture else sys.stdout
+    before = normalize.cache_stats()
+    count = skipped = 0
+    with contextlib.redirect_stdout(out), PROFILER.workbook(filename):
+        entry = None
+        error = tb = None
+        try:
+            entry = CacheWriter(filename, None, path=_sheet_part_path(filename, sheet_index))
+            t = PROFILER.clock()
+            with open_sheets(filepath) as all_sheets:
+                PROFILER.lap("open", t)
+                title, rows = all_sheets[sheet_index]
+                pairs = sheet_units(rows, dev_map, sheet_index, title, multi=True)
+                while True:
+                    try:
+                        key, unit = next(pairs)
+                    except StopIteration as done:
+                        count, skipped = done.value
+                        break
+                    entry.write([key, unit.to_dict()])
+            entry.commit()
+        except Exception as e:
+            if entry is not None:
+                entry.abort()
+            error, tb = str(e), traceback.format_exc()
+    log = out.getvalue() if capture else ""
+    norm_stats = {
+        name: {k: v - before[name][k] for k, v in counts.items()}
+        for name, counts in normalize.cache_stats().items()
+    }
+    record = PROFILER.workbooks.get(filename) if profile else None
+    return count, skipped, log, error, tb, norm_stats, record
+
+def merge_sheets(filename, sheets):
+    """Объекты листов из convert_sheet_job — по порядку листов, с id как у iter_units"""
+    seen_ids = set()
+    try:
+        for i in range(sheets):
+            for key, unit in UnitStream(_sheet_part_path(filename, i)):
+                unit["id"] = dedup_id(unit["id"], key, seen_ids)
+                yield unit
+    finally:
+        discard_sheets(filename, sheets)
+
+def discard_sheets(filename, sheets):
+    for i in range(sheets):
+        with contextlib.suppress(OSError):
+            os.remove(_sheet_part_path(filename, i))
+
+def sample_path(profile_path, filename):
+    """Путь семплов книги рядом с отчётом: convert-….json → convert-…-{книга}"""
+    stem = re.sub(r'[^\w.-]+', '_', os.path.splitext(filename)[0])
+    return f"{os.path.splitext(profile_path)[0]}-{stem}"
+
+# ─────────────────────────────────────────────────────────────
+# РЕЖИМ НАБЛЮДЕНИЯ (--watch)
+# Папка опрашивается раз в --interval секунд. Новый или изменённый файл
+# конвертируется, когда его размер и время изменения не менялись
+# --debounce секунд и Excel его не держит открытым (нет ~$-файла).
+# Неизменённые объекты берутся из кэша, stats.json пересчитывается
+# generate_stats с кэшем агрегатов — заново читаются только новые JSON.
+# ─────────────────────────────────────────────────────────────
+
+def list_sources():
+    """Имена файлов-источников в SOURCE_DIR и все имена папки (для ~$-файлов)"""
+    names = set(os.listdir(SOURCE_DIR))
+    sources = sorted(
+        f for f in names
+        if f.lower().endswith(SOURCE_EXTENSIONS) and not f.startswith("~")
+    )
+    return sources, names
+
+def file_snapshot(filename):
+    """(размер, mtime) файла или None, если он пропал"""
+    try:
+        st = os.stat(os.path.join(SOURCE_DIR, filename))
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+def is_locked(filename, names):
+    """Excel держит файл открытым: рядом лежит ~$имя (у длинных имён — без 2 первых символов)"""
+    return f"~${filename}" in names or f"~${filename[2:]}" in names
+
+def refresh_stats():
+    """Пересчитывает data/meta/stats.json и facets.json (с кэшем агрегатов)"""
+    if STATS_SCRIPT_DIR not in sys.path:
+        sys.path.insert(0, STATS_SCRIPT_DIR)
+    import generate_stats
+
+    generate_stats.DEVELOPERS_DIR = os.path.abspath(OUTPUT_DIR)
+    started = time.perf_counter()
+    generate_stats.main([])
+    print(f"📊 Статистика пересчитана за {time.perf_counter() - started:.1f} с\n")
+
+def watch(args, workers=1, profile_path=None):
+    """Следит за SOURCE_DIR и конвертирует новые и изменённые файлы до Ctrl+C"""
+    print(f"\n👀 Слежу за {SOURCE_DIR}")
+    print(f"   опрос раз в {args.interval:g} с, файл должен не меняться {args.debounce:g} с")
+    print(f"   Ctrl+C — выход\n")
+
+    done = {}       # файл → снимок, с которым он уже сконвертирован
+    pending = {}    # файл → (снимок, когда он появился)
+    first = True
+
+    try:
+        while True:
+            sources, names = list_sources()
+            now = time.monotonic()
+            ready = []
+            for filename in sources:
+                snap = file_snapshot(filename)
+                if snap is None or done.get(filename) == snap:
+                    pending.pop(filename, None)
+                    continue
+                if is_locked(filename, names):
+                    # Excel ещё пишет/держит файл — ждём, пока закроют
+                    pending.pop(filename, None)
+                    continue
+                seen = pending.get(filename)
+                if seen is None or seen[0] != snap:
+                    pending[filename] = (snap, now)
+                    # При запуске файлы уже лежат — ждать незачем
+                    if not first:
+                        continue
+                elif now - seen[1] < args.debounce:
+                    continue
+                ready.append(filename)
+
+            for filename in sorted(set(done) - set(sources)):
+                print(f"🗑️  Файл удалён: {filename} (его JSON остаются на месте)\n")
+                del done[filename]
+
+            if ready:
+                print(f"🔄 {'Найдено' if first else 'Изменились'}: {', '.join(ready)}\n")
+                success, errors = convert_sources(ready, args, workers, profile_path)
+                for filename in ready:
+                    done[filename] = pending.pop(filename)[0]
+                print(f"Готово: ✅ {success} файлов  |  ❌ {errors} ошибок\n")
+                if success and not args.no_stats:
+                    try:
+                        refresh_stats()
+                    except Exception as e:
+                        print(f"❌ Ошибка пересчёта статистики: {e}\n")
+                        traceback.print_exc()
+            first = False
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\n👋 Наблюдение остановлено")
+        if profile_path:
+            PROFILER.write(profile_path)
+            print(f"📈 Профиль: {profile_path}")
+
 # ─────────────────────────────────────────────────────────────
 # ГЛАВНАЯ ФУНКЦИЯ
 # ─────────────────────────────────────────────────────────────
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="PSNHUB — Конвертер Excel → JSON")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=1,
+        help="сколько файлов конвертировать параллельно (0 = по числу ядер, по умолчанию 1)",
+    )
+    parser.add_argument(
+        "--format", choices=["json", "columnar", "both"], default="json",
+        help="формат выходных файлов: json (по умолчанию), columnar (.col.json) или оба; "
+             "сайт читает .json (index.json files), .col.json — files_columnar",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="не брать объекты из кэша — перечитать все файлы (кэш при этом обновится)",
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const="", metavar="ОТЧЁТ",
+        help="записать JSON профиль: время по этапам и счётчики "
+             "(по умолчанию tools/.cache/profile/convert-<время>.json)",
+    )
+    parser.add_argument(
+        "--sample", action="store_true",
+        help="вместе с --profile: семплирующий профайлер для каждой конвертируемой книги",
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="не выходить: следить за папкой и конвертировать новые и изменённые файлы",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=2.0,
+        help="--watch: как часто опрашивать папку, секунд (по умолчанию 2)",
+    )
+    parser.add_argument(
+        "--debounce", type=float, default=3.0,
+        help="--watch: сколько секунд файл не должен меняться перед конвертацией (по умолчанию 3)",
+    )
+    parser.add_argument(
+        "--no-stats", action="store_true",
+        help="--watch: не пересчитывать stats.json после конвертации",
+    )
+    return parser.parse_args(argv)
+
+def convert_sources(xlsx_files, args, workers=1, profile_path=None):
+    """Конвертирует файлы из SOURCE_DIR по порядку; возвращает (успешно, ошибок)"""
+    # Сверяемся с кэшем: неизменённые файлы не конвертируем вовсе
+    keys = {}
+    cached = set()
+    for filename in xlsx_files:
+        dev_map = find_map(filename)
+        if not dev_map:
+            continue
+        try:
+            keys[filename] = cache_key(os.path.join(SOURCE_DIR, filename), dev_map)
+        except OSError:
+            continue
+        if not args.no_cache and cache_hit(filename, keys[filename]):
+            cached.add(filename)
+    to_convert = [f for f in xlsx_files if find_map(f) and f not in cached]
+
+    # Книга с несколькими листами, из которых хоть один большой, в
+    # параллельном режиме раздаётся по листу на воркер
+    split = {}
+    if workers > 1:
+        for filename in to_convert:
+            try:
+                sizes = sheet_sizes(os.path.join(SOURCE_DIR, filename))
+            except Exception:
+                continue    # битый файл — ошибку покажет обычная конвертация
+            if len(sizes) > 1 and any((rows or 0) >= SHEET_SPLIT_ROWS for _, rows in sizes):
+                split[filename] = len(sizes)
+    jobs = sum(split.get(f, 1) for f in to_convert)
+
+    # В параллельном режиме сразу раздаём все файлы (листы) воркерам,
+    # а результаты разбираем ниже в исходном порядке
+    pool = None
+    futures = {}
+    if workers > 1 and jobs > 1:
+        workers = min(workers, jobs)
+        pool = ProcessPoolExecutor(max_workers=workers)
+        print(f"⚙️  Параллельный режим, процессов: {workers}\n")
+        for filename in to_convert:
+            filepath = os.path.join(SOURCE_DIR, filename)
+            if filename in split:
+                futures[filename] = [
+                    pool.submit(convert_sheet_job, filepath, find_map(filename), filename, i,
+                                True, PROFILER.enabled)
+                    for i in range(split[filename])
+                ]
+                continue
+            futures[filename] = pool.submit(
+                convert_job, filepath, find_map(filename), filename, keys.get(filename), True,
+                PROFILER.enabled, sample_path(profile_path, filename) if args.sample else None,
+            )
+
+    success = 0
+    errors  = 0
+
+    try:
+        for filename in xlsx_files:
+            filepath = os.path.join(SOURCE_DIR, filename)
+            print(f"📄 Обрабатываю: {filename}")
+
+            dev_map = find_map(filename)
+            if not dev_map:
+                print(f"  ❌ Не найден маппинг для этого файла.")
+                print(f"     Добавь застройщика в DEVELOPER_MAPS в скрипте.")
+                print(f"     Ключ должен быть подстрокой имени файла (нижний регистр).")
+                errors += 1
+                print()
+                continue
+
+            # Семплы — только для книг, которые конвертируются здесь же
+            sampler = contextlib.nullcontext()
+            if args.sample and filename not in cached and filename not in futures:
+                sampler = profiling.sampled(sample_path(profile_path, filename))
+
+            with PROFILER.workbook(filename), sampler:
+                # Конвейер: строки листа → объекты → продажа/аренда → JSON файлы.
+                # Объекты идут по одному; весь каталог в памяти не собирается.
+                entry = None
+                try:
+                    if filename in cached:
+                        print(f"  ♻️  Файл не менялся — объекты из кэша")
+                        PROFILER.count("cache_hits")
+                        units = PROFILER.iterate("cache_read", cache_units(filename))
+                    elif filename in split:
+                        results = [f.result() for f in futures[filename]]
+                        failed = None
+                        for _, _, log, error, tb, norm_stats, record in results:
+                            sys.stdout.write(log)
+                            normalize.merge_cache_stats(norm_stats)
+                            if record is not None:
+                                PROFILER.merge(filename, record)
+                            if error is not None and failed is None:
+                                failed = (error, tb)
+                        if failed is not None:
+                            discard_sheets(filename, len(results))
+                            print(f"  ❌ Ошибка: {failed[0]}")
+                            sys.stderr.write(failed[1])
+                            errors += 1
+                            print()
+                            continue
+                        print(f"  ✅ Конвертировано: {sum(r[0] for r in results)} объектов "
+                              f"(пропущено пустых: {sum(r[1] for r in results)})")
+                        entry = CacheWriter(filename, keys.get(filename))
+                        units = tee_to_cache(merge_sheets(filename, len(results)), entry)
+                    elif filename in futures:
+                        count, log, error, tb, norm_stats, record = futures[filename].result()
+                        sys.stdout.write(log)
+                        normalize.merge_cache_stats(norm_stats)
+                        if record is not None:
+                            PROFILER.merge(filename, record)
+                        if error is not None:
+                            print(f"  ❌ Ошибка: {error}")
+                            sys.stderr.write(tb)
+                            errors += 1
+                            print()
+                            continue
+                        units = PROFILER.iterate("cache_read", cache_units(filename) if count else ())
+                    else:
+                        entry = CacheWriter(filename, keys.get(filename))
+                        units = tee_to_cache(iter_units(filepath, dev_map), entry)
+
+                    count = save_units(units, dev_map, args.format)
+
+                    if entry is not None:
+                        # Пустой результат не кэшируем — это ошибка файла
+                        entry.commit() if count else entry.abort()
+                        entry = None
+
+                    if not count:
+                        print(f"  ⚠️  Объектов не найдено — проверь файл.")
+                        errors += 1
+                        print()
+                        continue
+
+                    success += 1
+
+                except Exception as e:
+                    if entry is not None:
+                        entry.abort()
+                    print(f"  ❌ Ошибка: {e}")
+                    traceback.print_exc()
+                    errors += 1
+
+            print()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    return success, errors
+
+def main(argv=None):
+    global PROFILER
+    args = parse_args(argv)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    profile_path = None
+    if args.profile is not None or args.sample:
+        PROFILER = profiling.Profiler()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        profile_path = args.profile or os.path.join(PROFILE_DIR, f"convert-{stamp}.json")
+
     print("=" * 55)
     print("PSNHUB — Конвертер Excel → JSON")
     print("=" * 55)
@@ -421,70 +1095,40 @@ def main():
     if not os.path.exists(SOURCE_DIR):
         os.makedirs(SOURCE_DIR)
         print(f"\n📁 Создана папка: {SOURCE_DIR}")
-        print(f"   Положи Excel файлы туда и запусти снова.\n")
+        if not args.watch:
+            print(f"   Положи Excel файлы туда и запусти снова.\n")
+            return
+
+    if args.watch:
+        watch(args, workers, profile_path)
         return
 
-    # Ищем все Excel файлы
+    # Ищем все Excel / CSV файлы
     xlsx_files = [
         f for f in os.listdir(SOURCE_DIR)
-        if f.lower().endswith(".xlsx") and not f.startswith("~")
+        if f.lower().endswith(SOURCE_EXTENSIONS) and not f.startswith("~")
     ]
 
     if not xlsx_files:
         print(f"\n⚠️  Excel файлы не найдены в: {SOURCE_DIR}")
-        print(f"   Положи .xlsx файлы в эту папку и запусти снова.\n")
+        print(f"   Положи .xlsx (или .csv / .tsv) файлы в эту папку и запусти снова.\n")
         return
 
     print(f"\nНайдено файлов: {len(xlsx_files)}\n")
 
-    success = 0
-    errors  = 0
-
-    for filename in xlsx_files:
-        filepath = os.path.join(SOURCE_DIR, filename)
-        print(f"📄 Обрабатываю: {filename}")
-
-        dev_map = find_map(filename)
-        if not dev_map:
-            print(f"  ❌ Не найден маппинг для этого файла.")
-            print(f"     Добавь застройщика в DEVELOPER_MAPS в скрипте.")
-            print(f"     Ключ должен быть подстрокой имени файла (нижний регистр).")
-            errors += 1
-            print()
-            continue
-
-        try:
-            units = convert_file(filepath, dev_map)
-            if not units:
-                print(f"  ⚠️  Объектов не найдено — проверь файл.")
-                errors += 1
-                print()
-                continue
-
-            # Разделяем продажу и аренду если в одном файле
-            sale_units = [u for u in units if u["deal"] == "sale"]
-            rent_units = [u for u in units if u["deal"] == "rent"]
-
-            if sale_units:
-                save_json(sale_units, dev_map["slug"], "sale", OUTPUT_DIR)
-            if rent_units:
-                save_json(rent_units, dev_map["slug"], "rent", OUTPUT_DIR)
-            if not sale_units and not rent_units:
-                save_json(units, dev_map["slug"], dev_map["deal"], OUTPUT_DIR)
-
-            success += 1
-
-        except Exception as e:
-            print(f"  ❌ Ошибка: {e}")
-            import traceback
-            traceback.print_exc()
-            errors += 1
-
-        print()
+    success, errors = convert_sources(xlsx_files, args, workers, profile_path)
 
     print("=" * 55)
     print(f"Готово: ✅ {success} файлов  |  ❌ {errors} ошибок")
     print(f"JSON файлы в: {OUTPUT_DIR}")
+    hit_rate = normalize.format_cache_stats()
+    if hit_rate:
+        print(f"Кэш нормализации: {hit_rate}")
+    if profile_path:
+        report = PROFILER.report()
+        PROFILER.write(profile_path)
+        print(f"📈 Профиль: {profile_path}")
+        print(f"   {profiling.format_stages(report['total'])}")
     print("=" * 55)
     print("\nСледующий шаг:")
     print("  cd C:\\Users\\user\\Radar")
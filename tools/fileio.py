@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — запись файлов только при изменении содержимого
+=======================================================
+Каждая перезапись data/ — это новый коммит, запуск update-stats.yml и
+сброс кэшей CDN/браузера. Поэтому генераторы пишут файл только если
+изменилось содержимое, а не дата генерации:
+
+    content_hash(units, meta)  — канонический хэш объектов (порядок ключей
+                                  и форматирование не важны, "updated" не входит)
+    write_if_changed(path, text)      — атомарная запись, если байты другие
+    write_json_if_changed(path, doc)  — то же для JSON, игнорируя "generated"
+    file_digest(path)                 — (sha256, размер) для index.json
+"""
+
+import hashlib
+import json
+import os
+
+# Ключи файла застройщика, которые входят в хэш содержимого ("updated" — нет)
+CONTENT_META_KEYS = ("developer", "slug", "deal")
+
+# Ключи, которые меняются при каждом запуске и не считаются изменением
+VOLATILE_KEYS = ("generated",)
+
+
+def _canonical(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+class ContentHasher:
+    """Инкрементальный канонический хэш — объекты можно подавать по одному"""
+
+    def __init__(self, meta=None):
+        self._h = hashlib.sha256()
+        meta = meta or {}
+        self._h.update(_canonical({k: meta.get(k) for k in CONTENT_META_KEYS}).encode("utf-8"))
+        self._h.update(b"\n")
+
+    def update(self, unit):
+        self._h.update(_canonical(unit).encode("utf-8"))
+        self._h.update(b"\n")
+
+    def hexdigest(self):
+        return self._h.hexdigest()
+
+
+def content_hash(units, meta=None):
+    hasher = ContentHasher(meta)
+    for unit in units:
+        hasher.update(unit)
+    return hasher.hexdigest()
+
+
+def file_content_hash(path):
+    """content_hash существующего файла застройщика (.json или .col.json).
+
+    Файл читается потоком; None — файла нет или он не читается.
+    """
+    # Импорт здесь: jsonstream/columnar нужны только этой функции
+    from columnar import ColumnarFile, is_columnar_path
+    from jsonstream import UnitStream
+
+    if not os.path.exists(path):
+        return None
+    stream = ColumnarFile(path) if is_columnar_path(path) else UnitStream(path)
+    try:
+        units = iter(stream)
+        first = next(units, None)
+        # meta до "units" уже прочитана — хэшер можно создать после первого объекта
+        hasher = ContentHasher(stream.meta)
+        if first is not None:
+            hasher.update(first)
+        for unit in units:
+            hasher.update(unit)
+    except (OSError, ValueError):
+        return None
+    if any(k not in stream.meta for k in CONTENT_META_KEYS):
+        # ключи шли после "units" — хэш посчитан с пустой meta, не сравниваем
+        return None
+    return hasher.hexdigest()
+
+
+def file_digest(path):
+    """(sha256 байтов файла, размер) или (None, None), если файла нет"""
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+                size += len(chunk)
+    except OSError:
+        return None, None
+    return h.hexdigest(), size
+
+
+def atomic_write(path, text):
+    """Пишет во временный файл рядом и подменяет — читатель не увидит половину"""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_if_changed(path, text):
+    """Атомарно записывает text, если содержимое файла другое. True — записан"""
+    data = text.encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    atomic_write(path, text)
+    return True
+
+
+def write_json_if_changed(path, doc, volatile=VOLATILE_KEYS, indent=2, newline=False):
+    """JSON-вариант write_if_changed: ключи volatile верхнего уровня
+    (дата генерации) не считаются изменением — если отличаются только они,
+    файл остаётся как был. True — записан.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            old = json.load(f)
+    except (OSError, ValueError):
+        old = None
+    if isinstance(old, dict) and isinstance(doc, dict):
+        strip = lambda d: {k: v for k, v in d.items() if k not in volatile}
+        if strip(old) == strip(doc):
+            return False
+    if indent:
+        text = json.dumps(doc, ensure_ascii=False, indent=indent)
+    else:
+        text = json.dumps(doc, ensure_ascii=False, separators=(",", ":"))
+    atomic_write(path, text + "\n" if newline else text)
+    return True
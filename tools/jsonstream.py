@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — потоковое чтение JSON файлов застройщиков
+===================================================
+Файл застройщика — это объект верхнего уровня с массивом "units".
+UnitStream читает его кусками и отдаёт объекты из "units" по одному,
+не собирая весь документ в памяти: пик памяти определяется самым
+большим объектом, а не размером файла.
+
+Остальные ключи верхнего уровня ("developer", "deal", "updated", ...)
+складываются в stream.meta по мере чтения. save_json пишет их до
+"units", но порядок не важен — после полного прохода meta заполнена.
+
+Только стандартная библиотека: скрипт запускается в GitHub Actions
+без установки зависимостей.
+
+    stream = UnitStream(path)
+    for unit in stream:
+        ...
+    stream.meta["deal"]
+"""
+
+import json
+
+_WS = " \t\n\r"
+_DECODER = json.JSONDecoder()
+
+CHUNK_SIZE = 1 << 16
+
+
+class UnitStream:
+    """Итератор по элементам массива array_key в объекте верхнего уровня"""
+
+    def __init__(self, path, array_key="units", chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.array_key = array_key
+        self.chunk_size = chunk_size
+        self.meta = {}
+        self.keys = []      # все ключи верхнего уровня в порядке файла
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._f = None
+
+    # ── буфер ────────────────────────────────────────────────
+
+    def _fill(self, size=None):
+        """Дочитывает кусок файла; False, если файл закончился"""
+        if self._eof:
+            return False
+        chunk = self._f.read(size or self.chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        if self._pos > len(self._buf) // 2:
+            # Отбрасываем уже разобранное начало буфера
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        self._buf += chunk
+        return True
+
+    def _peek(self):
+        """Следующий значимый символ (пробелы пропускаются) или '' в конце"""
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars):
+        ch = self._peek()
+        if ch == "" or ch not in chars:
+            raise ValueError(
+                f"{self.path}: ожидалось {' или '.join(repr(c) for c in chars)}, "
+                f"получено {ch!r}"
+            )
+        self._pos += 1
+        return ch
+
+    def _value(self):
+        """Разбирает одно JSON значение с текущей позиции"""
+        self._peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(size):
+                    raise
+                size *= 2   # длинное значение: читаем всё более крупными кусками
+                continue
+            # Число на границе буфера могло оборваться ("12" из "123")
+            if end == len(self._buf) and not self._eof and self._fill(size):
+                continue
+            self._pos = end
+            return value
+
+    # ── разбор документа ─────────────────────────────────────
+
+    def __iter__(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            self._f = f
+            try:
+                yield from self._document()
+                if self._peek() != "":
+                    raise ValueError(f"{self.path}: лишние данные после JSON объекта")
+            finally:
+                self._f = None
+
+    def _document(self):
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise ValueError(f"{self.path}: ключ должен быть строкой")
+            self._expect(":")
+            self.keys.append(key)
+            if key == self.array_key and self._peek() == "[":
+                yield from self._array()
+            else:
+                self.meta[key] = self._value()
+            if self._expect(",}") == "}":
+                return
+
+    def _array(self):
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(",]") == "]":
+                return
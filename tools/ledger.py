@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — журнал объектов: когда появился, когда менялась цена, когда ушёл
+=========================================================================
+Дата файла (mtime) в CI — время checkout, поэтому по ней «новое» всё.
+Журнал ведётся по id объекта и обновляется каждым запуском
+generate_stats.py по сравнению с прошлым состоянием:
+
+    data/meta/ledger.jsonl       события, только дописываются:
+        {"date": "2026-10-18", "id": "pik-1", "event": "added", "price": 12500000}
+        {"date": "2026-10-20", "id": "pik-1", "event": "price", "price": 11900000, "old": 12500000}
+        {"date": "2026-11-02", "id": "pik-1", "event": "removed"}
+        {"date": "2026-11-09", "id": "pik-1", "event": "returned", "price": 11900000}
+    data/meta/ledger_state.json  текущее состояние — по нему и отвечают
+                                 запросы, историю перечитывать не нужно:
+        {"started": "2026-10-18", "generated": ...,
+         "units": {"pik-1": [first_seen, price, changed, old_price, removed]}}
+
+changed — дата последнего изменения цены или статуса, old_price — цена
+до последнего изменения цены (None — не менялась), removed — дата
+ухода (None — объект в каталоге). Объектам, которые были уже в первом
+запуске, first_seen и changed берутся из даты их файла ("updated" или
+дата изменения, см. generate_stats.py) — иначе первый запуск обнулил бы
+«новые за 7 дней»; без даты first_seen = None, и новым объект не считается.
+
+Ушедшие объекты хранятся в состоянии REMOVED_RETENTION_DAYS дней, потом
+забываются (в ledger.jsonl история остаётся): вернувшийся после этого
+объект журнал считает новым.
+
+    python ledger.py new --days 7          # новые за неделю
+    python ledger.py dropped --days 30     # подешевели за месяц
+    python ledger.py removed --days 7      # ушли за неделю
+"""
+
+import argparse
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import fileio
+
+# Поля записи в state["units"][id]
+FIRST_SEEN, PRICE, CHANGED, OLD_PRICE, REMOVED = range(5)
+
+# Сколько дней помнить ушедший объект
+REMOVED_RETENTION_DAYS = 90
+
+
+def today():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def days_ago(days, until=None):
+    """'YYYY-MM-DD' за days дней до until (по умолчанию — сегодня)"""
+    end = date.fromisoformat(until or today())
+    return (end - timedelta(days=days)).isoformat()
+
+
+class Ledger:
+    def __init__(self, state=None):
+        state = state or {}
+        self.started = state.get("started")
+        self.units = state.get("units", {})
+        self.pruned = 0     # забыто ушедших в последнем update()
+
+    @classmethod
+    def load(cls, state_path):
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                return cls(json.load(f))
+        except (OSError, ValueError):
+            return cls()
+
+    def update(self, current, on=None, seen=None, retention=REMOVED_RETENTION_DAYS):
+        """Сверяет {id: цена} текущего каталога с состоянием; возвращает события.
+
+        seen — {id: 'YYYY-MM-DD'}: с какой даты объект был в каталоге;
+        нужна только первому запуску (объекты без даты — first_seen None).
+        Ушедшие раньше чем retention дней назад удаляются из состояния.
+        """
+        on = on or today()
+        first_run = self.started is None
+        if first_run:
+            self.started = on
+        events = []
+        for uid, price in current.items():
+            rec = self.units.get(uid)
+            if rec is None:
+                if not first_run:
+                    first_seen = on
+                elif seen and seen.get(uid):
+                    first_seen = min(seen[uid], on)
+                else:
+                    first_seen = None
+                self.units[uid] = [first_seen, price, first_seen or on, None, None]
+                events.append({"date": first_seen or on, "id": uid, "event": "added", "price": price})
+                continue
+            if rec[REMOVED] is not None:
+                rec[REMOVED] = None
+                rec[CHANGED] = on
+                events.append({"date": on, "id": uid, "event": "returned", "price": price})
+            if rec[PRICE] != price:
+                events.append({"date": on, "id": uid, "event": "price", "price": price, "old": rec[PRICE]})
+                rec[OLD_PRICE], rec[PRICE], rec[CHANGED] = rec[PRICE], price, on
+        for uid, rec in self.units.items():
+            if rec[REMOVED] is None and uid not in current:
+                rec[REMOVED] = rec[CHANGED] = on
+                events.append({"date": on, "id": uid, "event": "removed"})
+        self.pruned = self.prune(days_ago(retention, on))
+        return events
+
+    def prune(self, before):
+        """Забывает объекты, ушедшие раньше before; возвращает сколько"""
+        old = [uid for uid, rec in self.units.items() if rec[REMOVED] and rec[REMOVED] < before]
+        for uid in old:
+            del self.units[uid]
+        return len(old)
+
+    def to_json(self, generated):
+        return {
+            "version": "1.0",
+            "description": "Автогенерируется generate_stats.py (tools/ledger.py). Не редактировать вручную.",
+            "generated": generated,
+            "started": self.started,
+            "fields": ["first_seen", "price", "changed", "old_price", "removed"],
+            "units": dict(sorted(self.units.items())),
+        }
+
+    def save(self, state_path, log_path, events, generated):
+        """Дописывает события в журнал и перезаписывает состояние; True — что-то изменилось"""
+        if not events and not self.pruned and os.path.exists(state_path):
+            # Без событий состояние то же — не перечитываем его ради сравнения
+            return False
+        if events:
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+            with open(log_path, "a", encoding="utf-8") as f:
+                for event in events:
+                    f.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+        written = fileio.write_json_if_changed(state_path, self.to_json(generated), indent=None)
+        return bool(events) or written
+
+    # ── запросы ─────────────────────────────────────────────
+
+    def is_new(self, uid, since):
+        """Появился не раньше since (дата появления известна) и ещё в каталоге"""
+        rec = self.units.get(uid)
+        return (rec is not None and rec[REMOVED] is None
+                and rec[FIRST_SEEN] is not None and rec[FIRST_SEEN] >= since)
+
+    def new_since(self, since):
+        return [uid for uid in self.units if self.is_new(uid, since)]
+
+    def dropped_since(self, since):
+        """Подешевевшие: последнее изменение цены — снижение, не раньше since"""
+        return [
+            uid for uid, rec in self.units.items()
+            if rec[REMOVED] is None and rec[OLD_PRICE] and rec[PRICE]
+            and rec[PRICE] < rec[OLD_PRICE] and rec[CHANGED] >= since
+        ]
+
+    def removed_since(self, since):
+        return [uid for uid, rec in self.units.items() if rec[REMOVED] and rec[REMOVED] >= since]
+
+    def last_change(self, uid):
+        """Дата последнего события объекта или None"""
+        rec = self.units.get(uid)
+        return rec[CHANGED] if rec else None
+
+
+def main(argv=None):
+    from catalog import META_DIR
+
+    parser = argparse.ArgumentParser(description="PSNHUB — запросы к журналу объектов")
+    parser.add_argument("query", choices=["new", "dropped", "removed"])
+    parser.add_argument("--days", type=int, default=7, help="за сколько дней (по умолчанию 7)")
+    parser.add_argument("--state", default=os.path.join(META_DIR, "ledger_state.json"))
+    args = parser.parse_args(argv)
+
+    ledger = Ledger.load(args.state)
+    since = days_ago(args.days)
+    ids = {"new": ledger.new_since, "dropped": ledger.dropped_since,
+           "removed": ledger.removed_since}[args.query](since)
+    print(f"📒 {args.query} с {since}: {len(ids)} (журнал ведётся с {ledger.started or '—'})")
+    for uid in sorted(ids):
+        rec = ledger.units[uid]
+        extra = f"{rec[OLD_PRICE]} → {rec[PRICE]}" if args.query == "dropped" else rec[CHANGED]
+        print(f"   • {uid}: {extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — проверка ссылок url_developer / url_3d
+===============================================
+Собирает ссылки из всех файлов застройщиков (url_3d — только если
+has_3d) и проверяет их асинхронно:
+
+    • соединения переиспользуются (keep-alive, пул на хост);
+    • на один хост — не больше --per-host запросов одновременно,
+      всего — не больше --concurrency;
+    • сначала HEAD; если сервер его не понимает (405, 501, ...) или
+      рвёт соединение — GET;
+    • редиректы — до MAX_REDIRECTS, итоговый адрес пишется в отчёт.
+
+Результаты кэшируются в tools\\.cache\\links\\cache.json: рабочая ссылка
+не перепроверяется --ttl-days дней, битая — сутки. Отчёт по файлам
+застройщиков (какие объекты с битыми ссылками) — в -o.
+
+Только стандартная библиотека: http/https через asyncio.open_connection.
+
+Использование:
+    python link_checker.py                         # data/developers
+    python link_checker.py --per-host 2 --timeout 30
+    python link_checker.py --force                 # без кэша
+    python link_checker.py --developers путь -o report.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import ssl
+import time
+from urllib.parse import quote, urljoin, urlsplit
+
+import fileio
+from catalog import BASE_DIR, DEVELOPERS_DIR, TOOLS_DIR, developer_files, open_units
+
+LINKS_DIR = os.path.join(TOOLS_DIR, ".cache", "links")
+CACHE_FILE = os.path.join(LINKS_DIR, "cache.json")
+REPORT_FILE = os.path.join(LINKS_DIR, "report.json")
+
+CACHE_VERSION = 1
+
+PER_HOST = 4
+CONCURRENCY = 64
+TIMEOUT = 15
+TTL_DAYS = 7
+TTL_BROKEN = 24 * 60 * 60
+MAX_REDIRECTS = 5
+
+# Сколько простаивающих соединений держать на хост
+IDLE_PER_HOST = 4
+
+# Тело ответа GET больше этого не дочитывается — соединение закрывается
+MAX_BODY = 1 << 20
+
+# Ответы на HEAD, после которых стоит повторить GET
+HEAD_FALLBACK = {400, 403, 404, 405, 406, 429, 500, 501, 503}
+
+# Сайт жив, но ботов не пускает — ссылку битой не считаем
+ALIVE_STATUSES = {401, 403, 429}
+
+USER_AGENT = "Mozilla/5.0 (compatible; PSNHUB-link-checker/1.0)"
+
+# Символы, которые в пути и запросе остаются как есть (кириллица — в %XX)
+URL_SAFE = "/%:@!$&'()*+,;=-._~?"
+
+# Ошибки сети / протокола: ссылка не открылась
+NETWORK_ERRORS = (OSError, ConnectionError, asyncio.TimeoutError,
+                  asyncio.IncompleteReadError, ValueError)
+
+# ─────────────────────────────────────────────────────────────
+# ССЫЛКИ ИЗ КАТАЛОГА
+# ─────────────────────────────────────────────────────────────
+
+def unit_links(unit):
+    """[(поле, url)] объекта: url_developer и url_3d при has_3d"""
+    links = []
+    if unit.get("url_developer"):
+        links.append(("url_developer", str(unit["url_developer"]).strip()))
+    if unit.get("has_3d") and unit.get("url_3d"):
+        links.append(("url_3d", str(unit["url_3d"]).strip()))
+    return links
+
+
+def collect_links(files):
+    """{url: [(файл, id объекта, поле)]} по файлам застройщиков"""
+    links = {}
+    for filepath in files:
+        rel = os.path.relpath(filepath, BASE_DIR).replace(os.sep, "/")
+        try:
+            for unit in open_units(filepath):
+                for field, url in unit_links(unit):
+                    links.setdefault(url, []).append((rel, unit.get("id", ""), field))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ошибка чтения {filepath}: {e}")
+    return links
+
+# ─────────────────────────────────────────────────────────────
+# HTTP КЛИЕНТ С ПУЛОМ СОЕДИНЕНИЙ
+# ─────────────────────────────────────────────────────────────
+
+class BadUrl(ValueError):
+    """Ссылка не http(s) — проверять нечего"""
+
+
+class Pool:
+    """Соединения keep-alive по (схема, хост, порт) и лимиты параллельности"""
+
+    def __init__(self, per_host=PER_HOST, concurrency=CONCURRENCY, timeout=TIMEOUT):
+        self.per_host = per_host
+        self.timeout = timeout
+        self._total = asyncio.Semaphore(concurrency)
+        self._hosts = {}    # ключ → Semaphore
+        self._idle = {}     # ключ → [(reader, writer)]
+        self._ssl = ssl.create_default_context()
+        self.opened = 0
+        self.reused = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key):
+        host = self._hosts.setdefault(key, asyncio.Semaphore(self.per_host))
+        # Сначала хост, потом общий лимит: запрос в очереди к занятому хосту
+        # не должен держать общий слот, пока другие хосты простаивают
+        async with host:
+            async with self._total:
+                yield
+
+    async def _connect(self, key, fresh=False):
+        """(reader, writer, переиспользовано ли)"""
+        idle = self._idle.get(key)
+        while idle and not fresh:
+            reader, writer = idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                self.reused += 1
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = key
+        self.opened += 1
+        reader, writer = await asyncio.open_connection(
+            host, port,
+            ssl=self._ssl if scheme == "https" else None,
+            server_hostname=host if scheme == "https" else None,
+        )
+        return reader, writer, False
+
+    def _release(self, key, conn, reusable):
+        idle = self._idle.setdefault(key, [])
+        if reusable and len(idle) < IDLE_PER_HOST:
+            idle.append(conn)
+        else:
+            conn[1].close()
+
+    async def request(self, method, url):
+        """(статус, заголовки) одного запроса без редиректов"""
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https") or not parts.hostname:
+            raise BadUrl("не http(s) ссылка")
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname.lower(), port)
+        target = quote(parts.path or "/", safe=URL_SAFE)
+        if parts.query:
+            target += "?" + quote(parts.query, safe=URL_SAFE)
+        host = parts.hostname.encode("idna").decode("ascii")
+        if parts.port is not None:
+            host += f":{parts.port}"
+        request = (
+            f"{method} {target} HTTP/1.1\r\n"
+            f"Host: {host}\r\n"
+            f"User-Agent: {USER_AGENT}\r\n"
+            "Accept: */*\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("ascii")
+
+        async with self.slot(key):
+            fresh = False
+            while True:
+                reader, writer, reused = await asyncio.wait_for(self._connect(key, fresh), self.timeout)
+                try:
+                    writer.write(request)
+                    await writer.drain()
+                    status, headers, reusable = await asyncio.wait_for(
+                        read_response(reader, method), self.timeout
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    # Простаивавшее соединение сервер мог уже закрыть — ещё раз по новому
+                    if reused:
+                        fresh = True
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                self._release(key, (reader, writer), reusable)
+                return status, headers
+
+    async def close(self):
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+        self._idle.clear()
+
+
+async def read_response(reader, method):
+    """(статус, заголовки, можно ли переиспользовать соединение); тело пропускается"""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("сервер закрыл соединение")
+    parts = line.decode("latin-1").split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+        raise ConnectionError(f"не HTTP ответ: {line[:40]!r}")
+    status = int(parts[1])
+    headers = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = h.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    reusable = headers.get("connection", "").lower() != "close" and parts[0] != "HTTP/1.0"
+    if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+        return status, headers, reusable
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        total = 0
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # Трейлеры до пустой строки
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return status, headers, reusable
+            total += size
+            if total > MAX_BODY:
+                return status, headers, False
+            await reader.readexactly(size + 2)
+    length = headers.get("content-length")
+    if length is not None and length.isdigit():
+        if int(length) > MAX_BODY:
+            return status, headers, False
+        await reader.readexactly(int(length))
+        return status, headers, reusable
+    # Длина не указана — тело до конца соединения
+    return status, headers, False
+
+
+async def fetch(pool, method, url):
+    """(статус, итоговый url) с редиректами"""
+    for _ in range(MAX_REDIRECTS + 1):
+        status, headers = await pool.request(method, url)
+        location = headers.get("location")
+        if status in (301, 302, 303, 307, 308) and location:
+            url = urljoin(url, location)
+            continue
+        return status, url
+    raise ConnectionError(f"больше {MAX_REDIRECTS} редиректов")
+
+
+async def check_url(pool, url):
+    """Результат проверки: {"ok", "status", "method", "final", "error", "checked"}"""
+    result = {"ok": False, "status": None, "method": "HEAD", "final": None, "error": None}
+    try:
+        status, final = await fetch(pool, "HEAD", url)
+    except BadUrl as e:
+        result.update(error=str(e), checked=int(time.time()))
+        return result
+    except NETWORK_ERRORS as e:
+        status, final = None, None
+        result["error"] = _error_text(e)
+    if status is None or status in HEAD_FALLBACK:
+        result["method"] = "GET"
+        try:
+            status, final = await fetch(pool, "GET", url)
+            result["error"] = None
+        except NETWORK_ERRORS as e:
+            status = None
+            result["error"] = _error_text(e)
+    if status is not None:
+        result["status"] = status
+        result["ok"] = status < 400 or status in ALIVE_STATUSES
+        if final != url:
+            result["final"] = final
+    result["checked"] = int(time.time())
+    return result
+
+
+def _error_text(e):
+    if isinstance(e, asyncio.TimeoutError):
+        return "таймаут"
+    return f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+
+
+async def check_all(urls, per_host=PER_HOST, concurrency=CONCURRENCY, timeout=TIMEOUT):
+    """{url: результат} для всех urls; прогресс — каждые 10%"""
+    pool = Pool(per_host, concurrency, timeout)
+    results = {}
+    step = max(len(urls) // 10, 1)
+
+    async def one(url):
+        results[url] = await check_url(pool, url)
+        if len(results) % step == 0 or len(results) == len(urls):
+            print(f"   … {len(results)}/{len(urls)}")
+
+    try:
+        await asyncio.gather(*(one(url) for url in urls))
+    finally:
+        await pool.close()
+    print(f"   Соединений открыто: {pool.opened}, переиспользовано: {pool.reused}")
+    return results
+
+# ─────────────────────────────────────────────────────────────
+# КЭШ РЕЗУЛЬТАТОВ
+# ─────────────────────────────────────────────────────────────
+
+def load_cache(path=CACHE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("urls", {})
+
+
+def save_cache(urls, path=CACHE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fileio.atomic_write(path, json.dumps(
+        {"version": CACHE_VERSION, "urls": urls}, ensure_ascii=False
+    ))
+
+
+def is_fresh(entry, now, ttl):
+    """Результат ещё годен: рабочая ссылка — ttl секунд, битая — TTL_BROKEN"""
+    age = now - entry.get("checked", 0)
+    return age < (ttl if entry.get("ok") else min(ttl, TTL_BROKEN))
+
+# ─────────────────────────────────────────────────────────────
+# ОТЧЁТ
+# ─────────────────────────────────────────────────────────────
+
+def build_report(links, results, checked, from_cache):
+    files = {}
+    for url, uses in links.items():
+        result = results[url]
+        for rel, uid, field in uses:
+            entry = files.setdefault(rel, {"links": 0, "broken": []})
+            entry["links"] += 1
+            if not result["ok"]:
+                entry["broken"].append({
+                    "id": uid, "field": field, "url": url,
+                    "status": result["status"], "error": result["error"],
+                })
+    return {
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "urls": len(links),
+        "checked": checked,
+        "from_cache": from_cache,
+        "broken_urls": sum(1 for url in links if not results[url]["ok"]),
+        "files": dict(sorted(files.items())),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="PSNHUB — проверка ссылок url_developer / url_3d")
+    parser.add_argument("--developers", default=DEVELOPERS_DIR, help="папка с JSON застройщиков")
+    parser.add_argument("-o", "--output", default=REPORT_FILE, help="куда записать отчёт (JSON)")
+    parser.add_argument("--cache", default=CACHE_FILE, help="файл кэша результатов")
+    parser.add_argument("--force", action="store_true", help="перепроверить всё, не глядя в кэш")
+    parser.add_argument("--ttl-days", type=float, default=TTL_DAYS,
+                        help=f"сколько дней не перепроверять рабочую ссылку (по умолчанию {TTL_DAYS})")
+    parser.add_argument("--per-host", type=int, default=PER_HOST,
+                        help=f"запросов к одному хосту одновременно (по умолчанию {PER_HOST})")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help=f"запросов всего одновременно (по умолчанию {CONCURRENCY})")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT,
+                        help=f"таймаут соединения / ответа, секунд (по умолчанию {TIMEOUT})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("=" * 55)
+    print("PSNHUB — Проверка ссылок")
+    print("=" * 55)
+
+    links = collect_links(developer_files(args.developers))
+    cache = {} if args.force else load_cache(args.cache)
+    now = time.time()
+    ttl = args.ttl_days * 24 * 60 * 60
+    results = {url: cache[url] for url in links if url in cache and is_fresh(cache[url], now, ttl)}
+    to_check = [url for url in links if url not in results]
+    print(f"🔗 Ссылок: {len(links)}, из кэша: {len(results)}, проверяю: {len(to_check)}")
+
+    started = time.perf_counter()
+    if to_check:
+        fresh = asyncio.run(check_all(to_check, args.per_host, args.concurrency, args.timeout))
+        results.update(fresh)
+        cache.update(fresh)
+        save_cache(cache, args.cache)
+    print(f"⏱️  {time.perf_counter() - started:.1f} с")
+
+    report = build_report(links, results, len(to_check), len(links) - len(to_check))
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print()
+    for rel, entry in report["files"].items():
+        mark = "❌" if entry["broken"] else "✅"
+        print(f"{mark} {rel}: ссылок {entry['links']}, битых {len(entry['broken'])}")
+        for item in entry["broken"][:5]:
+            reason = item["status"] or item["error"]
+            print(f"     {item['id']} {item['field']}: {reason} — {item['url']}")
+        if len(entry["broken"]) > 5:
+            print(f"     … и ещё {len(entry['broken']) - 5}")
+    print(f"\n📄 Отчёт: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — нормализация значений из Excel
+=======================================
+Общие clean_* / normalize_* для excel_to_json.py и generate_stats.py.
+
+Правила заданы таблицами (TYPE_RULES, DEAL_RULES, ...): метка и подстроки,
+первое совпавшее правило побеждает. Каждая таблица компилируется в
+регулярные выражения один раз при импорте.
+
+Значения в колонках повторяются тысячи раз ("Тип_объекта", "Срок_сдачи",
+метро), поэтому нормализаторы с малым числом разных входов кэшируются
+(lru_cache, не больше CACHE_SIZE значений на функцию). Попадания в кэш
+видны через cache_stats() / format_cache_stats().
+
+Тип помещения — две таблицы, как было до общего модуля: TYPE_RULES
+(конвертер, тип из Excel) и CATALOG_TYPE_RULES (generate_stats.py и
+build_*.py, поле "type" готовых файлов). Они отличаются синонимами
+("ready" / "готов", "пункт" / "пункт выдачи", франшиза); свести их
+в одну — изменение данных, а не рефакторинг.
+
+Добавить синоним = дописать подстроку в таблицу. Если меняется результат
+для уже встречавшихся значений — увеличь CACHE_VERSION в excel_to_json.py
+и generate_stats.py.
+"""
+
+import re
+from functools import lru_cache, wraps
+
+# Сколько разных значений помнит кэш одной функции
+CACHE_SIZE = 4096
+
+# ─────────────────────────────────────────────────────────────
+# ТАБЛИЦЫ ПРАВИЛ (подстроки в нижнем регистре)
+# ─────────────────────────────────────────────────────────────
+
+TYPE_DEFAULT = "ПСН"
+TYPE_RULES = [
+    ("Офис",    ("офис", "office")),
+    ("ГАБ",     ("габ", "gab", "ready")),
+    ("ПВЗ",     ("пвз", "pvz", "пункт")),
+    ("ГАБ",     ("франш", "franchise")),
+    ("Премиум", ("премиум", "premium", "элит")),
+]
+
+CATALOG_TYPE_RULES = [
+    ("Офис",    ("офис", "office")),
+    ("ГАБ",     ("габ", "gab", "готов")),
+    ("ПВЗ",     ("пвз", "pvz", "пункт выдачи")),
+    ("Премиум", ("премиум", "premium", "элит")),
+]
+
+DEAL_DEFAULT = "sale"
+DEAL_RULES = [
+    ("rent", ("аренд", "rent")),
+]
+
+CITY_RULES = [
+    ("Москва", ("москва", "moscow")),
+]
+
+# Месяц в сроке сдачи → квартал
+DELIVERY_QUARTERS = [
+    ("Q1", ("январ", "феврал", "март")),
+    ("Q2", ("апрел", "май", "мая", "июн")),
+    ("Q3", ("июл", "август", "сентябр")),
+    ("Q4", ("октябр", "ноябр", "декабр")),
+]
+
+# Станции с этими подстроками не попадают в metro (пересадки МЦК)
+METRO_EXCLUDE = ("МЦК",)
+METRO_MIN_LEN = 4
+METRO_MAX = 2
+
+
+def compile_rules(rules):
+    """[(метка, подстроки)] → [(метка, regex)] — порядок правил сохраняется"""
+    return [
+        (label, re.compile("|".join(re.escape(s) for s in needles)))
+        for label, needles in rules
+    ]
+
+
+def match_rules(compiled, text, default=None):
+    for label, pattern in compiled:
+        if pattern.search(text):
+            return label
+    return default
+
+
+_TYPE = compile_rules(TYPE_RULES)
+_CATALOG_TYPE = compile_rules(CATALOG_TYPE_RULES)
+_DEAL = compile_rules(DEAL_RULES)
+_CITY = compile_rules(CITY_RULES)
+_QUARTER = compile_rules(DELIVERY_QUARTERS)
+
+_YEAR_RE = re.compile(r'(202\d)')
+_NOT_NUMBER_RE = re.compile(r'[^\d.,]')
+
+# ─────────────────────────────────────────────────────────────
+# КЭШ
+# ─────────────────────────────────────────────────────────────
+
+_CACHED = {}
+# Счётчики, пришедшие из других процессов (воркеры конвертера)
+_MERGED = {}
+
+
+def cached(func):
+    """lru_cache на CACHE_SIZE значений с учётом типа (1 и 1.0 — разные входы).
+
+    Нехэшируемое значение просто считается без кэша.
+    """
+    memo = lru_cache(maxsize=CACHE_SIZE, typed=True)(func)
+
+    @wraps(func)
+    def wrapper(val):
+        try:
+            return memo(val)
+        except TypeError:
+            return func(val)
+
+    wrapper.cache_info = memo.cache_info
+    wrapper.cache_clear = memo.cache_clear
+    _CACHED[func.__name__] = memo
+    return wrapper
+
+
+def cache_stats():
+    """{функция: {"hits", "misses"}} — с учётом merge_cache_stats()"""
+    stats = {}
+    for name, memo in _CACHED.items():
+        info = memo.cache_info()
+        extra = _MERGED.get(name, {})
+        stats[name] = {
+            "hits": info.hits + extra.get("hits", 0),
+            "misses": info.misses + extra.get("misses", 0),
+        }
+    return stats
+
+
+def merge_cache_stats(stats):
+    """Добавляет счётчики cache_stats() другого процесса"""
+    for name, counts in stats.items():
+        extra = _MERGED.setdefault(name, {"hits": 0, "misses": 0})
+        extra["hits"] += counts.get("hits", 0)
+        extra["misses"] += counts.get("misses", 0)
+
+
+def format_cache_stats(stats=None):
+    """'type 99.1%, deal 100.0%' — доля попаданий по вызывавшимся функциям"""
+    parts = []
+    for name, counts in (stats or cache_stats()).items():
+        total = counts["hits"] + counts["misses"]
+        if total:
+            name = name.replace("normalize_", "").replace("_values", "").strip("_")
+            parts.append(f"{name} {100 * counts['hits'] / total:.1f}%")
+    return ", ".join(parts)
+
+# ─────────────────────────────────────────────────────────────
+# ОЧИСТКА (значения почти уникальны — без кэша)
+# ─────────────────────────────────────────────────────────────
+
+def clean_price(val):
+    """41 203 240 руб. → 41203240"""
+    if val is None:
+        return 0
+    s = str(val).replace(" ", "").replace("\xa0", "")
+    s = _NOT_NUMBER_RE.sub('', s)
+    s = s.replace(",", ".")
+    parts = s.split(".")
+    if len(parts) > 1:
+        s = parts[0]
+    try:
+        return int(float(s))
+    except:
+        return 0
+
+
+def clean_area(val):
+    """100.3 м² → 100.3"""
+    if val is None:
+        return 0.0
+    s = str(val).replace(" ", "").replace("\xa0", "").replace("м²", "").replace("м2", "")
+    s = _NOT_NUMBER_RE.sub('', s)
+    s = s.replace(",", ".")
+    try:
+        return round(float(s), 2)
+    except:
+        return 0.0
+
+
+def clean_str(val):
+    """Чистит строку от пробелов и None"""
+    if val is None:
+        return ""
+    return str(val).strip()
+
+
+def clean_floor(val):
+    """'1.0' → 1"""
+    if val is None:
+        return None
+    try:
+        return int(float(str(val)))
+    except:
+        return None
+
+# ─────────────────────────────────────────────────────────────
+# НОРМАЛИЗАЦИЯ (мало разных значений — с кэшем)
+# ─────────────────────────────────────────────────────────────
+
+@cached
+def normalize_type(val):
+    """Нормализует тип помещения из Excel: 'Офисное помещение' → 'Офис'"""
+    return match_rules(_TYPE, clean_str(val).lower(), TYPE_DEFAULT)
+
+
+@cached
+def normalize_catalog_type(val):
+    """Тип помещения готового файла к стандарту (для статистики и сборок)"""
+    return match_rules(_CATALOG_TYPE, clean_str(val).lower(), TYPE_DEFAULT)
+
+
+@cached
+def normalize_deal(val):
+    """'аренда ' → 'rent', 'продажа' → 'sale'"""
+    return match_rules(_DEAL, clean_str(val).lower(), DEAL_DEFAULT)
+
+
+@cached
+def normalize_city(val):
+    """'Москва ' → 'Москва'"""
+    v = clean_str(val)
+    return match_rules(_CITY, v.lower(), v)
+
+
+@cached
+def normalize_delivery(val):
+    """'до 28 апреля 2028' / '2026.0' → '2028-Q2' / '2026'"""
+    if val is None:
+        return ""
+    s = str(val).strip()
+    # Если просто год: 2026.0
+    year_match = _YEAR_RE.search(s)
+    if year_match:
+        year = year_match.group(1)
+        # Попробуем найти квартал по месяцу
+        q = match_rules(_QUARTER, s.lower())
+        return f"{year}-{q}" if q else year
+    return s
+
+
+@cached
+def normalize_commission(val):
+    """'3%' / '3.5' / None → 3.5"""
+    if val is None:
+        return 0
+    s = str(val).replace("%", "").replace(",", ".").strip()
+    try:
+        return round(float(s), 1)
+    except:
+        return 0
+
+
+@cached
+def _metro_values(val):
+    parts = [p.strip() for p in str(val).split(",")]
+    # Фильтруем МЦК и слишком короткие
+    result = [
+        p for p in parts
+        if len(p) >= METRO_MIN_LEN and not any(x in p for x in METRO_EXCLUDE)
+    ]
+    return tuple(result[:METRO_MAX])
+
+
+def split_metro(val):
+    """'ЗИЛ, МЦК ЗИЛ, Тульская, Автозаводская' → ['Тульская', 'Автозаводская']"""
+    if not val:
+        return []
+    # В кэше кортеж — вызывающему отдаём свой список
+    return list(_metro_values(val))
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — профиль конвертера (excel_to_json.py --profile)
+========================================================
+Время (wall и CPU) по этапам и счётчики — по каждой книге и за весь запуск:
+
+    open       — openpyxl.load_workbook
+    headers    — заголовки и индекс колонок
+    read       — разбор строк листа (iter_rows)
+    normalize  — clean_* / normalize_* и сборка объекта
+    dedup      — make_id и проверка повторов id
+    write      — json.dumps объекта, хэш, колонки
+    cache      — запись объекта в кэш конвертации
+    cache_read — чтение объектов из кэша (неизменённые книги, воркеры пула)
+    finalize   — сравнение с прежним файлом и замена
+
+Этапы не вложены друг в друга: время меряется кусками между lap().
+Без --profile используется NULL — его методы ничего не делают.
+
+Sampler — опциональный семплирующий профайлер одной книги: стеки
+собираются по SIGPROF и пишутся в .folded (формат flamegraph.pl /
+speedscope). Где setitimer нет (Windows), вместо него cProfile → .pstats.
+"""
+
+import json
+import os
+import signal
+import time
+from contextlib import contextmanager
+
+REPORT_VERSION = 1
+
+# Интервал семплирования, секунды процессорного времени
+SAMPLE_INTERVAL = 0.005
+
+
+def _clock():
+    return time.perf_counter(), time.process_time()
+
+
+def _new_record():
+    return {"wall": 0.0, "cpu": 0.0, "stages": {}, "counters": {}}
+
+
+def _merge_record(into, other):
+    for name, s in other.get("stages", {}).items():
+        stage = into["stages"].setdefault(name, {"wall": 0.0, "cpu": 0.0, "calls": 0})
+        for k in ("wall", "cpu", "calls"):
+            stage[k] += s.get(k, 0)
+    for name, n in other.get("counters", {}).items():
+        into["counters"][name] = into["counters"].get(name, 0) + n
+
+
+class Profiler:
+    """Время по этапам и счётчики; текущая книга задаётся workbook()"""
+
+    enabled = True
+
+    def __init__(self):
+        self.workbooks = {}
+        self._current = None
+        self._started = _clock()
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    @contextmanager
+    def workbook(self, name):
+        record = self.workbooks.setdefault(name, _new_record())
+        previous, self._current = self._current, record
+        wall, cpu = _clock()
+        try:
+            yield record
+        finally:
+            end_wall, end_cpu = _clock()
+            record["wall"] += end_wall - wall
+            record["cpu"] += end_cpu - cpu
+            self._current = previous
+
+    def clock(self):
+        return _clock()
+
+    def lap(self, stage, start):
+        """Добавляет этапу время с start; возвращает новую отметку для следующего"""
+        now = _clock()
+        if self._current is not None:
+            s = self._current["stages"].get(stage)
+            if s is None:
+                s = self._current["stages"][stage] = {"wall": 0.0, "cpu": 0.0, "calls": 0}
+            s["wall"] += now[0] - start[0]
+            s["cpu"] += now[1] - start[1]
+            s["calls"] += 1
+        return now
+
+    def count(self, name, n=1):
+        if self._current is not None:
+            counters = self._current["counters"]
+            counters[name] = counters.get(name, 0) + n
+
+    def iterate(self, stage, iterable):
+        """Отдаёт элементы iterable, записывая время их получения в stage"""
+        it = iter(iterable)
+        while True:
+            t = _clock()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.lap(stage, t)
+                return
+            self.lap(stage, t)
+            yield item
+
+    def merge(self, name, record, key="worker"):
+        """Добавляет к книге запись из другого процесса (воркера пула)"""
+        target = self.workbooks.setdefault(name, _new_record())
+        _merge_record(target, record)
+        # Книгу по листам считают несколько воркеров — время складывается
+        prev = target.get(key, {"wall": 0.0, "cpu": 0.0})
+        target[key] = {"wall": prev["wall"] + record["wall"], "cpu": prev["cpu"] + record["cpu"]}
+
+    def report(self):
+        wall, cpu = _clock()
+        total = _new_record()
+        for record in self.workbooks.values():
+            _merge_record(total, record)
+        total["wall"] = wall - self._started[0]
+        total["cpu"] = cpu - self._started[1]
+        return {
+            "version": REPORT_VERSION,
+            "started": self.started_at,
+            "total": _rounded(total),
+            "workbooks": {name: _rounded(r) for name, r in self.workbooks.items()},
+        }
+
+    def write(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+class NullProfiler:
+    """Профиль выключен: те же методы, ничего не меряют"""
+
+    enabled = False
+
+    @contextmanager
+    def workbook(self, name):
+        yield None
+
+    def clock(self):
+        return None
+
+    def lap(self, stage, start):
+        return None
+
+    def count(self, name, n=1):
+        pass
+
+    def iterate(self, stage, iterable):
+        return iterable
+
+
+NULL = NullProfiler()
+
+
+def _rounded(record):
+    out = {k: round(v, 4) if isinstance(v, float) else v for k, v in record.items()}
+    out["stages"] = {
+        name: {"wall": round(s["wall"], 4), "cpu": round(s["cpu"], 4), "calls": s["calls"]}
+        for name, s in sorted(record["stages"].items(), key=lambda kv: -kv[1]["wall"])
+    }
+    if isinstance(record.get("worker"), dict):
+        out["worker"] = {k: round(v, 4) for k, v in record["worker"].items()}
+    return out
+
+
+def format_stages(record, top=4):
+    """'read 1.20 с (55%), normalize 0.60 с (27%), ...' — самые долгие этапы"""
+    stages = sorted(record["stages"].items(), key=lambda kv: -kv[1]["wall"])
+    total = sum(s["wall"] for _, s in stages) or 1
+    return ", ".join(
+        f"{name} {s['wall']:.2f} с ({100 * s['wall'] / total:.0f}%)" for name, s in stages[:top]
+    )
+
+# ─────────────────────────────────────────────────────────────
+# СЕМПЛИРУЮЩИЙ ПРОФАЙЛЕР
+# ─────────────────────────────────────────────────────────────
+
+class Sampler:
+    """Семплы стеков по SIGPROF → path + '.folded' (или cProfile → '.pstats').
+
+    Работает только в главном потоке процесса — как и конвертация книги.
+    """
+
+    def __init__(self, path, interval=SAMPLE_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.samples = {}
+        self._cprofile = None
+        self.output = None
+
+    @staticmethod
+    def _frame_name(frame):
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+    def _handler(self, signum, frame):
+        stack = []
+        while frame is not None:
+            stack.append(self._frame_name(frame))
+            frame = frame.f_back
+        key = ";".join(reversed(stack))
+        self.samples[key] = self.samples.get(key, 0) + 1
+
+    def start(self):
+        if hasattr(signal, "setitimer") and hasattr(signal, "SIGPROF"):
+            self._previous = signal.signal(signal.SIGPROF, self._handler)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self.output = f"{self.path}.pstats"
+            self._cprofile.dump_stats(self.output)
+            return self.output
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous)
+        self.output = f"{self.path}.folded"
+        with open(self.output, "w", encoding="utf-8") as f:
+            for stack, n in sorted(self.samples.items(), key=lambda kv: -kv[1]):
+                f.write(f"{stack} {n}\n")
+        return self.output
+
+
+@contextmanager
+def sampled(path):
+    """with sampled(путь_без_расширения) as s: ...  → s.output после выхода"""
+    sampler = Sampler(path)
+    sampler.start()
+    try:
+        yield sampler
+    finally:
+        sampler.stop()
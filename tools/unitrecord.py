@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSNHUB — компактная запись объекта внутри конвертера
+====================================================
+iter_units отдаёт не словари на 19 ключей, а Unit: поля в __slots__,
+без __dict__ у каждого объекта. Повторяющиеся строки (застройщик, ЖК,
+тип, город, округ, станции метро, ...) интернируются — у тысяч объектов
+одного ЖК это одна и та же строка, а одинаковые наборы метро — один
+кортеж. В словарь формата {slug}_{deal}.json объект превращается
+только при записи: to_dict() / as_dict().
+
+    unit["deal"]        — чтение поля как у словаря
+    unit.to_dict()      — ключи в порядке FIELDS, metro — список
+"""
+
+import sys
+from operator import attrgetter
+
+# Поля объекта в порядке ключей в JSON
+FIELDS = (
+    "id", "jk", "developer", "type", "deal", "price", "area", "floor",
+    "finishing", "delivery", "district", "city", "metro", "address",
+    "url_developer", "has_3d", "url_3d", "commission", "comment",
+)
+
+# Значения, которые повторяются от объекта к объекту
+INTERNED = ("jk", "developer", "type", "deal", "finishing", "delivery",
+            "district", "city", "commission")
+
+_values = attrgetter(*FIELDS)
+
+# Одинаковые наборы станций метро → один кортеж
+_METRO = {}
+
+
+def intern_value(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def intern_metro(stations):
+    key = tuple(sys.intern(s) if type(s) is str else s for s in stations)
+    return _METRO.setdefault(key, key)
+
+
+class Unit:
+    """Объект каталога: поля FIELDS, строки из INTERNED интернированы"""
+
+    __slots__ = FIELDS
+
+    def __init__(self, **fields):
+        for name in FIELDS:
+            value = fields[name]
+            if name == "metro":
+                value = intern_metro(value)
+            elif name in INTERNED:
+                value = intern_value(value)
+            object.__setattr__(self, name, value)
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def to_dict(self):
+        unit = dict(zip(FIELDS, _values(self)))
+        unit["metro"] = list(unit["metro"])
+        return unit
+
+    def __eq__(self, other):
+        if isinstance(other, Unit):
+            return _values(self) == _values(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Unit({self.id!r})"
+
+
+def as_dict(unit):
+    """Словарь для записи — из Unit или уже готовый словарь (объект из кэша)"""
+    return unit.to_dict() if isinstance(unit, Unit) else unit